@@ -0,0 +1,53 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pearl_common import images
+from services import awsService, imageService
+
+
+def _list_keys(client, prefix: str):
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=awsService.BUCKET_NAME, Prefix=prefix):
+        for item in page.get("Contents", []):
+            yield item["Key"]
+
+
+def missing_sources(client, force: bool = False):
+    existing = set() if force else set(_list_keys(client, f"{images.VARIANT_PREFIX}/"))
+    for folder in images.UPLOAD_FOLDERS:
+        for source_key in _list_keys(client, f"{folder}/"):
+            if force or any(key not in existing for _, _, key in images.variant_keys(source_key)):
+                yield source_key
+
+
+def backfill(workers: int, force: bool, dry_run: bool):
+    if not imageService.available():
+        raise SystemExit("Pillow with support for the configured formats is required to render derivatives.")
+    client = awsService.get_s3_client()
+    sources = list(missing_sources(client, force))
+    print(f"{len(sources)} images need derivatives.")
+    if dry_run:
+        for source_key in sources:
+            print(source_key)
+        return
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(imageService.generate_derivatives, source_key): source_key for source_key in sources}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Failed {futures[future]}: {e}")
+            if done % 100 == 0:
+                print(f"{done}/{len(sources)} done")
+    print(f"Backfill finished: {len(sources) - failed} processed, {failed} failed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate image derivatives for uploads that do not have them yet.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--force", action="store_true", help="regenerate every derivative, e.g. after changing sizes")
+    parser.add_argument("--dry-run", action="store_true", help="only list the images that would be processed")
+    args = parser.parse_args()
+    backfill(args.workers, args.force, args.dry_run)
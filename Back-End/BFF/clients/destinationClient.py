@@ -1,49 +1,56 @@
-import httpx
-from typing import List
+from typing import List, Optional
 from schemas import proxySchema
+from clients import httpClient
+from config import settings
 
-DESTINATION_SERVICE_URL = "http://localhost:8000"
+SERVICE_NAME = "destination"
 
-async def handle_request(method: str, url: str, **kwargs):
-    async with httpx.AsyncClient() as client:
-        response = await client.request(method, url, **kwargs)
-        response.raise_for_status()
-        if response.status_code == 204 or not response.content:
-            return None
-        return response.json()
+async def handle_request(method: str, path: str, raw: bool = False, **kwargs):
+    if raw:
+        return await httpClient.relay(SERVICE_NAME, method, path, buffer=settings.PASSTHROUGH_VALIDATE, **kwargs)
+    return await httpClient.handle_request(SERVICE_NAME, method, path, **kwargs)
 
 async def add_destination(destination: proxySchema.DestinationCreated):
-    return await handle_request("POST", f"{DESTINATION_SERVICE_URL}/destinations/add", json=destination.model_dump())
+    return await handle_request("POST", "/destinations/add", json=destination.model_dump())
 
-async def get_all_destinations():
-    return await handle_request("GET", f"{DESTINATION_SERVICE_URL}/destinations/")
+async def get_all_destinations(raw: bool = False):
+    return await handle_request("GET", "/destinations/", raw=raw)
 
 async def get_destination_by_id(destination_id: int):
-    return await handle_request("GET", f"{DESTINATION_SERVICE_URL}/destinations/destination/{destination_id}")
+    return await handle_request("GET", f"/destinations/destination/{destination_id}")
+
+async def get_all_destinations_if_changed(etag: Optional[str]):
+    return await httpClient.fetch_if_changed(SERVICE_NAME, "/destinations/", etag)
+
+async def get_destination_by_id_if_changed(destination_id: int, etag: Optional[str]):
+    return await httpClient.fetch_if_changed(SERVICE_NAME, f"/destinations/destination/{destination_id}", etag)
+
+async def get_destinations_by_ids(destination_ids: List[int]):
+    return await handle_request("POST", "/destinations/bulk", json={"destinationIds": destination_ids})
 
 async def get_destinations_count():
-    return await handle_request("GET", f"{DESTINATION_SERVICE_URL}/api/destinations/count")
+    return await handle_request("GET", "/api/destinations/count")
 
 async def update_destination(destination_id: int, destination: proxySchema.DestinationCreated):
-    return await handle_request("PUT", f"{DESTINATION_SERVICE_URL}/destinations/update_destination/{destination_id}", json=destination.model_dump())
+    return await handle_request("PUT", f"/destinations/update_destination/{destination_id}", json=destination.model_dump())
 
 async def delete_destination(destination_id: int):
-    return await handle_request("DELETE", f"{DESTINATION_SERVICE_URL}/destinations/delete_destination/{destination_id}")
+    return await handle_request("DELETE", f"/destinations/delete_destination/{destination_id}")
 
 async def create_wishlist(wishlist: proxySchema.WishListCreated):
-    return await handle_request("POST", f"{DESTINATION_SERVICE_URL}/wishlist/add", json=wishlist.model_dump())
+    return await handle_request("POST", "/wishlist/add", json=wishlist.model_dump())
 
-async def get_wishlist(touristId: int):
-    return await handle_request("GET", f"{DESTINATION_SERVICE_URL}/wishlist/{touristId}")
+async def get_wishlist(touristId: int, raw: bool = False):
+    return await handle_request("GET", f"/wishlist/{touristId}", raw=raw)
 
 async def update_wishlist(wishlist_id: int, new_destinations: List[int]):
-    return await handle_request("PATCH", f"{DESTINATION_SERVICE_URL}/wishlist/{wishlist_id}/update-destinations", json=new_destinations)
+    return await handle_request("PATCH", f"/wishlist/{wishlist_id}/update-destinations", json=new_destinations)
 
 async def create_selected_list(selected_list: proxySchema.SelectedDestinationsCreated):
-    return await handle_request("POST", f"{DESTINATION_SERVICE_URL}/selected-destinations/add", json=selected_list.model_dump())
+    return await handle_request("POST", "/selected-destinations/add", json=selected_list.model_dump())
 
-async def get_selected_list(touristId: int):
-    return await handle_request("GET", f"{DESTINATION_SERVICE_URL}/selected-destinations/{touristId}")
+async def get_selected_list(touristId: int, raw: bool = False):
+    return await handle_request("GET", f"/selected-destinations/{touristId}", raw=raw)
 
 async def update_selected_list(list_id: int, new_list: List[int]):
-    return await handle_request("PATCH", f"{DESTINATION_SERVICE_URL}/selected-destinations/{list_id}/updated-selected-destinations", json=new_list)
\ No newline at end of file
+    return await handle_request("PATCH", f"/selected-destinations/{list_id}/updated-selected-destinations", json=new_list)
\ No newline at end of file
@@ -0,0 +1,306 @@
+import asyncio
+import copy
+import hashlib
+import httpx
+import re
+import time
+from typing import Dict, Tuple
+from starlette.background import BackgroundTask
+from starlette.responses import Response, StreamingResponse
+from prometheus_client import Counter, Histogram
+from config import settings
+from clients import loadBalancer, resilience, requestContext
+from pearl_common import metrics, tracing
+
+SERVICES = ("trip", "destination", "user")
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+RELAYED_HEADERS = ("content-type", "etag", "cache-control", "last-modified")
+class _NotModified:
+    # A sentinel compared by identity, so coalesced callers' deep copies must keep it as is
+    def __deepcopy__(self, memo):
+        return self
+
+
+NOT_MODIFIED = _NotModified()
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+DOWNSTREAM_REQUESTS = Counter(
+    "bff_downstream_requests_total", "Requests sent to downstream services", ["service", "method", "endpoint", "status"]
+)
+DOWNSTREAM_LATENCY = Histogram(
+    "bff_downstream_request_duration_seconds",
+    "Downstream request latency up to the response headers",
+    ["service", "method", "endpoint"],
+    buckets=metrics.LATENCY_BUCKETS,
+)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_pool_stats: Dict[str, Dict[str, int]] = {}
+_in_flight_gets: Dict[Tuple, "_Flight"] = {}
+_coalesce_stats: Dict[str, int] = {"leaders": 0, "coalesced": 0}
+
+
+def _build_client(service: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.HTTP_CONNECT_TIMEOUT,
+        read=settings.SERVICE_READ_TIMEOUTS.get(service, settings.HTTP_READ_TIMEOUT),
+        write=settings.HTTP_WRITE_TIMEOUT,
+        pool=settings.HTTP_POOL_TIMEOUT,
+    )
+    # http2 requires the optional "h2" package (pip install "httpx[http2]")
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=settings.HTTP2_ENABLED,
+        headers={"Accept-Encoding": settings.HTTP_ACCEPT_ENCODING},
+    )
+
+
+def endpoint_template(path: str) -> str:
+    return ID_SEGMENT.sub("/{id}", httpx.URL(path).path)
+
+
+def _new_stats() -> Dict[str, int]:
+    return {"in_flight": 0, "peak_in_flight": 0, "requests": 0, "saturated": 0, "pool_timeouts": 0}
+
+
+async def init_clients():
+    for service in SERVICES:
+        if service not in _clients:
+            _clients[service] = _build_client(service)
+            _pool_stats.setdefault(service, _new_stats())
+        resilience.get_breaker(service)
+
+
+async def close_clients():
+    for service in list(_clients):
+        await _clients.pop(service).aclose()
+
+
+def get_client(service: str) -> httpx.AsyncClient:
+    client = _clients.get(service)
+    if client is None or client.is_closed:
+        client = _clients[service] = _build_client(service)
+        _pool_stats.setdefault(service, _new_stats())
+    return client
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Wraps a streamed response body so its connection counts as in flight until the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+async def _send_once(service: str, method: str, path: str, stream: bool = False, **kwargs) -> httpx.Response:
+    client = get_client(service)
+    replica = loadBalancer.get_pool(service).pick()
+    url = replica.url + path
+    stats = _pool_stats[service]
+    stats["requests"] += 1
+    if stats["in_flight"] >= settings.HTTP_MAX_CONNECTIONS:
+        stats["saturated"] += 1
+    stats["in_flight"] += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+    replica.outstanding += 1
+    replica.requests += 1
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            stats["in_flight"] -= 1
+            replica.outstanding -= 1
+
+    endpoint = endpoint_template(path)
+    outcome = "error"
+    started = time.perf_counter()
+    streaming = False
+    try:
+        with tracing.start_span(f"{method} {service} {endpoint}", kind="client", service=service, url=url) as span:
+            request = client.build_request(method, url, **kwargs)
+            request.headers.update(tracing.outgoing_headers())
+            response = await client.send(request, stream=stream)
+            outcome = span.attributes["status_code"] = str(response.status_code)
+        if stream and not response.is_closed:
+            # Relayed and SSE bodies are still being read from the replica after this returns
+            response.stream = _ReleasingStream(response.stream, release)
+            streaming = True
+        return response
+    except httpx.PoolTimeout:
+        stats["pool_timeouts"] += 1
+        outcome = "pool_timeout"
+        raise
+    finally:
+        if not streaming:
+            release()
+        DOWNSTREAM_LATENCY.labels(service, method, endpoint).observe(time.perf_counter() - started)
+        DOWNSTREAM_REQUESTS.labels(service, method, endpoint, outcome).inc()
+
+
+async def send(service: str, method: str, path: str, stream: bool = False, **kwargs) -> httpx.Response:
+    breaker = resilience.get_breaker(service)
+    budget = resilience.get_retry_budget(service)
+    max_attempts = settings.RETRY_MAX_ATTEMPTS if method in IDEMPOTENT_METHODS else 1
+    budget.deposit()
+
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        try:
+            response = await _send_once(service, method, path, stream=stream, **kwargs)
+        except httpx.TransportError:
+            breaker.record_failure()
+            if attempt >= max_attempts or not budget.withdraw():
+                raise
+        except BaseException:
+            breaker.release_probe()
+            raise
+        else:
+            if response.status_code < 500:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= max_attempts or not budget.withdraw():
+                return response
+            await response.aclose()
+        await asyncio.sleep(resilience.backoff_delay(attempt))
+
+
+async def _fetch(service: str, method: str, path: str, **kwargs):
+    response = await send(service, method, path, **kwargs)
+    response.raise_for_status()
+    if response.status_code == 204 or not response.content:
+        return None
+    return response.json()
+
+
+def _coalesce_key(service: str, method: str, path: str, kwargs: Dict) -> Tuple:
+    headers = httpx.Headers(kwargs.get("headers") or {})
+    authorization = headers.get("Authorization")
+    auth_scope = hashlib.sha256(authorization.encode()).hexdigest() if authorization else None
+    params = str(httpx.QueryParams(kwargs.get("params") or {}))
+    return service, method, path, params, auth_scope
+
+
+def _can_coalesce(method: str, kwargs: Dict) -> bool:
+    return (
+        settings.COALESCE_ENABLED
+        and method == "GET"
+        and not any(kwargs.get(body) is not None for body in ("json", "data", "content", "files"))
+    )
+
+
+class _Flight:
+    """One in-flight load and the number of callers that joined it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.followers = 0
+
+
+def _release(key: Tuple, flight: _Flight):
+    if _in_flight_gets.get(key) is flight:
+        del _in_flight_gets[key]
+    if not flight.task.cancelled():
+        flight.task.exception()
+
+
+async def _single_flight(key: Tuple, load):
+    """Run load() once for every caller with the same key while it is in flight.
+
+    The loaded result itself is never handed to a caller that shares it: each follower gets a deep copy, and so
+    does the leader once anyone has joined, so changes one caller makes to its result never reach another's.
+    """
+    flight = _in_flight_gets.get(key)
+    if flight is not None:
+        _coalesce_stats["coalesced"] += 1
+        flight.followers += 1
+        return copy.deepcopy(await asyncio.shield(flight.task))
+
+    flight = _in_flight_gets[key] = _Flight(asyncio.ensure_future(load()))
+    # Registered before the leader awaits, so the key is released before the leader wakes and no one can join
+    # after it has looked at followers
+    flight.task.add_done_callback(lambda done: _release(key, flight))
+    _coalesce_stats["leaders"] += 1
+    result = await asyncio.shield(flight.task)
+    return copy.deepcopy(result) if flight.followers else result
+
+
+async def handle_request(service: str, method: str, path: str, **kwargs):
+    if not _can_coalesce(method, kwargs):
+        return await _fetch(service, method, path, **kwargs)
+    return await _single_flight(
+        _coalesce_key(service, method, path, kwargs), lambda: _fetch(service, method, path, **kwargs)
+    )
+
+
+async def _fetch_if_changed(service: str, path: str, etag: str | None, **kwargs) -> Tuple:
+    headers = {**(kwargs.pop("headers", None) or {}), **({"If-None-Match": etag} if etag else {})}
+    response = await send(service, "GET", path, headers=headers, **kwargs)
+    if response.status_code == 304:
+        return NOT_MODIFIED, etag
+    response.raise_for_status()
+    return (response.json() if response.content else None), response.headers.get("etag")
+
+
+async def fetch_if_changed(service: str, path: str, etag: str | None, **kwargs) -> Tuple:
+    # Cache misses on hot keys arrive in bursts, so they share one upstream GET like handle_request's do
+    if not _can_coalesce("GET", kwargs):
+        return await _fetch_if_changed(service, path, etag, **kwargs)
+    return await _single_flight(
+        _coalesce_key(service, "GET", path, kwargs) + (etag,),
+        lambda: _fetch_if_changed(service, path, etag, **kwargs),
+    )
+
+
+async def relay(service: str, method: str, path: str, buffer: bool = False, **kwargs) -> Response:
+    if_none_match = requestContext.if_none_match()
+    if method == "GET" and if_none_match:
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), "If-None-Match": if_none_match}
+    response = await send(service, method, path, stream=True, **kwargs)
+    headers = {name: response.headers[name] for name in RELAYED_HEADERS if name in response.headers}
+    if buffer:
+        body = await response.aread()
+        await response.aclose()
+        return Response(content=body, status_code=response.status_code, headers=headers)
+    return StreamingResponse(
+        response.aiter_bytes(),
+        status_code=response.status_code,
+        headers=headers,
+        background=BackgroundTask(response.aclose),
+    )
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    return {
+        service: {
+            **stats,
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "utilization": round(stats["in_flight"] / settings.HTTP_MAX_CONNECTIONS, 3),
+        }
+        for service, stats in _pool_stats.items()
+    }
+
+
+def get_coalesce_stats() -> Dict[str, int]:
+    return {**_coalesce_stats, "in_flight": len(_in_flight_gets)}
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import random
+import signal
+import time
+from typing import Dict, List, Optional
+import httpx
+from config import settings, Settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_URL_SETTINGS = {
+    "trip": ("TRIP_SERVICE_URLS", "TRIP_SERVICE_URL"),
+    "destination": ("DESTINATION_SERVICE_URLS", "DESTINATION_SERVICE_URL"),
+    "user": ("USER_SERVICE_URLS", "USER_SERVICE_URL"),
+}
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.requests = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.draining_since: Optional[float] = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "draining": self.draining_since is not None,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+        }
+
+
+class ReplicaPool:
+    def __init__(self, service: str, urls: List[str]):
+        self.service = service
+        self.replicas: List[Replica] = [Replica(url) for url in urls]
+
+    def _candidates(self) -> List[Replica]:
+        active = [replica for replica in self.replicas if replica.draining_since is None]
+        healthy = [replica for replica in active if replica.healthy]
+        # With every replica marked down, keep trying them rather than failing outright;
+        # the circuit breaker decides when to stop
+        return healthy or active or self.replicas
+
+    def pick(self) -> Replica:
+        candidates = self._candidates()
+        if len(candidates) == 1:
+            return candidates[0]
+        if settings.LOAD_BALANCER == "least_outstanding":
+            fewest = min(replica.outstanding for replica in candidates)
+            return random.choice([replica for replica in candidates if replica.outstanding == fewest])
+        # Power of two choices: nearly as good as scanning every replica, without herding onto one
+        first, second = random.sample(candidates, 2)
+        return first if first.outstanding <= second.outstanding else second
+
+    def update(self, urls: List[str]):
+        wanted = [url.rstrip("/") for url in urls]
+        current = {replica.url: replica for replica in self.replicas}
+        for url in wanted:
+            if url not in current:
+                self.replicas.append(Replica(url))
+                logger.info("Added %s replica %s", self.service, url)
+            elif current[url].draining_since is not None:
+                current[url].draining_since = None
+        for replica in self.replicas:
+            if replica.url not in wanted and replica.draining_since is None:
+                replica.draining_since = time.monotonic()
+                logger.info("Draining %s replica %s", self.service, replica.url)
+
+    def reap_drained(self):
+        now = time.monotonic()
+        for replica in list(self.replicas):
+            if replica.draining_since is None:
+                continue
+            if replica.outstanding == 0 or now - replica.draining_since > settings.REPLICA_DRAIN_TIMEOUT:
+                self.replicas.remove(replica)
+                logger.info("Removed %s replica %s", self.service, replica.url)
+
+
+_pools: Dict[str, ReplicaPool] = {}
+_health_task: Optional[asyncio.Task] = None
+
+
+def configured_urls(service: str, source: Settings = settings) -> List[str]:
+    list_name, single_name = SERVICE_URL_SETTINGS[service]
+    return getattr(source, list_name) or [getattr(source, single_name)]
+
+
+def get_pool(service: str) -> ReplicaPool:
+    if service not in _pools:
+        _pools[service] = ReplicaPool(service, configured_urls(service))
+    return _pools[service]
+
+
+def reload():
+    """Re-reads the replica lists; removed replicas stop getting new requests and leave once idle."""
+    fresh = Settings()
+    for service, (list_name, single_name) in SERVICE_URL_SETTINGS.items():
+        setattr(settings, list_name, getattr(fresh, list_name))
+        setattr(settings, single_name, getattr(fresh, single_name))
+        get_pool(service).update(configured_urls(service))
+
+
+async def _check(client: httpx.AsyncClient, replica: Replica):
+    try:
+        response = await client.get(replica.url + settings.HEALTH_CHECK_PATH, timeout=settings.HEALTH_CHECK_TIMEOUT)
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    if ok:
+        replica.consecutive_failures = 0
+        replica.consecutive_successes += 1
+        if not replica.healthy and replica.consecutive_successes >= settings.HEALTH_CHECK_HEALTHY_THRESHOLD:
+            replica.healthy = True
+            logger.info("Replica %s is healthy again", replica.url)
+    else:
+        replica.consecutive_successes = 0
+        replica.consecutive_failures += 1
+        if replica.healthy and replica.consecutive_failures >= settings.HEALTH_CHECK_UNHEALTHY_THRESHOLD:
+            replica.healthy = False
+            logger.warning("Replica %s failed %d health checks", replica.url, replica.consecutive_failures)
+
+
+async def check_all(client: httpx.AsyncClient):
+    checks = []
+    for service in SERVICE_URL_SETTINGS:
+        pool = get_pool(service)
+        pool.reap_drained()
+        checks += [_check(client, replica) for replica in pool.replicas if replica.draining_since is None]
+    await asyncio.gather(*checks)
+
+
+async def _health_loop():
+    async with httpx.AsyncClient(headers={"Accept-Encoding": "identity"}) as client:
+        while True:
+            try:
+                await check_all(client)
+            except Exception:
+                logger.exception("Health check round failed")
+            await asyncio.sleep(settings.HEALTH_CHECK_INTERVAL)
+
+
+def start():
+    global _health_task
+    if _health_task is None and settings.HEALTH_CHECK_INTERVAL > 0:
+        _health_task = asyncio.create_task(_health_loop())
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        # No SIGHUP on this platform; replica lists are then fixed for the process lifetime
+        pass
+
+
+async def stop():
+    global _health_task
+    try:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        pass
+    if _health_task is not None:
+        _health_task.cancel()
+        try:
+            await _health_task
+        except asyncio.CancelledError:
+            pass
+        _health_task = None
+
+
+def get_replica_stats() -> Dict[str, List[Dict]]:
+    return {service: [replica.snapshot() for replica in get_pool(service).replicas] for service in SERVICE_URL_SETTINGS}
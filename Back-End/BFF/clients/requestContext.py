@@ -0,0 +1,35 @@
+from contextvars import ContextVar
+from typing import Dict, Optional
+from fastapi import HTTPException, Request
+
+_if_none_match: ContextVar[Optional[str]] = ContextVar("if_none_match", default=None)
+_response_headers: ContextVar[Optional[Dict[str, str]]] = ContextVar("response_headers", default=None)
+
+
+def bind(request: Request) -> Dict[str, str]:
+    response_headers: Dict[str, str] = {}
+    _if_none_match.set(request.headers.get("if-none-match"))
+    _response_headers.set(response_headers)
+    return response_headers
+
+
+def if_none_match() -> Optional[str]:
+    return _if_none_match.get()
+
+
+def etag_matches(etag: str) -> bool:
+    header = _if_none_match.get()
+    if not header:
+        return False
+    candidates = {candidate.strip() for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def respond_with_etag(etag: Optional[str]):
+    if etag is None:
+        return
+    if etag_matches(etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response_headers = _response_headers.get()
+    if response_headers is not None:
+        response_headers["ETag"] = etag
@@ -0,0 +1,134 @@
+import random
+import time
+from typing import Dict
+from fastapi import HTTPException, status
+from config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DownstreamUnavailable(HTTPException):
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{service} service is temporarily unavailable",
+            headers={"Retry-After": str(max(1, int(retry_after)))},
+        )
+        self.service = service
+
+
+class CircuitBreaker:
+    def __init__(self, service: str, failure_threshold: int, recovery_timeout: float, half_open_max_calls: int):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        if self.state == OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.recovery_timeout:
+                self.rejected += 1
+                raise DownstreamUnavailable(self.service, self.recovery_timeout - elapsed)
+            self.state = HALF_OPEN
+            self.half_open_calls = 0
+        if self.state == HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise DownstreamUnavailable(self.service, self.recovery_timeout)
+            self.half_open_calls += 1
+
+    def release_probe(self):
+        # For an attempt that ended without telling us anything about the service (cancelled, or failed locally),
+        # so a half-open breaker can let another probe through instead of waiting forever for this one
+        if self.state == HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_success(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.half_open_calls = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class RetryBudget:
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+
+def backoff_delay(attempt: int) -> float:
+    # "full jitter": a random delay up to the capped exponential backoff
+    cap = min(settings.RETRY_BACKOFF_MAX, settings.RETRY_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_budgets: Dict[str, RetryBudget] = {}
+
+
+def get_breaker(service: str) -> CircuitBreaker:
+    if service not in _breakers:
+        _breakers[service] = CircuitBreaker(
+            service,
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.BREAKER_RECOVERY_TIMEOUT,
+            half_open_max_calls=settings.BREAKER_HALF_OPEN_MAX_CALLS,
+        )
+    return _breakers[service]
+
+
+def get_retry_budget(service: str) -> RetryBudget:
+    if service not in _budgets:
+        _budgets[service] = RetryBudget(settings.RETRY_BUDGET_RATIO, settings.RETRY_BUDGET_MAX_TOKENS)
+    return _budgets[service]
+
+
+def get_health() -> Dict:
+    services = {}
+    for service, breaker in _breakers.items():
+        budget = get_retry_budget(service)
+        services[service] = {
+            **breaker.snapshot(),
+            "retries": budget.retries,
+            "retry_budget_exhausted": budget.exhausted,
+        }
+    degraded = any(service["state"] != CLOSED for service in services.values())
+    return {"status": "degraded" if degraded else "ok", "services": services}
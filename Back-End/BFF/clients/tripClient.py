@@ -1,57 +1,75 @@
 import httpx
+from datetime import date
 from schemas import proxySchema
+from clients import httpClient
+from config import settings
 
-TRIP_SERVICE_URL = "http://localhost:8002"
+SERVICE_NAME = "trip"
 
-async def handle_request(method: str, url: str, **kwargs):
-    async with httpx.AsyncClient() as client:
-        response = await client.request(method, url, **kwargs)
-        response.raise_for_status()
-        if response.status_code == 204 or not response.content:
-            return None
-        return response.json()
+async def handle_request(method: str, path: str, raw: bool = False, **kwargs):
+    if raw:
+        return await httpClient.relay(SERVICE_NAME, method, path, buffer=settings.PASSTHROUGH_VALIDATE, **kwargs)
+    return await httpClient.handle_request(SERVICE_NAME, method, path, **kwargs)
 
-async def create_trip(trip: proxySchema.TripCreated):
-    return await handle_request("POST", f"{TRIP_SERVICE_URL}/trips/add", json=trip.model_dump())
+async def create_trip(trip: proxySchema.TripCreated, raw: bool = False):
+    return await handle_request("POST", "/trips/add", raw=raw, json=trip.model_dump())
 
-async def get_all_trips():
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/")
+async def get_all_trips(raw: bool = False):
+    return await handle_request("GET", "/trips/", raw=raw)
 
-async def get_trips_by_tourist(touristId: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tourist/{touristId}")
+async def query_trips(params: dict, raw: bool = False):
+    return await handle_request("GET", "/trips/query", raw=raw, params=params)
 
-async def get_trips_by_guide(tourGuideId: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tour-guide/{tourGuideId}")
+async def get_trip_stats(params: dict, raw: bool = False):
+    return await handle_request("GET", "/trips/stats", raw=raw, params=params)
 
-async def get_completed_trips_by_tourist(touristId: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tourist/{touristId}/completed")
+async def get_trips_by_tourist(touristId: int, raw: bool = False):
+    return await handle_request("GET", f"/trips/trip-by-tourist/{touristId}", raw=raw)
 
-async def get_accepted_trips_by_tourist(touristId: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tourist/{touristId}/accepted")
+async def get_trips_by_guide(tourGuideId: int, raw: bool = False):
+    return await handle_request("GET", f"/trips/trip-by-tour-guide/{tourGuideId}", raw=raw)
 
-async def update_trip_status(tripId: int, status_update: proxySchema.TripStatusUpdate):
-    return await handle_request("PATCH", f"{TRIP_SERVICE_URL}/trips/{tripId}/update-trip-status", json=status_update.model_dump())
+async def get_completed_trips_by_tourist(touristId: int, raw: bool = False):
+    return await handle_request("GET", f"/trips/trip-by-tourist/{touristId}/completed", raw=raw)
 
-async def update_payment_status(tripId: int, payment_update: proxySchema.TripPaymentStatusUpdate):
-    return await handle_request("PATCH", f"{TRIP_SERVICE_URL}/trips/{tripId}/update-payment-status", json=payment_update.model_dump())
+async def get_accepted_trips_by_tourist(touristId: int, raw: bool = False):
+    return await handle_request("GET", f"/trips/trip-by-tourist/{touristId}/accepted", raw=raw)
+
+async def update_trip_status(tripId: int, status_update: proxySchema.TripStatusUpdate, raw: bool = False):
+    return await handle_request("PATCH", f"/trips/{tripId}/update-trip-status", raw=raw, json=status_update.model_dump())
+
+async def bulk_update_trip_status(bulk_update: proxySchema.TripBulkStatusUpdate, raw: bool = False):
+    return await handle_request("PATCH", "/trips/bulk/update-trip-status", raw=raw, json=bulk_update.model_dump())
+
+async def update_payment_status(tripId: int, payment_update: proxySchema.TripPaymentStatusUpdate, raw: bool = False):
+    return await handle_request("PATCH", f"/trips/{tripId}/update-payment-status", raw=raw, json=payment_update.model_dump())
+
+async def get_busy_tour_guides(start_date: date, number_of_days: int):
+    return await handle_request(
+        "GET", "/trips/tour-guides/busy", params={"startDate": start_date.isoformat(), "numberOfDays": number_of_days}
+    )
 
 async def get_pending_trips_by_tour_guide(tour_guide_id: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tour-guide/{tour_guide_id}/pending")
+    return await handle_request("GET", f"/trips/trip-by-tour-guide/{tour_guide_id}/pending")
 
 async def get_accepted_trips_by_tour_guide(tour_guide_id: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tour-guide/{tour_guide_id}/accepted")
+    return await handle_request("GET", f"/trips/trip-by-tour-guide/{tour_guide_id}/accepted")
 
 async def get_started_trips_by_tour_guide(tour_guide_id: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tour-guide/{tour_guide_id}/started")
+    return await handle_request("GET", f"/trips/trip-by-tour-guide/{tour_guide_id}/started")
 
 async def get_completed_trips_by_tour_guide(tour_guide_id: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/trips/trip-by-tour-guide/{tour_guide_id}/completed")
+    return await handle_request("GET", f"/trips/trip-by-tour-guide/{tour_guide_id}/completed")
 
 async def get_completed_trips_count():
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/api/trips/count/completed")
+    return await handle_request("GET", "/api/trips/count/completed")
 
 async def check_tourist_has_active_trip(tourist_id: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/api/trips/tourist/{tourist_id}/has-active-trip")
+    return await handle_request("GET", f"/api/trips/tourist/{tourist_id}/has-active-trip")
 
 async def check_tour_guide_has_active_trip(tour_guide_id: int):
-    return await handle_request("GET", f"{TRIP_SERVICE_URL}/api/trips/tour-guide/{tour_guide_id}/has-active-trip")
\ No newline at end of file
+    return await handle_request("GET", f"/api/trips/tour-guide/{tour_guide_id}/has-active-trip")
+
+async def open_event_stream():
+    timeout = httpx.Timeout(settings.HTTP_CONNECT_TIMEOUT, read=settings.TRIP_EVENTS_UPSTREAM_READ_TIMEOUT)
+    return await httpClient.send(SERVICE_NAME, "GET", "/trips/events", stream=True, timeout=timeout)
\ No newline at end of file
@@ -1,54 +1,61 @@
-import httpx
-from typing import Dict
+from typing import Dict, List, Optional
 from schemas import proxySchema
+from clients import httpClient
 
-USER_SERVICE_URL = "http://localhost:8001"
+SERVICE_NAME = "user"
 
-async def handle_request(method: str, url: str, **kwargs):
-    async with httpx.AsyncClient() as client:
-        response = await client.request(method, url, **kwargs)
-        response.raise_for_status()
-        if response.status_code == 204 or not response.content:
-            return None
-        return response.json()
+async def handle_request(method: str, path: str, **kwargs):
+    return await httpClient.handle_request(SERVICE_NAME, method, path, **kwargs)
 
 async def register_tourist(data: proxySchema.TouristRegistration):
 
-    return await handle_request("POST", f"{USER_SERVICE_URL}/auth/register/tourist", json=data.model_dump(exclude_none=True))
+    return await handle_request("POST", "/auth/register/tourist", json=data.model_dump(exclude_none=True))
 
 async def register_guide(data: proxySchema.TourGuideRegistration):
-    return await handle_request("POST", f"{USER_SERVICE_URL}/auth/register/guide", json=data.model_dump(exclude_none=True))
+    return await handle_request("POST", "/auth/register/guide", json=data.model_dump(exclude_none=True))
 
 async def register_admin(data: proxySchema.AdminRegistration):
-    return await handle_request("POST", f"{USER_SERVICE_URL}/auth/register/admin", json=data.model_dump(exclude_none=True))
+    return await handle_request("POST", "/auth/register/admin", json=data.model_dump(exclude_none=True))
 
 async def get_token(form_data: Dict[str, str]):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{USER_SERVICE_URL}/auth/token", data=form_data)
-        response.raise_for_status()
-        return response.json()
+    return await handle_request("POST", "/auth/token", data=form_data)
+
+async def get_jwks():
+    return await handle_request("GET", "/.well-known/jwks.json")
 
 async def get_current_user(token: str):
     headers = {"Authorization": token}
-    return await handle_request("GET", f"{USER_SERVICE_URL}/users/me", headers=headers)
+    return await handle_request("GET", "/users/me", headers=headers)
 
 async def get_all_guides():
-    return await handle_request("GET", f"{USER_SERVICE_URL}/users/tour-guides")
+    return await handle_request("GET", "/users/tour-guides")
+
+async def get_users_by_ids(user_ids: List[int]):
+    return await handle_request("POST", "/users/bulk", json={"userIds": user_ids})
+
+async def get_all_guides_if_changed(etag: Optional[str]):
+    return await httpClient.fetch_if_changed(SERVICE_NAME, "/users/tour-guides", etag)
+
+async def get_tourist_profile_if_changed(user_id: int, etag: Optional[str]):
+    return await httpClient.fetch_if_changed(SERVICE_NAME, f"/tourists/{user_id}/profile", etag)
+
+async def get_tour_guide_profile_if_changed(user_id: int, etag: Optional[str]):
+    return await httpClient.fetch_if_changed(SERVICE_NAME, f"/tour-guide/{user_id}/profile", etag)
 
 async def get_tourist_profile(user_id: int):
-    return await handle_request("GET", f"{USER_SERVICE_URL}/tourists/{user_id}/profile")
+    return await handle_request("GET", f"/tourists/{user_id}/profile")
 
 async def get_tour_guide_profile(user_id: int):
-    return await handle_request("GET", f"{USER_SERVICE_URL}/tour-guide/{user_id}/profile")
+    return await handle_request("GET", f"/tour-guide/{user_id}/profile")
 
 async def update_tourist_profile(user_id: int, data: proxySchema.TouristProfileUpdate):
-    return await handle_request("PATCH", f"{USER_SERVICE_URL}/tourists/{user_id}/profile", json=data.model_dump(exclude_unset=True))
+    return await handle_request("PATCH", f"/tourists/{user_id}/profile", json=data.model_dump(exclude_unset=True))
 
 async def update_tour_guide_profile(user_id: int, data: proxySchema.TourGuideProfileUpdate):
-    return await handle_request("PATCH", f"{USER_SERVICE_URL}/tour-guide/{user_id}/profile", json=data.model_dump(exclude_unset=True))
+    return await handle_request("PATCH", f"/tour-guide/{user_id}/profile", json=data.model_dump(exclude_unset=True))
 
 async def delete_tour_guide(user_id: int):
-    return await handle_request("DELETE", f"{USER_SERVICE_URL}/tour-guide/delete-tour-guide/{user_id}")
+    return await handle_request("DELETE", f"/tour-guide/delete-tour-guide/{user_id}")
 
 async def get_users_count():
-    return await handle_request("GET", f"{USER_SERVICE_URL}/api/users/count")
\ No newline at end of file
+    return await handle_request("GET", "/api/users/count")
\ No newline at end of file
@@ -0,0 +1,108 @@
+from typing import Dict, List
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    TRIP_SERVICE_URL: str = "http://localhost:8002"
+    DESTINATION_SERVICE_URL: str = "http://localhost:8000"
+    USER_SERVICE_URL: str = "http://localhost:8001"
+    # Replica lists (JSON arrays) take precedence over the single URLs above
+    TRIP_SERVICE_URLS: List[str] = []
+    DESTINATION_SERVICE_URLS: List[str] = []
+    USER_SERVICE_URLS: List[str] = []
+    LOAD_BALANCER: str = "p2c"  # p2c | least_outstanding
+    HEALTH_CHECK_PATH: str = "/health"
+    HEALTH_CHECK_INTERVAL: float = 5.0
+    HEALTH_CHECK_TIMEOUT: float = 1.0
+    HEALTH_CHECK_UNHEALTHY_THRESHOLD: int = 2
+    HEALTH_CHECK_HEALTHY_THRESHOLD: int = 2
+    REPLICA_DRAIN_TIMEOUT: float = 30.0
+
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 2.0
+    HTTP_READ_TIMEOUT: float = 10.0
+    SERVICE_READ_TIMEOUTS: Dict[str, float] = {"trip": 5.0, "destination": 5.0, "user": 5.0}
+    HTTP_WRITE_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 5.0
+    HTTP2_ENABLED: bool = False
+    # Service-to-service hops stay uncompressed; the gateway compresses once for the browser
+    HTTP_ACCEPT_ENCODING: str = "identity"
+    COALESCE_ENABLED: bool = True
+    PASSTHROUGH_ENABLED: bool = True
+    PASSTHROUGH_VALIDATE: bool = False
+
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BACKOFF_BASE: float = 0.05
+    RETRY_BACKOFF_MAX: float = 1.0
+    RETRY_BUDGET_RATIO: float = 0.1
+    RETRY_BUDGET_MAX_TOKENS: float = 10
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RECOVERY_TIMEOUT: float = 15.0
+    BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+
+    USER_BULK_CHUNK_SIZE: int = 200
+
+    # Must not exceed TRIP_QUERY_MAX_LIMIT on the trip service
+    TRIP_QUERY_DEFAULT_LIMIT: int = 20
+    TRIP_QUERY_MAX_LIMIT: int = 100
+
+    RATE_LIMIT_ENABLED: bool = True
+    ADMISSION_ENABLED: bool = True
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+    RATE_LIMIT_MAX_CLIENTS: int = 50000
+    ADMISSION_EXEMPT_PREFIXES: List[str] = ["/metrics", "/api/gateway/", "/docs", "/openapi.json"]
+    # rate/burst are per client (user or IP); max_concurrency/max_queue are shared by the whole class
+    ROUTE_CLASS_LIMITS: Dict[str, Dict[str, float]] = {
+        "auth": {"rate": 1.0, "burst": 10, "max_concurrency": 8, "max_queue": 32, "queue_timeout": 2.0},
+        "bulk_list": {"rate": 0.5, "burst": 5, "max_concurrency": 4, "max_queue": 8, "queue_timeout": 5.0},
+        "enrichment": {"rate": 5.0, "burst": 20, "max_concurrency": 32, "max_queue": 64, "queue_timeout": 2.0},
+        "default": {"rate": 20.0, "burst": 60, "max_concurrency": 256, "max_queue": 512, "queue_timeout": 1.0},
+        # Event streams stay open for minutes, so only how often they are opened is limited (max_concurrency 0)
+        "stream": {"rate": 0.2, "burst": 5, "max_concurrency": 0, "max_queue": 0, "queue_timeout": 0.0},
+    }
+    ROUTE_CLASSES: Dict[str, str] = {
+        "/api/auth/token": "auth",
+        "/api/auth/register/tourist": "auth",
+        "/api/auth/register/guide": "auth",
+        "/api/auth/register/admin": "auth",
+        "/api/trips/": "bulk_list",
+        "/api/trips/tour-guide/{tour_guide_id}/pending": "enrichment",
+        "/api/trips/tour-guide/{tour_guide_id}/accepted": "enrichment",
+        "/api/trips/tour-guide/{tour_guide_id}/started": "enrichment",
+        "/api/trips/tour-guide/{tour_guide_id}/completed": "enrichment",
+        "/api/home/tourist/{tourist_id}": "enrichment",
+        "/api/home/tour-guide/{tour_guide_id}": "enrichment",
+        "/api/trips/tourist/{tourist_id}/events": "stream",
+        "/api/trips/tour-guide/{tour_guide_id}/events": "stream",
+    }
+
+    TRIP_EVENTS_ENABLED: bool = True
+    TRIP_EVENTS_MAX_SUBSCRIBERS: int = 10000
+    TRIP_EVENTS_SUBSCRIBER_QUEUE: int = 64
+    TRIP_EVENTS_HEARTBEAT_INTERVAL: float = 15.0
+    # The trip service sends a heartbeat every 15s, so a silent upstream this long is treated as dead
+    TRIP_EVENTS_UPSTREAM_READ_TIMEOUT: float = 45.0
+    TRIP_EVENTS_RECONNECT_DELAY: float = 1.0
+
+    JWT_ALGORITHM: str = "RS256"
+    JWT_ISSUER: str = "the-pearl-user-management"
+    JWKS_CACHE_TTL: float = 300
+    JWKS_MIN_REFRESH_INTERVAL: float = 30
+
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL_DESTINATIONS: float = 60
+    CACHE_TTL_DESTINATION: float = 300
+    CACHE_TTL_GUIDES: float = 60
+    CACHE_TTL_PROFILE: float = 30
+    CACHE_TTL_DASHBOARD: float = 30
+    CACHE_STALE_TTL: float = 600
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+
+settings = Settings()
@@ -1,12 +1,34 @@
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, Request, status
+from pearl_common import metrics, responses, tracing
+from contextlib import asynccontextmanager
+from datetime import date
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from starlette.middleware.cors import CORSMiddleware
 from schemas import proxySchema
-from services import proxyService, awsService
-from typing import List, Optional
-
-app = FastAPI(title="API Gateway BFF")
+from services import proxyService, awsService, cacheService, authService, metricsService, admissionService, imageService, tripEventService
+from clients import httpClient, loadBalancer, resilience, requestContext
+from config import settings
+from typing import List, Literal, Optional
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await httpClient.init_clients()
+    loadBalancer.start()
+    imageService.start()
+    tripEventService.start()
+    yield
+    await tripEventService.stop()
+    await imageService.stop()
+    await loadBalancer.stop()
+    await httpClient.close_clients()
+    await cacheService.close()
+
+app = FastAPI(title="API Gateway BFF", lifespan=lifespan, default_response_class=responses.default_response_class())
+responses.add_compression(app)
+admissionService.install(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +38,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    response_headers = requestContext.bind(request)
+    response = await call_next(request)
+    if response.status_code == 200:
+        for name, value in response_headers.items():
+            response.headers.setdefault(name, value)
+    return response
+
+metrics.instrument(app)
+tracing.instrument(app, "bff")
+metricsService.register_collector()
+
 @app.post("/api/trips/add", response_model=proxySchema.Trip, tags=["Trips"])
 async def create_trip(trip: proxySchema.TripCreated):
     return await proxyService.create_trip(trip)
@@ -24,6 +59,28 @@ async def create_trip(trip: proxySchema.TripCreated):
 async def get_all_trips():
     return await proxyService.get_all_trips()
 
+@app.get("/api/trips/query", response_model=proxySchema.TripPage, tags=["Trips"])
+async def query_trips(
+    touristId: Optional[int] = None,
+    tourGuideId: Optional[int] = None,
+    status: List[proxySchema.TripStatus] = Query(default=[]),
+    paymentStatus: Optional[proxySchema.PaymentStatus] = None,
+    order: Literal["desc", "asc"] = "desc",
+    cursor: Optional[str] = None,
+    limit: int = Query(default=settings.TRIP_QUERY_DEFAULT_LIMIT, ge=1, le=settings.TRIP_QUERY_MAX_LIMIT),
+):
+    params = {
+        "touristId": touristId, "tourGuideId": tourGuideId, "status": status, "paymentStatus": paymentStatus,
+        "order": order, "cursor": cursor, "limit": limit,
+    }
+    return await proxyService.query_trips({name: value for name, value in params.items() if value not in (None, [])})
+
+@app.get("/api/trips/stats", response_model=proxySchema.TripStats, tags=["Trips"])
+async def get_trip_stats(touristId: Optional[int] = None, tourGuideId: Optional[int] = None):
+    # Without either id these are platform-wide totals, as of the trip service's last refresh of its stats view
+    params = {"touristId": touristId, "tourGuideId": tourGuideId}
+    return await proxyService.get_trip_stats({name: value for name, value in params.items() if value is not None})
+
 @app.get("/api/trips/trip-by-tourist/{touristId}", response_model=List[proxySchema.Trip], tags=["Trips"])
 async def get_trips_by_tourist(touristId: int):
     return await proxyService.get_trips_by_tourist(touristId)
@@ -55,6 +112,11 @@ async def get_completed_trips(touristId: int):
 async def get_accepted_trips(touristId: int):
     return await proxyService.get_accepted_trips_by_tourist(touristId)
 
+# Before the {tripId} routes, which would otherwise claim "bulk" as a trip id
+@app.patch('/api/trips/bulk/update-trip-status', response_model=proxySchema.TripBulkStatusResult, tags=["Trips"])
+async def bulk_update_trip_status(bulk_update: proxySchema.TripBulkStatusUpdate):
+    return await proxyService.bulk_update_trip_status(bulk_update)
+
 @app.patch('/api/trips/{tripId}/update-trip-status', response_model=proxySchema.Trip, tags=["Trips"])
 async def update_trip_status(tripId: int, status_update: proxySchema.TripStatusUpdate):
     return await proxyService.update_trip_status(tripId, status_update)
@@ -71,6 +133,21 @@ async def check_tourist_has_active_trip(tourist_id: int):
 async def check_tour_guide_has_active_trip(tour_guide_id: int):
     return await proxyService.check_tour_guide_has_active_trip(tour_guide_id)
 
+def _event_stream_response(subscriber: tripEventService.Subscriber):
+    return StreamingResponse(
+        tripEventService.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/trips/tourist/{tourist_id}/events", tags=["Trips"])
+async def stream_tourist_trip_events(tourist_id: int):
+    return _event_stream_response(tripEventService.subscribe(tripEventService.TOURIST, tourist_id))
+
+@app.get("/api/trips/tour-guide/{tour_guide_id}/events", tags=["Trips"])
+async def stream_tour_guide_trip_events(tour_guide_id: int):
+    return _event_stream_response(tripEventService.subscribe(tripEventService.TOUR_GUIDE, tour_guide_id))
+
 @app.post("/api/destinations/add", response_model=proxySchema.Destination, tags=["Destinations"])
 async def add_destination(destination: proxySchema.DestinationCreated):
     return await proxyService.add_destination(destination)
@@ -138,12 +215,21 @@ async def read_current_user_profile(request: Request):
     auth_header = request.headers.get('Authorization')
     if not auth_header:
         raise HTTPException(status_code=401, detail="Authorization header missing")
+    await authService.verify_token(authService.bearer_token(auth_header))
     return await proxyService.get_current_user(auth_header)
 
+@app.get("/api/users/me/claims", response_model=proxySchema.TokenIdentity, tags=["Users"])
+async def read_current_user_claims(identity: dict = Depends(authService.get_current_identity)):
+    return identity
+
 @app.get("/api/users/tour-guides", response_model=List[proxySchema.TourGuide], tags=["Users"])
 async def read_tour_guides():
     return await proxyService.get_all_guides()
 
+@app.get("/api/users/tour-guides/available", response_model=List[proxySchema.TourGuide], tags=["Users"])
+async def read_available_tour_guides(startDate: date, numberOfDays: int = Query(ge=1)):
+    return await proxyService.get_available_guides(startDate, numberOfDays)
+
 @app.get("/api/tourists/{user_id}/profile", response_model=proxySchema.UserDetails, tags=["Tourists"])
 async def read_tourist_profile(user_id: int):
     return await proxyService.get_tourist_profile(user_id)
@@ -168,6 +254,46 @@ async def delete_tour_guide(user_id: int):
 async def get_dashboard_counts():
     return await proxyService.get_dashboard_counts()
 
+@app.get("/api/home/tourist/{tourist_id}", response_model=proxySchema.TouristHome, tags=["Home"])
+async def get_tourist_home(tourist_id: int):
+    return await proxyService.get_tourist_home(tourist_id)
+
+@app.get("/api/home/tour-guide/{tour_guide_id}", response_model=proxySchema.TourGuideHome, tags=["Home"])
+async def get_tour_guide_home(tour_guide_id: int):
+    return await proxyService.get_tour_guide_home(tour_guide_id)
+
+@app.get("/api/gateway/health", response_model=dict, tags=["Gateway"])
+async def get_gateway_health():
+    return resilience.get_health()
+
+@app.get("/api/gateway/replicas", response_model=dict, tags=["Gateway"])
+async def get_replicas():
+    return loadBalancer.get_replica_stats()
+
+@app.get("/api/gateway/pool-stats", response_model=dict, tags=["Gateway"])
+async def get_pool_stats():
+    return httpClient.get_pool_stats()
+
+@app.get("/api/gateway/coalesce-stats", response_model=dict, tags=["Gateway"])
+async def get_coalesce_stats():
+    return httpClient.get_coalesce_stats()
+
+@app.get("/api/gateway/admission-stats", response_model=dict, tags=["Gateway"])
+async def get_admission_stats():
+    return admissionService.get_admission_stats()
+
+@app.get("/api/gateway/cache-stats", response_model=dict, tags=["Gateway"])
+async def get_cache_stats():
+    return cacheService.get_cache_stats()
+
+@app.get("/api/gateway/trip-events", response_model=dict, tags=["Gateway"])
+async def get_trip_event_stats():
+    return tripEventService.get_event_stats()
+
+@app.get("/api/gateway/image-pipeline", response_model=dict, tags=["Gateway"])
+async def get_image_pipeline_stats():
+    return imageService.get_pipeline_stats()
+
 app.include_router(awsService.router)
 
 if __name__ == "__main__":
@@ -1,5 +1,10 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
+from typing import List, Literal, Optional, Dict
+from pearl_common.images import ImageVariant
+
+# Mirror TripStatus and PaymentStatus in the trip service's tripSchemas
+TripStatus = Literal["Pending", "Accepted", "Rejected", "Started", "Completed"]
+PaymentStatus = Literal["Pending", "Half Paid", "Full Paid"]
 
 class TripBase(BaseModel):
     touristId: int
@@ -16,7 +21,7 @@ class TripBase(BaseModel):
     paymentStatus: str
 
 class TripCreated(TripBase):
-    pass
+    numberOfDays: int = Field(ge=1)
 
 class Trip(TripBase):
     id: int
@@ -26,12 +31,41 @@ class Trip(TripBase):
 class TripWithTouristInfo(Trip):
     touristName: str
 
+class TripPage(BaseModel):
+    items: List[Trip]
+    nextCursor: Optional[str] = None
+
 class TripStatusUpdate(BaseModel):
     tripStatus: str
 
 class TripPaymentStatusUpdate(BaseModel):
     paymentStatus: str
 
+class TripBulkStatusUpdate(BaseModel):
+    tripIds: List[int]
+    tripStatus: str
+    tourGuideId: Optional[int] = None
+
+class TripStatusConflict(BaseModel):
+    id: int
+    tripStatus: str
+
+class TripBulkStatusResult(BaseModel):
+    updated: List[Trip]
+    conflicts: List[TripStatusConflict]
+    notFound: List[int]
+
+class TripTotals(BaseModel):
+    trips: int
+    payment: float
+
+class TripStats(BaseModel):
+    trips: int
+    payment: float
+    byTripStatus: Dict[str, TripTotals]
+    byPaymentStatus: Dict[str, TripTotals]
+    refreshedAt: Optional[str] = None
+
 class DestinationBase(BaseModel):
     name: str
     details: List[str]
@@ -47,6 +81,7 @@ class DestinationCreated(DestinationBase):
 
 class Destination(DestinationBase):
     id: int
+    imageVariants: List[ImageVariant] = []
     class Config:
         from_attributes = True
 
@@ -74,10 +109,32 @@ class SelectedDestinations(SelectedDestinationsBase):
     class Config:
         from_attributes = True
 
+class TouristHome(BaseModel):
+    acceptedTrips: Optional[List[Trip]] = None
+    hasActiveTrip: Optional[bool] = None
+    wishlist: Optional[WishList] = None
+    wishlistDestinations: List[Destination] = []
+    selectedDestinations: Optional[SelectedDestinations] = None
+    selectedDestinationDetails: List[Destination] = []
+    errors: Dict[str, str] = {}
+
+class TourGuideHome(BaseModel):
+    pendingTrips: Optional[List[TripWithTouristInfo]] = None
+    acceptedTrips: Optional[List[TripWithTouristInfo]] = None
+    startedTrips: Optional[List[TripWithTouristInfo]] = None
+    hasActiveTrip: Optional[bool] = None
+    errors: Dict[str, str] = {}
+
 class Token(BaseModel):
     access_token: str
     token_type: str
 
+class TokenIdentity(BaseModel):
+    email: EmailStr
+    userId: Optional[int] = None
+    role: Optional[str] = None
+    userName: Optional[str] = None
+
 class TouristRegistration(BaseModel):
     name: str
     email: EmailStr
@@ -130,6 +187,7 @@ class TourGuide(BaseModel):
     name: str
     email: EmailStr
     profilePicture: Optional[str] = None
+    profilePictureVariants: List[ImageVariant] = []
 
 class TourGuideProfileUpdate(BaseModel):
     name: Optional[str] = None
@@ -148,6 +206,7 @@ class UserDetails(BaseModel):
     email: EmailStr
     role: str
     profilePicture: Optional[str] = None
+    profilePictureVariants: List[ImageVariant] = []
     tourist: Optional[dict] = None
     tour_guide: Optional[dict] = None
     admin: Optional[dict] = None
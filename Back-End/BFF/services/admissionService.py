@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import math
+import time
+import httpx
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+from fastapi import FastAPI, HTTPException, status
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from config import settings
+from services import authService
+from pearl_common import metrics
+
+RATE_LIMITED = "rate_limited"
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, detail: str, retry_after: float):
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    def response(self) -> JSONResponse:
+        return JSONResponse(
+            {"detail": self.detail},
+            status_code=self.status_code,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """A semaphore with a bounded FIFO queue; waiters give up after queue_timeout."""
+
+    def __init__(self, route_class: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.route_class = route_class
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiters: "deque[asyncio.Future]" = deque()
+
+    async def acquire(self):
+        if self.active < self.max_concurrency and not self.waiters:
+            self.active += 1
+            return
+        if len(self.waiters) >= self.max_queue:
+            raise Rejected(status.HTTP_503_SERVICE_UNAVAILABLE, QUEUE_FULL, "Server is busy, please retry", self.queue_timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            raise Rejected(status.HTTP_503_SERVICE_UNAVAILABLE, QUEUE_TIMEOUT, "Server is busy, please retry", self.queue_timeout)
+        except BaseException:
+            # Cancelled while queued; if the slot was already handed over, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._discard(waiter)
+            raise
+
+    def _discard(self, waiter: asyncio.Future):
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self):
+        # Hand the slot straight to the next waiter so queued requests are served in order
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_buckets: "OrderedDict[tuple, TokenBucket]" = OrderedDict()
+_client_keys: "OrderedDict[str, tuple]" = OrderedDict()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def route_class(route: str) -> str:
+    return settings.ROUTE_CLASSES.get(route, "default")
+
+
+def _limits(name: str) -> Dict[str, float]:
+    return settings.ROUTE_CLASS_LIMITS.get(name) or settings.ROUTE_CLASS_LIMITS["default"]
+
+
+def get_limiter(name: str) -> ConcurrencyLimiter:
+    if name not in _limiters:
+        limits = _limits(name)
+        _limiters[name] = ConcurrencyLimiter(
+            name,
+            max_concurrency=int(limits["max_concurrency"]),
+            max_queue=int(limits["max_queue"]),
+            queue_timeout=limits["queue_timeout"],
+        )
+    return _limiters[name]
+
+
+def _class_stats(name: str) -> Dict[str, int]:
+    if name not in _stats:
+        _stats[name] = {"admitted": 0, RATE_LIMITED: 0, QUEUE_FULL: 0, QUEUE_TIMEOUT: 0}
+    return _stats[name]
+
+
+def _client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def client_key(request: Request) -> str:
+    authorization = request.headers.get("Authorization")
+    if authorization:
+        digest = hashlib.sha256(authorization.encode()).hexdigest()
+        cached = _client_keys.get(digest)
+        if cached is not None and cached[1] > time.time():
+            _client_keys.move_to_end(digest)
+            return cached[0]
+        try:
+            claims = await authService.verify_token(authService.bearer_token(authorization))
+        except (HTTPException, httpx.HTTPError):
+            # An invalid token buys no separate bucket; it shares the caller's IP bucket. So does a token that
+            # cannot be checked right now (user service down, no keys cached): keying must not fail the request.
+            return f"ip:{_client_ip(request)}"
+        key = f"user:{claims.get('userId') or claims.get('sub')}"
+        _client_keys[digest] = (key, claims.get("exp", time.time() + 60))
+        while len(_client_keys) > settings.RATE_LIMIT_MAX_CLIENTS:
+            _client_keys.popitem(last=False)
+        return key
+    return f"ip:{_client_ip(request)}"
+
+
+def check_rate_limit(name: str, key: str):
+    limits = _limits(name)
+    if limits["rate"] <= 0:
+        return
+    bucket_key = (name, key)
+    bucket = _buckets.get(bucket_key)
+    if bucket is None:
+        bucket = _buckets[bucket_key] = TokenBucket(limits["rate"], limits["burst"])
+        while len(_buckets) > settings.RATE_LIMIT_MAX_CLIENTS:
+            _buckets.popitem(last=False)
+    else:
+        _buckets.move_to_end(bucket_key)
+    wait = bucket.take()
+    if wait:
+        raise Rejected(status.HTTP_429_TOO_MANY_REQUESTS, RATE_LIMITED, "Too many requests", wait)
+
+
+def _exempt(path: str) -> bool:
+    return any(path.startswith(prefix) for prefix in settings.ADMISSION_EXEMPT_PREFIXES)
+
+
+class AdmissionMiddleware:
+    """Rejects over-limit requests before they reach a route, and caps how many run per route class."""
+
+    def __init__(self, app, resolve_route: Callable):
+        self.app = app
+        self.resolve_route = resolve_route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exempt(scope["path"]) or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(self.resolve_route(scope))
+        stats = _class_stats(name)
+        limiter: Optional[ConcurrencyLimiter] = None
+        try:
+            if settings.RATE_LIMIT_ENABLED:
+                check_rate_limit(name, await client_key(Request(scope)))
+            if settings.ADMISSION_ENABLED and _limits(name)["max_concurrency"] > 0:
+                limiter = get_limiter(name)
+                await limiter.acquire()
+        except Rejected as rejected:
+            stats[rejected.reason] += 1
+            await rejected.response()(scope, receive, send)
+            return
+
+        stats["admitted"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if limiter is not None:
+                limiter.release()
+
+
+def install(app: FastAPI):
+    app.add_middleware(AdmissionMiddleware, resolve_route=lambda scope: metrics.route_template(app, scope))
+
+
+def get_admission_stats() -> Dict[str, Dict]:
+    return {
+        name: {
+            **stats,
+            "in_flight": _limiters[name].active if name in _limiters else 0,
+            "queued": len(_limiters[name].waiters) if name in _limiters else 0,
+            "max_concurrency": int(_limits(name)["max_concurrency"]),
+        }
+        for name, stats in _stats.items()
+    }
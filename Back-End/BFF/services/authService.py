@@ -0,0 +1,78 @@
+import httpx
+import time
+from typing import Dict
+from fastapi import HTTPException, Request, status
+from jose import JWTError, jwt
+from clients import userClient
+from config import settings
+
+# -inf rather than 0: time.monotonic() may itself be below the TTL on a freshly booted host
+_jwks: Dict = {"keys": {}, "fetched_at": float("-inf")}
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def _refresh_jwks(force: bool = False):
+    age = time.monotonic() - _jwks["fetched_at"]
+    if age < settings.JWKS_CACHE_TTL and not force:
+        return
+    # An unknown kid forces a refetch, but never more often than the minimum interval
+    if force and age < settings.JWKS_MIN_REFRESH_INTERVAL:
+        return
+    try:
+        document = await userClient.get_jwks()
+    except (HTTPException, httpx.HTTPError):
+        # Keep verifying with the keys we already have while the user service is unreachable
+        if _jwks["keys"]:
+            return
+        raise
+    _jwks.update(
+        keys={key["kid"]: key for key in (document or {}).get("keys", [])},
+        fetched_at=time.monotonic(),
+    )
+
+
+async def verify_token(token: str) -> Dict:
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except JWTError:
+        raise _credentials_exception()
+
+    await _refresh_jwks()
+    if kid not in _jwks["keys"]:
+        await _refresh_jwks(force=True)
+    key = _jwks["keys"].get(kid)
+    if key is None:
+        raise _credentials_exception()
+
+    try:
+        return jwt.decode(token, key, algorithms=[settings.JWT_ALGORITHM], issuer=settings.JWT_ISSUER)
+    except JWTError:
+        raise _credentials_exception()
+
+
+def bearer_token(auth_header: str | None) -> str:
+    if not auth_header:
+        raise HTTPException(status_code=401, detail="Authorization header missing")
+    scheme, _, token = auth_header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise _credentials_exception()
+    return token
+
+
+async def get_current_identity(request: Request) -> Dict:
+    claims = await verify_token(bearer_token(request.headers.get("Authorization")))
+    if claims.get("sub") is None:
+        raise _credentials_exception()
+    return {
+        "email": claims["sub"],
+        "userId": claims.get("userId"),
+        "role": claims.get("role"),
+        "userName": claims.get("userName"),
+    }
@@ -1,12 +1,17 @@
 # awsService.py
 
+import math
 import os
 import boto3
 import uuid
+from functools import lru_cache
+from typing import List
 from fastapi import APIRouter, HTTPException
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from botocore.client import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from starlette.concurrency import run_in_threadpool
 
 
 load_dotenv()
@@ -15,6 +20,27 @@ class PresignRequest(BaseModel):
     file_name: str
     file_type: str
 
+class BatchPresignRequest(BaseModel):
+    files: List[PresignRequest] = Field(min_length=1)
+    folder: str = "destinations"
+
+class MultipartCreateRequest(PresignRequest):
+    file_size: int = Field(gt=0)
+    folder: str = "destinations"
+
+class CompletedPart(BaseModel):
+    partNumber: int
+    etag: str
+
+class MultipartCompleteRequest(BaseModel):
+    key: str
+    uploadId: str
+    parts: List[CompletedPart] = Field(min_length=1)
+
+class MultipartAbortRequest(BaseModel):
+    key: str
+    uploadId: str
+
 router = APIRouter(
     prefix="/api/v1/s3",
     tags=["S3 Uploads"],
@@ -23,44 +49,172 @@ router = APIRouter(
 # Get the region from your .env file
 aws_region = os.getenv("AWS_S3_REGION")
 
-# Manually construct the correct regional endpoint URL
-s3_endpoint_url = f"https://s3.{aws_region}.amazonaws.com"
+# Manually construct the correct regional endpoint URL, unless a local S3 stand-in is configured
+s3_endpoint_url = os.getenv("AWS_S3_ENDPOINT_URL") or f"https://s3.{aws_region}.amazonaws.com"
+custom_endpoint = bool(os.getenv("AWS_S3_ENDPOINT_URL"))
 
+BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME")
+PRESIGN_EXPIRES_IN = int(os.getenv("AWS_S3_PRESIGN_EXPIRES_IN", "360"))
+PRESIGN_BATCH_MAX = int(os.getenv("AWS_S3_PRESIGN_BATCH_MAX", "20"))
+MULTIPART_PART_SIZE = int(os.getenv("AWS_S3_MULTIPART_PART_SIZE", str(8 * 1024 * 1024)))
+MULTIPART_MAX_SIZE = int(os.getenv("AWS_S3_MULTIPART_MAX_SIZE", str(5 * 1024 * 1024 * 1024)))
+UPLOAD_FOLDERS = {"profile-pictures", "destinations"}
 
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=aws_region,
-    endpoint_url=s3_endpoint_url, # NEW: Forcing the correct endpoint
-    config=Config(signature_version='s3v4')
-)
 
-BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME")
+@lru_cache(maxsize=1)
+def get_s3_client():
+    # Built on first use rather than at import; boto3 clients are thread-safe, so one is shared
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=aws_region,
+        endpoint_url=s3_endpoint_url, # NEW: Forcing the correct endpoint
+        config=Config(
+            signature_version='s3v4',
+            s3={"addressing_style": "path" if custom_endpoint else "auto"},
+            max_pool_connections=int(os.getenv("AWS_S3_MAX_POOL_CONNECTIONS", "20")),
+        )
+    )
+
+
+def public_url(object_key: str) -> str:
+    if custom_endpoint:
+        return f"{s3_endpoint_url.rstrip('/')}/{BUCKET_NAME}/{object_key}"
+    return f"https://{BUCKET_NAME}.s3.{aws_region}.amazonaws.com/{object_key}"
+
+
+def _object_key(folder: str, file_name: str) -> str:
+    if folder not in UPLOAD_FOLDERS:
+        raise HTTPException(status_code=400, detail=f"Unknown upload folder: {folder}")
+    return f"{folder}/{uuid.uuid4()}-{os.path.basename(file_name)}"
+
+
+def _check_key(object_key: str):
+    if object_key.split("/", 1)[0] not in UPLOAD_FOLDERS:
+        raise HTTPException(status_code=400, detail="Unknown upload key")
+
+
+def _presign_put(object_key: str, content_type: str) -> dict:
+    presigned_url = get_s3_client().generate_presigned_url(
+        ClientMethod='put_object',
+        Params={
+            'Bucket': BUCKET_NAME,
+            'Key': object_key,
+            'ContentType': content_type
+        },
+        ExpiresIn=PRESIGN_EXPIRES_IN
+    )
+    return {
+        "uploadUrl": presigned_url,
+        "publicUrl": public_url(object_key),
+        "key": object_key
+    }
+
+
+def _presign_many(items: List[tuple]) -> List[dict]:
+    return [_presign_put(object_key, content_type) for object_key, content_type in items]
+
+
+def _create_multipart(object_key: str, content_type: str, file_size: int) -> dict:
+    client = get_s3_client()
+    upload = client.create_multipart_upload(Bucket=BUCKET_NAME, Key=object_key, ContentType=content_type)
+    part_count = math.ceil(file_size / MULTIPART_PART_SIZE)
+    parts = [
+        {
+            "partNumber": part_number,
+            "uploadUrl": client.generate_presigned_url(
+                ClientMethod='upload_part',
+                Params={
+                    'Bucket': BUCKET_NAME,
+                    'Key': object_key,
+                    'UploadId': upload["UploadId"],
+                    'PartNumber': part_number
+                },
+                ExpiresIn=PRESIGN_EXPIRES_IN
+            ),
+        }
+        for part_number in range(1, part_count + 1)
+    ]
+    return {
+        "uploadId": upload["UploadId"],
+        "key": object_key,
+        "partSize": MULTIPART_PART_SIZE,
+        "parts": parts,
+        "publicUrl": public_url(object_key),
+    }
+
 
 @router.post("/generate-upload-url")
 async def create_presigned_url(request: PresignRequest):
-    unique_id = uuid.uuid4()
-    object_key = f"profile-pictures/{unique_id}-{request.file_name}"
+    object_key = _object_key("profile-pictures", request.file_name)
 
     try:
-        presigned_url = s3_client.generate_presigned_url(
-            ClientMethod='put_object',
-            Params={
-                'Bucket': BUCKET_NAME,
-                'Key': object_key,
-                'ContentType': request.file_type
-            },
-            ExpiresIn=360
+        # Signing is synchronous botocore work; keep it off the event loop
+        return await run_in_threadpool(_presign_put, object_key, request.file_type)
+
+    except (BotoCoreError, ClientError) as e:
+        raise HTTPException(status_code=500, detail=f"Could not generate upload URL: {e}")
+
+
+@router.post("/generate-upload-urls")
+async def create_presigned_urls(request: BatchPresignRequest):
+    if len(request.files) > PRESIGN_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {PRESIGN_BATCH_MAX} files can be presigned at once")
+    items = [(_object_key(request.folder, file.file_name), file.file_type) for file in request.files]
+
+    try:
+        return await run_in_threadpool(_presign_many, items)
+
+    except (BotoCoreError, ClientError) as e:
+        raise HTTPException(status_code=500, detail=f"Could not generate upload URLs: {e}")
+
+
+@router.post("/multipart/create")
+async def create_multipart_upload(request: MultipartCreateRequest):
+    if request.file_size > MULTIPART_MAX_SIZE:
+        raise HTTPException(status_code=400, detail="File is too large")
+    object_key = _object_key(request.folder, request.file_name)
+
+    try:
+        return await run_in_threadpool(_create_multipart, object_key, request.file_type, request.file_size)
+
+    except (BotoCoreError, ClientError) as e:
+        raise HTTPException(status_code=500, detail=f"Could not start multipart upload: {e}")
+
+
+@router.post("/multipart/complete")
+async def complete_multipart_upload(request: MultipartCompleteRequest):
+    _check_key(request.key)
+    parts = [{"PartNumber": part.partNumber, "ETag": part.etag} for part in sorted(request.parts, key=lambda part: part.partNumber)]
+
+    try:
+        await run_in_threadpool(
+            get_s3_client().complete_multipart_upload,
+            Bucket=BUCKET_NAME,
+            Key=request.key,
+            UploadId=request.uploadId,
+            MultipartUpload={"Parts": parts},
         )
+        return {"publicUrl": public_url(request.key), "key": request.key}
 
-        public_url = f"https://{BUCKET_NAME}.s3.{aws_region}.amazonaws.com/{object_key}"
+    except ClientError as e:
+        raise HTTPException(status_code=400, detail=f"Could not complete multipart upload: {e}")
+    except BotoCoreError as e:
+        raise HTTPException(status_code=500, detail=f"Could not complete multipart upload: {e}")
 
-        return {
-            "uploadUrl": presigned_url,
-            "publicUrl": public_url,
-            "key": object_key
-        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Could not generate upload URL: {e}")
\ No newline at end of file
+@router.post("/multipart/abort")
+async def abort_multipart_upload(request: MultipartAbortRequest):
+    _check_key(request.key)
+    try:
+        await run_in_threadpool(
+            get_s3_client().abort_multipart_upload,
+            Bucket=BUCKET_NAME,
+            Key=request.key,
+            UploadId=request.uploadId,
+        )
+        return {"key": request.key, "aborted": True}
+
+    except (BotoCoreError, ClientError) as e:
+        raise HTTPException(status_code=500, detail=f"Could not abort multipart upload: {e}")
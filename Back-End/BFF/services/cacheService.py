@@ -0,0 +1,176 @@
+import httpx
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from config import settings
+from clients.resilience import DownstreamUnavailable
+from clients.httpClient import NOT_MODIFIED
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, fresh_until, stale_until = entry
+        now = time.monotonic()
+        if stale_until <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value, fresh_until > now
+
+    async def set(self, key: str, value: Any, ttl: float):
+        now = time.monotonic()
+        self._entries[key] = (value, now + ttl, now + ttl + settings.CACHE_STALE_TTL)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    async def close(self):
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    def __init__(self, url: str, namespace: str = "bff-cache:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self.namespace = namespace
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        raw = await self._redis.get(self.namespace + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["value"], entry["fresh_until"] > time.time()
+
+    async def set(self, key: str, value: Any, ttl: float):
+        entry = {"value": value, "fresh_until": time.time() + ttl}
+        await self._redis.set(self.namespace + key, json.dumps(entry), px=int((ttl + settings.CACHE_STALE_TTL) * 1000))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._redis.delete(*(self.namespace + key for key in keys))
+
+    async def delete_prefix(self, prefix: str):
+        keys = [key async for key in self._redis.scan_iter(match=f"{self.namespace}{prefix}*")]
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def close(self):
+        await self._redis.aclose()
+
+    def size(self) -> int:
+        return -1
+
+
+def _build_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(settings.CACHE_REDIS_URL)
+    return MemoryBackend(settings.CACHE_MAX_ENTRIES)
+
+
+_backend = _build_backend()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "revalidated": 0, "stale_served": 0, "invalidations": 0}
+
+
+async def get_or_load(
+        key: str,
+        ttl: float,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: value is not None
+):
+    if not settings.CACHE_ENABLED or ttl <= 0:
+        return await loader()
+
+    cached = await _backend.get(key)
+    if cached is not None and cached[1]:
+        _stats["hits"] += 1
+        return cached[0]
+
+    _stats["misses"] += 1
+    try:
+        value = await loader()
+    except (DownstreamUnavailable, httpx.TransportError, httpx.HTTPStatusError) as exc:
+        client_error = isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500
+        if cached is None or client_error:
+            raise
+        _stats["stale_served"] += 1
+        return cached[0]
+    if cacheable(value):
+        await _backend.set(key, value, ttl)
+    return value
+
+
+async def get_or_revalidate(key: str, ttl: float, fetch: Callable[[Optional[str]], Awaitable[Tuple[Any, Optional[str]]]]):
+    if not settings.CACHE_ENABLED or ttl <= 0:
+        return await fetch(None)
+
+    cached = await _backend.get(key)
+    if cached is not None and cached[1]:
+        _stats["hits"] += 1
+        return cached[0]["value"], cached[0]["etag"]
+
+    _stats["misses"] += 1
+    entry = cached[0] if cached is not None else None
+    try:
+        value, etag = await fetch(entry["etag"] if entry else None)
+    except (DownstreamUnavailable, httpx.TransportError, httpx.HTTPStatusError) as exc:
+        client_error = isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500
+        if entry is None or client_error:
+            raise
+        _stats["stale_served"] += 1
+        return entry["value"], entry["etag"]
+
+    if value is NOT_MODIFIED:
+        _stats["revalidated"] += 1
+        await _backend.set(key, entry, ttl)
+        return entry["value"], entry["etag"]
+    if value is not None:
+        await _backend.set(key, {"value": value, "etag": etag}, ttl)
+    return value, etag
+
+
+async def invalidate(*keys: str):
+    _stats["invalidations"] += len(keys)
+    await _backend.delete(*keys)
+
+
+async def invalidate_prefix(prefix: str):
+    _stats["invalidations"] += 1
+    await _backend.delete_prefix(prefix)
+
+
+async def close():
+    await _backend.close()
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "backend": settings.CACHE_BACKEND,
+        "entries": _backend.size(),
+        "evictions": _backend.evictions,
+        "hit_ratio": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+    }
@@ -0,0 +1,135 @@
+import asyncio
+import io
+import logging
+import os
+from typing import Dict, Optional
+from botocore.exceptions import BotoCoreError, ClientError
+from starlette.concurrency import run_in_threadpool
+from pearl_common import images
+from services import awsService
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional; without it no derivatives are generated
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_ENABLED = os.getenv("IMAGE_PIPELINE_ENABLED", "true").lower() == "true"
+PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", "2"))
+PIPELINE_MAX_QUEUE = int(os.getenv("IMAGE_PIPELINE_MAX_QUEUE", "1000"))
+MAX_SOURCE_PIXELS = int(os.getenv("IMAGE_MAX_SOURCE_PIXELS", str(50_000_000)))
+QUALITY = {"webp": int(os.getenv("IMAGE_WEBP_QUALITY", "80")), "avif": int(os.getenv("IMAGE_AVIF_QUALITY", "55"))}
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+# Variant keys embed the original's unique key, so a derivative never changes once written
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_queue: Optional[asyncio.Queue] = None
+_workers = []
+_pending = set()
+_stats = {"queued": 0, "processed": 0, "failed": 0, "dropped": 0}
+
+
+def available() -> bool:
+    if Image is None:
+        return False
+    missing = [fmt for fmt in images.VARIANT_FORMATS if fmt not in CONTENT_TYPES or not features.check(fmt)]
+    if missing:
+        logger.warning("Image derivatives disabled: Pillow cannot encode %s", ", ".join(missing))
+        return False
+    return True
+
+
+def render_variants(data: bytes):
+    """Yield (width, format, encoded bytes) for every configured variant of one source image."""
+    Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+    with Image.open(io.BytesIO(data)) as source:
+        source = ImageOps.exif_transpose(source)
+        has_alpha = source.mode in ("RGBA", "LA", "PA") or "transparency" in source.info
+        source = source.convert("RGBA" if has_alpha else "RGB")
+        for width in images.VARIANT_WIDTHS:
+            # Never upscale: a variant wider than the source is stored at the source's size
+            if source.width > width:
+                resized = source.resize((width, max(1, round(source.height * width / source.width))), Image.LANCZOS)
+            else:
+                resized = source
+            for fmt in images.VARIANT_FORMATS:
+                buffer = io.BytesIO()
+                resized.save(buffer, format=fmt.upper(), quality=QUALITY[fmt])
+                yield width, fmt, buffer.getvalue()
+
+
+def generate_derivatives(source_key: str) -> int:
+    """Render and store every variant of one uploaded object. Idempotent; returns the number written."""
+    client = awsService.get_s3_client()
+    data = client.get_object(Bucket=awsService.BUCKET_NAME, Key=source_key)["Body"].read()
+    written = 0
+    for width, fmt, body in render_variants(data):
+        client.put_object(
+            Bucket=awsService.BUCKET_NAME,
+            Key=images.variant_key(source_key, width, fmt),
+            Body=body,
+            ContentType=CONTENT_TYPES[fmt],
+            CacheControl=CACHE_CONTROL,
+        )
+        written += 1
+    return written
+
+
+def source_key_for(url: Optional[str]) -> Optional[str]:
+    # Only objects in our own bucket are processed; any other URL is left alone
+    split = images.split_image_url(url)
+    if split is None:
+        return None
+    _, source_key = split
+    return source_key if awsService.public_url(source_key) == url else None
+
+
+def enqueue_url(url: Optional[str]):
+    source_key = source_key_for(url)
+    if source_key is None or _queue is None or source_key in _pending:
+        return
+    try:
+        _queue.put_nowait(source_key)
+    except asyncio.QueueFull:
+        # The backfill picks up anything dropped here
+        _stats["dropped"] += 1
+        return
+    _pending.add(source_key)
+    _stats["queued"] += 1
+
+
+async def _worker():
+    while True:
+        source_key = await _queue.get()
+        try:
+            await run_in_threadpool(generate_derivatives, source_key)
+            _stats["processed"] += 1
+        except (BotoCoreError, ClientError, OSError, ValueError, Image.DecompressionBombError) as e:
+            _stats["failed"] += 1
+            logger.warning("Could not generate derivatives for %s: %s", source_key, e)
+        finally:
+            _pending.discard(source_key)
+            _queue.task_done()
+
+
+def start():
+    global _queue
+    if _queue is not None or not PIPELINE_ENABLED or not images.VARIANTS_ENABLED or not available():
+        return
+    _queue = asyncio.Queue(maxsize=PIPELINE_MAX_QUEUE)
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(PIPELINE_WORKERS))
+
+
+async def stop():
+    global _queue
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _pending.clear()
+    _queue = None
+
+
+def get_pipeline_stats() -> Dict:
+    return {**_stats, "running": _queue is not None, "backlog": _queue.qsize() if _queue is not None else 0}
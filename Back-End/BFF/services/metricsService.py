@@ -0,0 +1,123 @@
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from clients import httpClient, loadBalancer, resilience
+from services import admissionService, cacheService, imageService, tripEventService
+
+BREAKER_STATES = (resilience.CLOSED, resilience.OPEN, resilience.HALF_OPEN)
+
+
+class GatewayCollector(Collector):
+    """Exposes the gateway's pool, coalescing, cache and breaker stats at scrape time."""
+
+    def collect(self):
+        yield from self._pool_metrics()
+        yield from self._coalesce_metrics()
+        yield from self._cache_metrics()
+        yield from self._breaker_metrics()
+        yield from self._admission_metrics()
+        yield from self._replica_metrics()
+        yield from self._image_pipeline_metrics()
+        yield from self._trip_event_metrics()
+
+    def _pool_metrics(self):
+        in_flight = GaugeMetricFamily("bff_pool_in_flight", "Downstream requests in flight", labels=["service"])
+        peak = GaugeMetricFamily("bff_pool_peak_in_flight", "Highest concurrent downstream requests", labels=["service"])
+        utilization = GaugeMetricFamily("bff_pool_utilization", "In-flight requests over the connection limit", labels=["service"])
+        saturated = CounterMetricFamily("bff_pool_saturated", "Requests sent with the pool fully in use", labels=["service"])
+        timeouts = CounterMetricFamily("bff_pool_timeouts", "Requests that timed out waiting for a connection", labels=["service"])
+        for service, stats in httpClient.get_pool_stats().items():
+            in_flight.add_metric([service], stats["in_flight"])
+            peak.add_metric([service], stats["peak_in_flight"])
+            utilization.add_metric([service], stats["utilization"])
+            saturated.add_metric([service], stats["saturated"])
+            timeouts.add_metric([service], stats["pool_timeouts"])
+        return in_flight, peak, utilization, saturated, timeouts
+
+    def _coalesce_metrics(self):
+        stats = httpClient.get_coalesce_stats()
+        return (
+            CounterMetricFamily("bff_coalesce_leaders", "GETs that went downstream", value=stats["leaders"]),
+            CounterMetricFamily("bff_coalesce_followers", "GETs served from an identical in-flight request", value=stats["coalesced"]),
+            GaugeMetricFamily("bff_coalesce_in_flight", "Distinct coalescable GETs in flight", value=stats["in_flight"]),
+        )
+
+    def _cache_metrics(self):
+        stats = cacheService.get_cache_stats()
+        results = CounterMetricFamily("bff_cache_lookups", "Cache lookups by result", labels=["result"])
+        for result in ("hits", "misses", "revalidated", "stale_served"):
+            results.add_metric([result], stats[result])
+        return (
+            results,
+            CounterMetricFamily("bff_cache_invalidations", "Cache invalidations", value=stats["invalidations"]),
+            CounterMetricFamily("bff_cache_evictions", "Entries evicted by the LRU bound", value=stats["evictions"]),
+            GaugeMetricFamily("bff_cache_entries", "Entries held by the cache (-1 when unknown)", value=stats["entries"]),
+            GaugeMetricFamily("bff_cache_hit_ratio", "Hits over lookups since start", value=stats["hit_ratio"]),
+        )
+
+    def _breaker_metrics(self):
+        state = GaugeMetricFamily("bff_circuit_breaker_state", "1 for the breaker's current state", labels=["service", "state"])
+        rejected = CounterMetricFamily("bff_circuit_breaker_rejected", "Calls rejected by an open breaker", labels=["service"])
+        retries = CounterMetricFamily("bff_downstream_retries", "Retried downstream calls", labels=["service"])
+        exhausted = CounterMetricFamily("bff_retry_budget_exhausted", "Retries skipped by the retry budget", labels=["service"])
+        for service, health in resilience.get_health()["services"].items():
+            for breaker_state in BREAKER_STATES:
+                state.add_metric([service, breaker_state], 1 if health["state"] == breaker_state else 0)
+            rejected.add_metric([service], health["rejected"])
+            retries.add_metric([service], health["retries"])
+            exhausted.add_metric([service], health["retry_budget_exhausted"])
+        return state, rejected, retries, exhausted
+
+
+    def _admission_metrics(self):
+        in_flight = GaugeMetricFamily("bff_admission_in_flight", "Requests running per route class", labels=["route_class"])
+        queued = GaugeMetricFamily("bff_admission_queued", "Requests waiting for a slot per route class", labels=["route_class"])
+        admitted = CounterMetricFamily("bff_admission_admitted", "Requests admitted per route class", labels=["route_class"])
+        rejected = CounterMetricFamily(
+            "bff_admission_rejections", "Requests rejected by rate limiting or load shedding", labels=["route_class", "reason"]
+        )
+        for route_class, stats in admissionService.get_admission_stats().items():
+            in_flight.add_metric([route_class], stats["in_flight"])
+            queued.add_metric([route_class], stats["queued"])
+            admitted.add_metric([route_class], stats["admitted"])
+            for reason in (admissionService.RATE_LIMITED, admissionService.QUEUE_FULL, admissionService.QUEUE_TIMEOUT):
+                rejected.add_metric([route_class, reason], stats[reason])
+        return in_flight, queued, admitted, rejected
+
+
+    def _replica_metrics(self):
+        healthy = GaugeMetricFamily("bff_replica_healthy", "1 while a replica passes health checks", labels=["service", "replica"])
+        outstanding = GaugeMetricFamily("bff_replica_outstanding", "Requests in flight per replica", labels=["service", "replica"])
+        for service, replicas in loadBalancer.get_replica_stats().items():
+            for replica in replicas:
+                healthy.add_metric([service, replica["url"]], 1 if replica["healthy"] else 0)
+                outstanding.add_metric([service, replica["url"]], replica["outstanding"])
+        return healthy, outstanding
+
+
+    def _image_pipeline_metrics(self):
+        stats = imageService.get_pipeline_stats()
+        results = CounterMetricFamily("bff_image_derivatives", "Source images handled by the derivative pipeline", labels=["result"])
+        for result in ("processed", "failed", "dropped"):
+            results.add_metric([result], stats[result])
+        return results, GaugeMetricFamily("bff_image_pipeline_backlog", "Source images waiting for derivatives", value=stats["backlog"])
+
+
+    def _trip_event_metrics(self):
+        stats = tripEventService.get_event_stats()
+        return (
+            GaugeMetricFamily("bff_trip_event_subscribers", "Open trip event streams", value=stats["subscribers"]),
+            GaugeMetricFamily("bff_trip_event_upstream_connected", "1 while the trip service stream is open", value=int(stats["upstream_connected"])),
+            CounterMetricFamily("bff_trip_events_received", "Trip events received from the trip service", value=stats["received"]),
+            CounterMetricFamily("bff_trip_events_delivered", "Trip events queued to client streams", value=stats["delivered"]),
+        )
+
+
+_collector = None
+
+
+def register_collector():
+    global _collector
+    if _collector is None:
+        _collector = GatewayCollector()
+        REGISTRY.register(_collector)
@@ -1,29 +1,86 @@
-from clients import tripClient, destinationClient, userClient
+from clients import tripClient, destinationClient, userClient, requestContext
+from services import cacheService, imageService
 from schemas import proxySchema
-from typing import List, Dict
+from config import settings
+from typing import List, Dict, Optional
+from fastapi import HTTPException
+import httpx
+from pydantic import TypeAdapter, ValidationError
 import asyncio
+from datetime import date
 
-async def create_trip(trip: proxySchema.TripCreated): return await tripClient.create_trip(trip)
+async def _passthrough(fetch, contract):
+    if not settings.PASSTHROUGH_ENABLED:
+        return await fetch()
 
-async def get_all_trips(): return await tripClient.get_all_trips()
+    response = await fetch(raw=True)
+    if settings.PASSTHROUGH_VALIDATE and response.status_code < 400:
+        try:
+            TypeAdapter(contract).validate_json(response.body)
+        except ValidationError as e:
+            raise HTTPException(status_code=502, detail=f"Downstream response violates contract: {e}")
+    return response
 
-async def get_trips_by_tourist(touristId: int): return await tripClient.get_trips_by_tourist(touristId)
+async def _cached_conditional(key: str, ttl: float, fetch):
+    value, etag = await cacheService.get_or_revalidate(key, ttl, fetch)
+    requestContext.respond_with_etag(etag)
+    return value
 
-async def get_trips_by_guide(tourGuideId: int): return await tripClient.get_trips_by_guide(tourGuideId)
+# Passed through so a 409 for a guide already booked on those dates reaches the client as is
+async def create_trip(trip: proxySchema.TripCreated):
+    return await _passthrough(lambda **kw: tripClient.create_trip(trip, **kw), proxySchema.Trip)
+
+async def get_all_trips(): return await _passthrough(tripClient.get_all_trips, List[proxySchema.Trip])
+
+async def query_trips(params: Dict):
+    return await _passthrough(lambda **kw: tripClient.query_trips(params, **kw), proxySchema.TripPage)
+
+async def get_trip_stats(params: Dict):
+    return await _passthrough(lambda **kw: tripClient.get_trip_stats(params, **kw), proxySchema.TripStats)
+
+async def get_trips_by_tourist(touristId: int):
+    return await _passthrough(lambda **kw: tripClient.get_trips_by_tourist(touristId, **kw), List[proxySchema.Trip])
+
+async def get_trips_by_guide(tourGuideId: int):
+    return await _passthrough(lambda **kw: tripClient.get_trips_by_guide(tourGuideId, **kw), List[proxySchema.Trip])
 
 async def get_completed_trips_count(): return await tripClient.get_completed_trips_count()
 
+async def _fetch_user_summaries(user_ids: List[int]) -> Dict[int, Dict]:
+    chunk_size = settings.USER_BULK_CHUNK_SIZE
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    chunk_results = await asyncio.gather(
+        *(userClient.get_users_by_ids(chunk) for chunk in chunks),
+        return_exceptions=True
+    )
+
+    summary_map = {}
+    failed_ids = []
+    for chunk, result in zip(chunks, chunk_results):
+        if isinstance(result, Exception) or not isinstance(result, list):
+            failed_ids.extend(chunk)
+            continue
+        summary_map.update({summary["id"]: summary for summary in result})
+
+    if failed_ids:
+        profiles = await asyncio.gather(
+            *(userClient.get_tourist_profile(user_id) for user_id in failed_ids),
+            return_exceptions=True
+        )
+        summary_map.update({
+            profile["id"]: profile
+            for profile in profiles
+            if not isinstance(profile, Exception) and isinstance(profile, dict)
+        })
+
+    return summary_map
+
 async def _enrich_trips_with_tourist_info(trips: List[Dict]) -> List[Dict]:
     if not trips:
         return []
 
-    tasks = [userClient.get_tourist_profile(trip["touristId"]) for trip in trips]
-    tourist_profiles_results = await asyncio.gather(*tasks, return_exceptions=True)
-    profile_map = {
-        profile['id']: profile
-        for profile in tourist_profiles_results
-        if not isinstance(profile, Exception) and isinstance(profile, dict)
-    }
+    tourist_ids = list(dict.fromkeys(trip["touristId"] for trip in trips))
+    profile_map = await _fetch_user_summaries(tourist_ids)
     for trip in trips:
         profile = profile_map.get(trip["touristId"])
         trip["touristName"] = profile.get("name", "Tourist Not Found") if profile else "Tourist Not Found"
@@ -48,63 +105,137 @@ async def check_tourist_has_active_trip(tourist_id: int): return await tripClien
 
 async def check_tour_guide_has_active_trip(tour_guide_id: int): return await tripClient.check_tour_guide_has_active_trip(tour_guide_id)
 
-async def get_completed_trips_by_tourist(touristId: int): return await tripClient.get_completed_trips_by_tourist(touristId)
+async def get_completed_trips_by_tourist(touristId: int):
+    return await _passthrough(lambda **kw: tripClient.get_completed_trips_by_tourist(touristId, **kw), List[proxySchema.Trip])
+
+async def get_accepted_trips_by_tourist(touristId: int):
+    return await _passthrough(lambda **kw: tripClient.get_accepted_trips_by_tourist(touristId, **kw), List[proxySchema.Trip])
 
-async def get_accepted_trips_by_tourist(touristId: int): return await tripClient.get_accepted_trips_by_tourist(touristId)
+# Passed through so a 409 for a transition the trip's current state does not allow reaches the client as is
+async def update_trip_status(tripId: int, status_update: proxySchema.TripStatusUpdate):
+    return await _passthrough(lambda **kw: tripClient.update_trip_status(tripId, status_update, **kw), proxySchema.Trip)
 
-async def update_trip_status(tripId: int, status_update: proxySchema.TripStatusUpdate): return await tripClient.update_trip_status(tripId, status_update)
+async def bulk_update_trip_status(bulk_update: proxySchema.TripBulkStatusUpdate):
+    return await _passthrough(lambda **kw: tripClient.bulk_update_trip_status(bulk_update, **kw), proxySchema.TripBulkStatusResult)
 
-async def update_payment_status(tripId: int, payment_update: proxySchema.TripPaymentStatusUpdate): return await tripClient.update_payment_status(tripId, payment_update)
+async def update_payment_status(tripId: int, payment_update: proxySchema.TripPaymentStatusUpdate):
+    return await _passthrough(lambda **kw: tripClient.update_payment_status(tripId, payment_update, **kw), proxySchema.Trip)
 
-async def add_destination(destination: proxySchema.DestinationCreated): return await destinationClient.add_destination(destination)
+async def add_destination(destination: proxySchema.DestinationCreated):
+    created = await destinationClient.add_destination(destination)
+    await cacheService.invalidate("destinations:all", "dashboard:counts")
+    imageService.enqueue_url(destination.image)
+    return created
 
-async def get_all_destinations(): return await destinationClient.get_all_destinations()
+async def get_all_destinations():
+    # The cache stores decoded bodies, so the list is only relayed raw when caching is off
+    if not settings.CACHE_ENABLED:
+        return await _passthrough(destinationClient.get_all_destinations, List[proxySchema.Destination])
+    return await _cached_conditional(
+        "destinations:all", settings.CACHE_TTL_DESTINATIONS, destinationClient.get_all_destinations_if_changed
+    )
 
-async def get_destination_by_id(id: int): return await destinationClient.get_destination_by_id(id)
+async def get_destination_by_id(id: int):
+    return await _cached_conditional(
+        f"destinations:{id}",
+        settings.CACHE_TTL_DESTINATION,
+        lambda etag: destinationClient.get_destination_by_id_if_changed(id, etag)
+    )
 
-async def update_destination(id: int, destination: proxySchema.DestinationCreated): return await destinationClient.update_destination(id, destination)
+async def update_destination(id: int, destination: proxySchema.DestinationCreated):
+    updated = await destinationClient.update_destination(id, destination)
+    await cacheService.invalidate("destinations:all", f"destinations:{id}")
+    imageService.enqueue_url(destination.image)
+    return updated
 
-async def delete_destination(id: int): return await destinationClient.delete_destination(id)
+async def delete_destination(id: int):
+    deleted = await destinationClient.delete_destination(id)
+    await cacheService.invalidate("destinations:all", f"destinations:{id}", "dashboard:counts")
+    return deleted
 
 async def get_destinations_count(): return await destinationClient.get_destinations_count()
 
 async def create_wishlist(wishlist: proxySchema.WishListCreated): return await destinationClient.create_wishlist(wishlist)
 
-async def get_wishlist(touristId: int): return await destinationClient.get_wishlist(touristId)
+async def get_wishlist(touristId: int):
+    return await _passthrough(lambda **kw: destinationClient.get_wishlist(touristId, **kw), Optional[proxySchema.WishList])
 
 async def update_wishlist(wishlist_id: int, destinations: List[int]): return await destinationClient.update_wishlist(wishlist_id, destinations)
 
 async def create_selected_list(selected_list: proxySchema.SelectedDestinationsCreated): return await destinationClient.create_selected_list(selected_list)
 
-async def get_selected_list(touristId: int): return await destinationClient.get_selected_list(touristId)
+async def get_selected_list(touristId: int):
+    return await _passthrough(lambda **kw: destinationClient.get_selected_list(touristId, **kw), Optional[proxySchema.SelectedDestinations])
 
 async def update_selected_list(list_id: int, new_list: List[int]): return await destinationClient.update_selected_list(list_id, new_list)
 
-async def register_tourist(data: proxySchema.TouristRegistration): return await userClient.register_tourist(data)
+async def register_tourist(data: proxySchema.TouristRegistration):
+    registered = await userClient.register_tourist(data)
+    imageService.enqueue_url(data.profilePicture)
+    return registered
 
-async def register_guide(data: proxySchema.TourGuideRegistration): return await userClient.register_guide(data)
+async def register_guide(data: proxySchema.TourGuideRegistration):
+    registered = await userClient.register_guide(data)
+    imageService.enqueue_url(data.profilePicture)
+    return registered
 
-async def register_admin(data: proxySchema.AdminRegistration): return await userClient.register_admin(data)
+async def register_admin(data: proxySchema.AdminRegistration):
+    registered = await userClient.register_admin(data)
+    imageService.enqueue_url(data.profilePicture)
+    return registered
 
 async def get_token(form_data: Dict[str, str]): return await userClient.get_token(form_data)
 
 async def get_current_user(token: str): return await userClient.get_current_user(token)
 
-async def get_all_guides(): return await userClient.get_all_guides()
+async def get_all_guides():
+    return await _cached_conditional("users:tour-guides", settings.CACHE_TTL_GUIDES, userClient.get_all_guides_if_changed)
 
-async def delete_tour_guide(user_id: int): return await userClient.delete_tour_guide(user_id)
-
-async def get_tourist_profile(user_id: int): return await userClient.get_tourist_profile(user_id)
+async def get_available_guides(start_date: date, number_of_days: int):
+    # The guide list comes from the same cache entry as get_all_guides; only the busy ids are fetched every time
+    (guides, _), busy = await asyncio.gather(
+        cacheService.get_or_revalidate("users:tour-guides", settings.CACHE_TTL_GUIDES, userClient.get_all_guides_if_changed),
+        tripClient.get_busy_tour_guides(start_date, number_of_days),
+    )
+    busy_ids = set(busy["tourGuideIds"])
+    # Trips refer to guides by their user id
+    return [guide for guide in guides if guide["userId"] not in busy_ids]
+
+async def delete_tour_guide(user_id: int):
+    deleted = await userClient.delete_tour_guide(user_id)
+    await cacheService.invalidate_prefix("users:")
+    await cacheService.invalidate("dashboard:counts")
+    return deleted
+
+async def get_tourist_profile(user_id: int):
+    return await _cached_conditional(
+        f"users:profile:tourist:{user_id}",
+        settings.CACHE_TTL_PROFILE,
+        lambda etag: userClient.get_tourist_profile_if_changed(user_id, etag)
+    )
 
-async def get_tour_guide_profile(user_id: int): return await userClient.get_tour_guide_profile(user_id)
+async def get_tour_guide_profile(user_id: int):
+    return await _cached_conditional(
+        f"users:profile:tour-guide:{user_id}",
+        settings.CACHE_TTL_PROFILE,
+        lambda etag: userClient.get_tour_guide_profile_if_changed(user_id, etag)
+    )
 
-async def update_tourist_profile(user_id: int, data: proxySchema.TouristProfileUpdate): return await userClient.update_tourist_profile(user_id, data)
+async def update_tourist_profile(user_id: int, data: proxySchema.TouristProfileUpdate):
+    updated = await userClient.update_tourist_profile(user_id, data)
+    await cacheService.invalidate_prefix("users:")
+    imageService.enqueue_url(data.profilePicture)
+    return updated
 
-async def update_tour_guide_profile(user_id: int, data: proxySchema.TourGuideProfileUpdate): return await userClient.update_tour_guide_profile(user_id, data)
+async def update_tour_guide_profile(user_id: int, data: proxySchema.TourGuideProfileUpdate):
+    updated = await userClient.update_tour_guide_profile(user_id, data)
+    await cacheService.invalidate_prefix("users:")
+    imageService.enqueue_url(data.profilePicture)
+    return updated
 
 async def get_users_count(): return await userClient.get_users_count()
 
-async def get_dashboard_counts():
+async def _load_dashboard_counts():
     results = await asyncio.gather(
         destinationClient.get_destinations_count(),
         tripClient.get_completed_trips_count(),
@@ -119,7 +250,94 @@ async def get_dashboard_counts():
         "completed_trips_count": trips_data.get("completed_trips_count", 0) if not isinstance(trips_data, Exception) else 0,
         "tourists_count": users_data.get("tourists_count", 0) if not isinstance(users_data, Exception) else 0,
         "tour_guides_count": users_data.get("tour_guides_count", 0) if not isinstance(users_data, Exception) else 0,
+        "degraded": [
+            service
+            for service, result in zip(("destination", "trip", "user"), results)
+            if isinstance(result, Exception)
+        ],
     }
 
     return dashboard_data
 
+async def get_dashboard_counts():
+    return await cacheService.get_or_load(
+        "dashboard:counts",
+        settings.CACHE_TTL_DASHBOARD,
+        _load_dashboard_counts,
+        cacheable=lambda counts: not counts["degraded"]
+    )
+
+def _error_marker(error: BaseException) -> str:
+    if isinstance(error, HTTPException):
+        return str(error.detail)
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"Downstream returned {error.response.status_code}"
+    return "Service unavailable"
+
+def _section(result, name: str, errors: Dict[str, str]):
+    if isinstance(result, Exception):
+        errors[name] = _error_marker(result)
+        return None
+    return result
+
+async def get_tourist_home(tourist_id: int):
+    results = await asyncio.gather(
+        tripClient.get_accepted_trips_by_tourist(tourist_id),
+        tripClient.check_tourist_has_active_trip(tourist_id),
+        destinationClient.get_wishlist(tourist_id),
+        destinationClient.get_selected_list(tourist_id),
+        return_exceptions=True
+    )
+
+    errors = {}
+    accepted_trips = _section(results[0], "acceptedTrips", errors)
+    active_trip = _section(results[1], "hasActiveTrip", errors)
+    wishlist = _section(results[2], "wishlist", errors)
+    selected = _section(results[3], "selectedDestinations", errors)
+
+    wishlist_ids = wishlist["destinations"] if wishlist else []
+    selected_ids = selected["selectedDestinations"] if selected else []
+    destination_ids = list(dict.fromkeys(wishlist_ids + selected_ids))
+    destinations_by_id = {}
+    if destination_ids:
+        try:
+            destinations = await destinationClient.get_destinations_by_ids(destination_ids)
+            destinations_by_id = {destination["id"]: destination for destination in destinations}
+        except Exception as e:
+            errors["destinations"] = _error_marker(e)
+
+    return {
+        "acceptedTrips": accepted_trips,
+        "hasActiveTrip": active_trip["has_active_trip"] if active_trip else None,
+        "wishlist": wishlist,
+        "wishlistDestinations": [destinations_by_id[i] for i in wishlist_ids if i in destinations_by_id],
+        "selectedDestinations": selected,
+        "selectedDestinationDetails": [destinations_by_id[i] for i in selected_ids if i in destinations_by_id],
+        "errors": errors,
+    }
+
+async def get_tour_guide_home(tour_guide_id: int):
+    results = await asyncio.gather(
+        tripClient.get_pending_trips_by_tour_guide(tour_guide_id),
+        tripClient.get_accepted_trips_by_tour_guide(tour_guide_id),
+        tripClient.get_started_trips_by_tour_guide(tour_guide_id),
+        tripClient.check_tour_guide_has_active_trip(tour_guide_id),
+        return_exceptions=True
+    )
+
+    errors = {}
+    pending_trips = _section(results[0], "pendingTrips", errors)
+    accepted_trips = _section(results[1], "acceptedTrips", errors)
+    started_trips = _section(results[2], "startedTrips", errors)
+    active_trip = _section(results[3], "hasActiveTrip", errors)
+
+    # One batched tourist lookup covers all three lists; trips are enriched in place
+    await _enrich_trips_with_tourist_info((pending_trips or []) + (accepted_trips or []) + (started_trips or []))
+
+    return {
+        "pendingTrips": pending_trips,
+        "acceptedTrips": accepted_trips,
+        "startedTrips": started_trips,
+        "hasActiveTrip": active_trip["has_active_trip"] if active_trip else None,
+        "errors": errors,
+    }
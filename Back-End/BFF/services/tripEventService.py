@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+import httpx
+from fastapi import HTTPException
+from clients import tripClient
+from config import settings
+from services import cacheService
+
+TOURIST = "tourist"
+TOUR_GUIDE = "tour_guide"
+RESYNC = "resync"
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    def __init__(self, key: Tuple[str, int]):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.TRIP_EVENTS_SUBSCRIBER_QUEUE)
+        self.closed = False
+
+    def offer(self, message: Optional[str]):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind is disconnected; EventSource reconnects and the screen refetches
+            self.closed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+# One upstream stream per BFF process, fanned out to every client connected here by tourist or guide id
+_subscribers: Dict[Tuple[str, int], Set[Subscriber]] = defaultdict(set)
+_consumer: Optional[asyncio.Task] = None
+_stats = {"subscribers": 0, "received": 0, "delivered": 0, "upstream_connects": 0, "upstream_connected": False}
+
+
+def subscribe(role: str, user_id: int) -> Subscriber:
+    if _stats["subscribers"] >= settings.TRIP_EVENTS_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many event subscribers", headers={"Retry-After": "5"})
+    subscriber = Subscriber((role, user_id))
+    _subscribers[subscriber.key].add(subscriber)
+    _stats["subscribers"] += 1
+    return subscriber
+
+
+def unsubscribe(subscriber: Subscriber):
+    subscribers = _subscribers.get(subscriber.key)
+    if subscribers is None or subscriber not in subscribers:
+        return
+    subscribers.discard(subscriber)
+    if not subscribers:
+        del _subscribers[subscriber.key]
+    _stats["subscribers"] -= 1
+
+
+def _deliver(subscribers, message: str):
+    for subscriber in list(subscribers):
+        if not subscriber.closed:
+            subscriber.offer(message)
+            _stats["delivered"] += 1
+
+
+def dispatch(message: str) -> dict:
+    payload = json.loads(message)
+    _stats["received"] += 1
+    if payload.get("type") == RESYNC:
+        for subscribers in list(_subscribers.values()):
+            _deliver(subscribers, message)
+        return payload
+    for key in ((TOURIST, payload.get("touristId")), (TOUR_GUIDE, payload.get("tourGuideId"))):
+        if key in _subscribers:
+            _deliver(_subscribers[key], message)
+    return payload
+
+
+async def _consume_once():
+    response = await tripClient.open_event_stream()
+    try:
+        response.raise_for_status()
+        _stats["upstream_connects"] += 1
+        _stats["upstream_connected"] = True
+        # Events published while we were disconnected are gone, so connected clients refetch
+        dispatch(json.dumps({"type": RESYNC}))
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            payload = dispatch(line[len("data:"):].strip())
+            if "Completed" in (payload.get("tripStatus"), payload.get("previousStatus")):
+                await cacheService.invalidate("dashboard:counts")
+    finally:
+        _stats["upstream_connected"] = False
+        await response.aclose()
+
+
+async def _consume_forever():
+    while True:
+        try:
+            await _consume_once()
+        except (httpx.HTTPError, ValueError, HTTPException) as e:
+            logger.warning("Trip event stream interrupted: %s", e)
+        await asyncio.sleep(settings.TRIP_EVENTS_RECONNECT_DELAY)
+
+
+async def stream(subscriber: Subscriber):
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), settings.TRIP_EVENTS_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is None:
+                return
+            yield f"data: {message}\n\n"
+    finally:
+        unsubscribe(subscriber)
+
+
+def start():
+    global _consumer
+    if settings.TRIP_EVENTS_ENABLED and _consumer is None:
+        _consumer = asyncio.create_task(_consume_forever())
+
+
+async def stop():
+    global _consumer
+    for subscribers in list(_subscribers.values()):
+        for subscriber in list(subscribers):
+            subscriber.offer(None)
+    if _consumer is not None:
+        _consumer.cancel()
+        try:
+            await _consumer
+        except asyncio.CancelledError:
+            pass
+        _consumer = None
+
+
+def get_event_stats() -> Dict:
+    return dict(_stats)
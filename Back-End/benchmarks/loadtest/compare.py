@@ -0,0 +1,46 @@
+import json
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path: str):
+    with open(path) as result_file:
+        return json.load(result_file)
+
+
+def _change(before, after):
+    if not before:
+        return None
+    return (after - before) / before
+
+
+def compare(baseline, current, threshold: float):
+    """Returns the printable rows and the endpoints whose p99 or throughput regressed beyond the threshold."""
+    rows = []
+    regressions = []
+    sections = [("total", baseline["total"], current["total"])]
+    sections += [
+        (name, baseline["endpoints"][name], current["endpoints"][name])
+        for name in sorted(set(baseline["endpoints"]) & set(current["endpoints"]))
+    ]
+    for name, before, after in sections:
+        changes = {metric: _change(before.get(metric), after.get(metric)) for metric in METRICS}
+        rows.append((name, before, after, changes))
+        p99_change = changes["p99_ms"]
+        throughput_change = changes["throughput_rps"]
+        if (p99_change is not None and p99_change > threshold) or (throughput_change is not None and throughput_change < -threshold):
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_rows(rows):
+    header = f"{'endpoint':<55}" + "".join(f"{metric:>24}" for metric in METRICS)
+    print(header)
+    print("-" * len(header))
+    for name, before, after, changes in rows:
+        cells = []
+        for metric in METRICS:
+            change = changes[metric]
+            delta = f"{change:+.1%}" if change is not None else "n/a"
+            cells.append(f"{before.get(metric, 0):>8} -> {after.get(metric, 0):<8} {delta:>5}")
+        print(f"{name:<55}" + "".join(f"{cell:>24}" for cell in cells))
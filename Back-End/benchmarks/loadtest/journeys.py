@@ -0,0 +1,127 @@
+import random
+from datetime import date, timedelta
+from .seed import email_for
+
+
+class Session:
+    """One virtual user: a logged-in account plus the recorder its requests report to."""
+
+    def __init__(self, client, recorder, manifest, role: str, rng: random.Random, login_every: int, writes: bool):
+        self.client = client
+        self.recorder = recorder
+        self.manifest = manifest
+        self.role = role
+        self.rng = rng
+        self.login_every = login_every
+        self.writes = writes
+        self.user_id = None
+        self.headers = {}
+        self.journeys_since_login = 0
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        return await self.recorder.timed(name, self.client.request(method, url, headers=self.headers, **kwargs))
+
+    async def ensure_login(self):
+        if self.user_id is not None and self.journeys_since_login < self.login_every:
+            self.journeys_since_login += 1
+            return
+        lo, hi = self.manifest["roles"][self.role]
+        user_id = self.rng.randint(lo, hi)
+        response = await self.recorder.timed("POST /api/auth/token", self.client.post(
+            "/api/auth/token",
+            data={"username": email_for(self.role, user_id, self.manifest), "password": self.manifest["password"]},
+        ))
+        if response is None or response.status_code != 200:
+            self.user_id = None
+            raise LoginFailed()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        self.user_id = user_id
+        self.journeys_since_login = 1
+
+    def random_destination_id(self) -> int:
+        return self.rng.randint(1, self.manifest["destinations"])
+
+    def random_user_id(self, role: str) -> int:
+        lo, hi = self.manifest["roles"][role]
+        return self.rng.randint(lo, hi)
+
+
+class LoginFailed(Exception):
+    pass
+
+
+async def trip_planning(session: Session):
+    """A tourist browsing destinations, checking guides and booking a trip."""
+    await session.ensure_login()
+    tourist_id = session.user_id
+    await session.request("GET /api/users/me/claims", "GET", "/api/users/me/claims")
+    await session.request("GET /api/home/tourist/{id}", "GET", f"/api/home/tourist/{tourist_id}")
+    await session.request("GET /api/destinations/", "GET", "/api/destinations/")
+    for _ in range(3):
+        destination_id = session.random_destination_id()
+        await session.request("GET /api/destinations/destination/{id}", "GET", f"/api/destinations/destination/{destination_id}")
+    await session.request("GET /api/wishlist/{id}", "GET", f"/api/wishlist/{tourist_id}")
+    await session.request("GET /api/users/tour-guides", "GET", "/api/users/tour-guides")
+    start = date(2026, 1, 1) + timedelta(days=session.rng.randint(0, 365))
+    number_of_days = session.rng.randint(1, 10)
+    available = await session.request(
+        "GET /api/users/tour-guides/available", "GET", "/api/users/tour-guides/available",
+        params={"startDate": start.isoformat(), "numberOfDays": number_of_days},
+    )
+    if available is not None and available.status_code == 200 and available.json():
+        guide_id = session.rng.choice(available.json())["userId"]
+    else:
+        guide_id = session.random_user_id("tour_guide")
+    await session.request("GET /api/tour-guide/{id}/profile", "GET", f"/api/tour-guide/{guide_id}/profile")
+    await session.request("GET /api/trips/tourist/{id}/has-active-trip", "GET", f"/api/trips/tourist/{tourist_id}/has-active-trip")
+    if session.writes:
+        await session.request("POST /api/trips/add", "POST", "/api/trips/add", json={
+            "touristId": tourist_id,
+            "touristPassportNumber": f"N{tourist_id:08d}",
+            "touristCountry": "Sri Lanka",
+            "tourGuideId": guide_id,
+            "destinations": ["Sigiriya", "Kandy"],
+            "numberOfAdults": 2,
+            "numberOfChildren": 0,
+            "startDate": start.isoformat(),
+            "numberOfDays": number_of_days,
+            "tripStatus": "Pending",
+            "tripPayment": 950.0,
+            "paymentStatus": "Pending",
+        })
+    await session.request("GET /api/trips/trip-by-tourist/{id}", "GET", f"/api/trips/trip-by-tourist/{tourist_id}")
+
+
+async def guide_dashboard(session: Session):
+    """A tour guide checking their trip queues and accepting a pending trip."""
+    await session.ensure_login()
+    guide_id = session.user_id
+    await session.request("GET /api/home/tour-guide/{id}", "GET", f"/api/home/tour-guide/{guide_id}")
+    pending = await session.request("GET /api/trips/tour-guide/{id}/pending", "GET", f"/api/trips/tour-guide/{guide_id}/pending")
+    for queue in ("accepted", "started", "completed"):
+        await session.request(f"GET /api/trips/tour-guide/{{id}}/{queue}", "GET", f"/api/trips/tour-guide/{guide_id}/{queue}")
+    await session.request("GET /api/trips/tour-guide/{id}/has-active-trip", "GET", f"/api/trips/tour-guide/{guide_id}/has-active-trip")
+    if session.writes and pending is not None and pending.status_code == 200 and pending.json():
+        trip = session.rng.choice(pending.json())
+        await session.request(
+            "PATCH /api/trips/{id}/update-trip-status", "PATCH",
+            f"/api/trips/{trip['id']}/update-trip-status", json={"tripStatus": "Accepted"},
+        )
+
+
+async def admin_dashboard(session: Session):
+    """An admin loading the dashboard counters and the guide and destination tables."""
+    await session.ensure_login()
+    await session.request("GET /api/dashboard/counts", "GET", "/api/dashboard/counts")
+    await session.request("GET /api/users/tour-guides", "GET", "/api/users/tour-guides")
+    await session.request("GET /api/destinations/", "GET", "/api/destinations/")
+    tourist_id = session.random_user_id("tourist")
+    await session.request("GET /api/tourists/{id}/profile", "GET", f"/api/tourists/{tourist_id}/profile")
+    await session.request("GET /api/trips/trip-by-tourist/{id}", "GET", f"/api/trips/trip-by-tourist/{tourist_id}")
+
+
+JOURNEYS = {
+    "trip_planning": (trip_planning, "tourist"),
+    "guide_dashboard": (guide_dashboard, "tour_guide"),
+    "admin_dashboard": (admin_dashboard, "admin"),
+}
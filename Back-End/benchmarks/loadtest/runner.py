@@ -0,0 +1,150 @@
+import asyncio
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+import httpx
+from .journeys import JOURNEYS, LoginFailed, Session
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Recorder:
+    def __init__(self):
+        self.measuring = False
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.journeys = defaultdict(list)
+        self.started = self.finished = 0.0
+
+    async def timed(self, name: str, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+            outcome = str(response.status_code)
+        except httpx.HTTPError as exc:
+            response = None
+            outcome = type(exc).__name__
+        if self.measuring:
+            self.latencies[name].append((time.perf_counter() - started) * 1000)
+            self.statuses[name][outcome] += 1
+        return response
+
+    def record_journey(self, name: str, elapsed_ms: float, ok: bool):
+        if self.measuring:
+            self.journeys[name].append((elapsed_ms, ok))
+
+
+def summarize(latencies, elapsed: float):
+    ordered = sorted(latencies)
+    summary = {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+    }
+    if ordered:
+        summary["mean_ms"] = round(sum(ordered) / len(ordered), 2)
+        for percentile in PERCENTILES:
+            index = min(len(ordered) - 1, max(0, int(round(percentile / 100 * len(ordered))) - 1))
+            summary[f"p{percentile}_ms"] = round(ordered[index], 2)
+        summary["max_ms"] = round(ordered[-1], 2)
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _virtual_user(number, journey_name, client, recorder, manifest, args, stop_at):
+    journey, role = JOURNEYS[journey_name]
+    session = Session(
+        client, recorder, manifest, role,
+        rng=random.Random(args.seed * 100003 + number),
+        login_every=args.login_every,
+        writes=not args.read_only,
+    )
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        try:
+            await journey(session)
+            ok = True
+        except LoginFailed:
+            ok = False
+            await asyncio.sleep(0.5)
+        recorder.record_journey(journey_name, (time.perf_counter() - started) * 1000, ok)
+        if args.think_time:
+            await asyncio.sleep(session.rng.expovariate(1 / args.think_time))
+
+
+def assign_journeys(concurrency: int, mix):
+    # Smooth weighted round-robin keeps any number of virtual users close to the mix ratios
+    total = sum(mix.values())
+    current = {name: 0.0 for name in mix}
+    assignment = []
+    for _ in range(concurrency):
+        for name, weight in mix.items():
+            current[name] += weight
+        chosen = max(current, key=current.get)
+        current[chosen] -= total
+        assignment.append(chosen)
+    return assignment
+
+
+async def run(base_url: str, manifest, args):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        stop_at = time.monotonic() + args.warmup + args.duration
+        tasks = [
+            asyncio.create_task(_virtual_user(number, journey_name, client, recorder, manifest, args, stop_at))
+            for number, journey_name in enumerate(assign_journeys(args.concurrency, args.mix))
+        ]
+        await asyncio.sleep(args.warmup)
+        recorder.measuring = True
+        recorder.started = time.monotonic()
+        await asyncio.gather(*tasks)
+        recorder.measuring = False
+        recorder.finished = time.monotonic()
+    return report(recorder, manifest, args)
+
+
+def report(recorder: Recorder, manifest, args):
+    elapsed = recorder.finished - recorder.started
+    endpoints = {}
+    for name, latencies in sorted(recorder.latencies.items()):
+        statuses = dict(recorder.statuses[name])
+        errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400)
+        endpoints[name] = {**summarize(latencies, elapsed), "errors": errors, "statuses": statuses}
+    journeys = {}
+    for name, runs in sorted(recorder.journeys.items()):
+        journeys[name] = {**summarize([elapsed_ms for elapsed_ms, _ in runs], elapsed),
+                          "failed": sum(1 for _, ok in runs if not ok)}
+    all_latencies = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "warmup_s": args.warmup,
+            "mix": args.mix,
+            "read_only": args.read_only,
+            "seed": args.seed,
+            "scale": {
+                "users": manifest["roles"]["tourist"][1],
+                "trips": manifest["trips"],
+                "destinations": manifest["destinations"],
+            },
+        },
+        "total": {
+            **summarize(all_latencies, elapsed),
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+        },
+        "endpoints": endpoints,
+        "journeys": journeys,
+    }
@@ -0,0 +1,154 @@
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, text
+
+PASSWORD = "bench-password"
+EMAIL_DOMAIN = "pearl-bench.com"
+SEED = 0.42
+
+STATUSES = "ARRAY['Pending','Accepted','Rejected','Started','Completed']"
+PAYMENT_STATUSES = "ARRAY['Pending','Half Paid','Full Paid']"
+COUNTRIES = "ARRAY['Sri Lanka','India','United Kingdom','Germany','Australia','Japan','France','China']"
+PROVINCES = "ARRAY['Central','Southern','Western','Uva','Eastern','Northern','North Western','Sabaragamuwa']"
+TYPES = "ARRAY['Cultural','Beach','Wildlife','Hill Country','Adventure','Religious']"
+
+
+def plan(users: int, trips: int, destinations: int, guide_ratio: float = 0.05, admins: int = 5):
+    guides = max(1, int(users * guide_ratio))
+    tourists = max(1, users - guides - admins)
+    return {
+        "password": PASSWORD,
+        "email_domain": EMAIL_DOMAIN,
+        "roles": {
+            "admin": [1, admins],
+            "tour_guide": [admins + 1, admins + guides],
+            "tourist": [admins + guides + 1, admins + guides + tourists],
+        },
+        "trips": trips,
+        "destinations": destinations,
+    }
+
+
+def email_for(role: str, user_id: int, manifest) -> str:
+    return f"{role}{user_id}@{manifest['email_domain']}"
+
+
+def _execute(url: str, statements):
+    engine = create_engine(url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("SELECT setseed(:seed)"), {"seed": SEED})
+            for statement, params in statements:
+                connection.execute(text(statement), params)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM ANALYZE"))
+    finally:
+        engine.dispose()
+
+
+def seed_users(url: str, manifest):
+    admin_lo, admin_hi = manifest["roles"]["admin"]
+    guide_lo, guide_hi = manifest["roles"]["tour_guide"]
+    tourist_lo, tourist_hi = manifest["roles"]["tourist"]
+    # One bcrypt hash shared by every seeded account; hashing 200k passwords would dominate the seed
+    hashed = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(PASSWORD)
+    params = {"hashed": hashed, "domain": manifest["email_domain"]}
+    _execute(url, [
+        ("TRUNCATE admins, tourists, tour_guides, users, counters RESTART IDENTITY CASCADE", {}),
+        ("""
+            INSERT INTO users (id, name, email, role, "hashedPassword", "profilePicture")
+            SELECT i,
+                   'Bench ' || role || ' ' || i,
+                   role || i || '@' || :domain,
+                   role,
+                   :hashed,
+                   NULL
+            FROM (
+                SELECT i, CASE WHEN i <= :admin_hi THEN 'admin' WHEN i <= :guide_hi THEN 'tour_guide' ELSE 'tourist' END AS role
+                FROM generate_series(1, :tourist_hi) AS i
+            ) AS seeded
+        """, {**params, "admin_hi": admin_hi, "guide_hi": guide_hi, "tourist_hi": tourist_hi}),
+        ("""INSERT INTO admins ("userId") SELECT i FROM generate_series(:lo, :hi) AS i""", {"lo": admin_lo, "hi": admin_hi}),
+        ("""
+            INSERT INTO tour_guides ("userId", nic, telephone, address, "licenseNumber", "reviewCount")
+            SELECT i, 'NIC' || lpad(i::text, 9, '0'), '07' || lpad(i::text, 8, '0'), i || ' Temple Road, Kandy',
+                   'LIC-' || i, (random() * 200)::int
+            FROM generate_series(:lo, :hi) AS i
+        """, {"lo": guide_lo, "hi": guide_hi}),
+        (f"""
+            INSERT INTO tourists ("userId", "passportNumber", country, address, "birthDay")
+            SELECT i, 'N' || lpad(i::text, 8, '0'), ({COUNTRIES})[1 + (random() * 7)::int],
+                   i || ' Main Street', (DATE '1960-01-01' + (random() * 16000)::int)::text
+            FROM generate_series(:lo, :hi) AS i
+        """, {"lo": tourist_lo, "hi": tourist_hi}),
+        ("""
+            INSERT INTO counters (name, value)
+            SELECT 'tourists', :tourists UNION ALL SELECT 'tour_guides', :guides
+        """, {"tourists": tourist_hi - tourist_lo + 1, "guides": guide_hi - guide_lo + 1}),
+        ("SELECT setval(pg_get_serial_sequence('users', 'id'), :max_id)", {"max_id": tourist_hi}),
+    ])
+
+
+def seed_destinations(url: str, manifest):
+    count = manifest["destinations"]
+    tourist_lo, tourist_hi = manifest["roles"]["tourist"]
+    _execute(url, [
+        ("TRUNCATE destinations, wishlist, selected_destinations, counters RESTART IDENTITY", {}),
+        (f"""
+            INSERT INTO destinations (name, details, type, activities, province, district, climate, image)
+            SELECT 'Destination ' || i,
+                   ARRAY['Overview of destination ' || i, 'How to get there', 'Best time to visit'],
+                   ({TYPES})[1 + (random() * 5)::int],
+                   ARRAY['Hiking', 'Sightseeing', 'Photography'],
+                   ({PROVINCES})[1 + (random() * 7)::int],
+                   'District ' || (i % 25),
+                   CASE WHEN random() < 0.5 THEN 'Wet' ELSE 'Dry' END,
+                   'https://example.com/destinations/' || i || '.jpg'
+            FROM generate_series(1, :count) AS i
+        """, {"count": count}),
+        ("""
+            INSERT INTO wishlist ("touristId", destinations)
+            SELECT i, ARRAY[1 + (random() * (:count - 1))::int, 1 + (random() * (:count - 1))::int]
+            FROM generate_series(:lo, :hi) AS i WHERE random() < 0.2
+        """, {"count": count, "lo": tourist_lo, "hi": tourist_hi}),
+        ("""
+            INSERT INTO selected_destinations ("touristId", "selectedDestinations")
+            SELECT i, ARRAY[1 + (random() * (:count - 1))::int]
+            FROM generate_series(:lo, :hi) AS i WHERE random() < 0.1
+        """, {"count": count, "lo": tourist_lo, "hi": tourist_hi}),
+        ("INSERT INTO counters (name, value) SELECT 'destinations', :count", {"count": count}),
+    ])
+
+
+def seed_trips(url: str, manifest):
+    guide_lo, guide_hi = manifest["roles"]["tour_guide"]
+    tourist_lo, tourist_hi = manifest["roles"]["tourist"]
+    _execute(url, [
+        ("TRUNCATE trips, counters RESTART IDENTITY", {}),
+        (f"""
+            INSERT INTO trips ("touristId", "touristPassportNumber", "touristCountry", "tourGuideId", destinations,
+                               "numberOfAdults", "numberOfChildren", "startDate", "numberOfDays", "tripStatus",
+                               "tripPayment", "paymentStatus")
+            SELECT tourist_id, 'N' || lpad(tourist_id::text, 8, '0'), ({COUNTRIES})[1 + (random() * 7)::int],
+                   :guide_lo + (random() * (:guide_hi - :guide_lo))::int,
+                   ARRAY['Sigiriya', 'Kandy', 'Ella'],
+                   1 + (random() * 3)::int, (random() * 3)::int,
+                   (DATE '2024-01-01' + (random() * 900)::int)::text,
+                   1 + (random() * 13)::int,
+                   ({STATUSES})[1 + width_bucket(random(), ARRAY[0.1, 0.25, 0.3, 0.4]::float8[])],
+                   round((100 + random() * 2400)::numeric, 2),
+                   ({PAYMENT_STATUSES})[1 + (random() * 2)::int]
+            FROM (
+                SELECT :tourist_lo + (random() * (:tourist_hi - :tourist_lo))::int AS tourist_id
+                FROM generate_series(1, :count)
+            ) AS seeded
+        """, {"count": manifest["trips"], "guide_lo": guide_lo, "guide_hi": guide_hi,
+              "tourist_lo": tourist_lo, "tourist_hi": tourist_hi}),
+        ("""INSERT INTO counters (name, value) SELECT 'completed_trips', count(*) FROM trips WHERE "tripStatus" = 'Completed'""", {}),
+        ("REFRESH MATERIALIZED VIEW trip_stats", {}),
+    ])
+
+
+def seed_all(urls, manifest):
+    seed_users(urls["user_management"], manifest)
+    seed_destinations(urls["destination_management"], manifest)
+    seed_trips(urls["trip_management"], manifest)
@@ -0,0 +1,117 @@
+"""Compare the decoded and pass-through BFF paths on large trip and destination lists.
+
+The BFF app runs in-process behind an ASGI transport and its downstream clients are
+replaced with a mock transport serving pre-encoded payloads, so the numbers isolate
+the gateway's own decode/validate/encode cost.
+
+    cd Back-End/BFF && python ../benchmarks/passthrough_bench.py --trips 20000 --destinations 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+import httpx
+from config import settings
+from clients import httpClient
+import main
+
+
+def make_trips(count: int):
+    return [
+        {
+            "id": i,
+            "touristId": i % 2000,
+            "touristPassportNumber": f"N{i:08d}",
+            "touristCountry": "Sri Lanka",
+            "tourGuideId": i % 300,
+            "destinations": ["Sigiriya", "Kandy", "Ella"],
+            "numberOfAdults": 2,
+            "numberOfChildren": 1,
+            "startDate": "2025-09-01",
+            "numberOfDays": 5,
+            "tripStatus": "Completed",
+            "tripPayment": 1250.0,
+            "paymentStatus": "Full Paid",
+        }
+        for i in range(count)
+    ]
+
+
+def make_destinations(count: int):
+    return [
+        {
+            "id": i,
+            "name": f"Destination {i}",
+            "details": ["A long description of the destination."] * 3,
+            "type": "Cultural",
+            "activities": ["Hiking", "Sightseeing"],
+            "province": "Central",
+            "district": "Kandy",
+            "climate": "Wet",
+            "image": f"https://example.com/images/{i}.jpg",
+        }
+        for i in range(count)
+    ]
+
+
+def install_mock_downstreams(payloads):
+    async def handler(request: httpx.Request):
+        return httpx.Response(200, content=payloads[request.url.path], headers={"content-type": "application/json"})
+
+    for service in httpClient.SERVICES:
+        httpClient._clients[service] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        httpClient._pool_stats.setdefault(service, httpClient._new_stats())
+
+
+async def measure(client: httpx.AsyncClient, path: str, iterations: int):
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = await client.get(path)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+        size = len(response.content)
+    timings.sort()
+    return {
+        "mean_ms": round(statistics.mean(timings) * 1000, 2),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 2),
+        "bytes": size,
+    }
+
+
+async def run(args):
+    payloads = {
+        "/trips/": json.dumps(make_trips(args.trips), separators=(",", ":")).encode(),
+        "/destinations/": json.dumps(make_destinations(args.destinations), separators=(",", ":")).encode(),
+    }
+    install_mock_downstreams(payloads)
+    settings.CACHE_ENABLED = False
+    settings.COALESCE_ENABLED = False
+    settings.RATE_LIMIT_ENABLED = False
+    settings.ADMISSION_ENABLED = False
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bff") as client:
+        for path in ("/api/trips/", "/api/destinations/"):
+            for mode, passthrough in (("decoded", False), ("passthrough", True)):
+                settings.PASSTHROUGH_ENABLED = passthrough
+                await measure(client, path, 2)
+                results[f"{path} {mode}"] = await measure(client, path, args.iterations)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=20000)
+    parser.add_argument("--destinations", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
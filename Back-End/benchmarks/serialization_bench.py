@@ -0,0 +1,85 @@
+"""Measure JSON encoding CPU time and bytes on the wire for the large list endpoints.
+
+Compares the encoders the services can use (stdlib json after jsonable_encoder, the
+pydantic-core serializer FastAPI uses for response models, orjson) and the size and
+cost of gzip/brotli at the levels the services are configured with.
+
+    cd Back-End/BFF && python ../benchmarks/serialization_bench.py --trips 20000 --destinations 5000
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from schemas import proxySchema
+from pearl_common import responses
+from passthrough_bench import make_destinations, make_trips
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def timed(function, iterations: int):
+    timings = []
+    result = None
+    for _ in range(iterations):
+        started = time.process_time()
+        result = function()
+        timings.append(time.process_time() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def bench_payload(name: str, model, rows, iterations: int):
+    adapter = TypeAdapter(List[model])
+    objects = adapter.validate_python(rows)
+    encoders = {
+        "stdlib": lambda: json.dumps(jsonable_encoder(objects), separators=(",", ":")).encode(),
+        "pydantic_core": lambda: adapter.dump_json(objects),
+    }
+    if orjson is not None:
+        encoders["orjson"] = lambda: orjson.dumps(adapter.dump_python(objects, mode="json"))
+
+    results = {}
+    body = None
+    for encoder, function in encoders.items():
+        cpu_ms, body = timed(function, iterations)
+        results[f"encode {encoder}"] = {"cpu_ms": round(cpu_ms, 2), "bytes": len(body)}
+
+    compressors = {f"gzip level {responses.GZIP_LEVEL}": lambda: gzip.compress(body, compresslevel=responses.GZIP_LEVEL)}
+    if brotli is not None:
+        compressors[f"brotli quality {responses.BROTLI_QUALITY}"] = lambda: brotli.compress(body, quality=responses.BROTLI_QUALITY)
+    for compressor, function in compressors.items():
+        cpu_ms, compressed = timed(function, iterations)
+        results[compressor] = {
+            "cpu_ms": round(cpu_ms, 2),
+            "bytes": len(compressed),
+            "ratio": round(len(compressed) / len(body), 3),
+        }
+    return {name: results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=20000)
+    parser.add_argument("--destinations", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    results = {}
+    results.update(bench_payload("/trips/", proxySchema.Trip, make_trips(args.trips), args.iterations))
+    results.update(bench_payload("/destinations/", proxySchema.Destination, make_destinations(args.destinations), args.iterations))
+    print(json.dumps(results, indent=2))
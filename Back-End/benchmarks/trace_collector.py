@@ -0,0 +1,44 @@
+"""Local stand-in for a trace collector.
+
+Accepts the span batches the services POST when TRACE_EXPORT=http and appends them to
+a JSONL file that trace_waterfall.py can read.
+
+    python benchmarks/trace_collector.py --port 9411 --output traces.jsonl
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+
+
+def make_handler(output: str):
+    lock = Lock()
+
+    class SpanHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                spans = json.loads(body)
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            with lock, open(output, "a") as trace_file:
+                trace_file.writelines(json.dumps(span) + "\n" for span in spans)
+            self.send_response(202)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return SpanHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9411)
+    parser.add_argument("--output", default="traces.jsonl")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.output))
+    print(f"Collecting spans on http://127.0.0.1:{args.port}/spans into {args.output}")
+    server.serve_forever()
@@ -0,0 +1,75 @@
+"""Rebuild request waterfalls from exported spans.
+
+Reads one or more span JSONL files (TRACE_EXPORT=file output or trace_collector.py
+output) and prints the slowest traces as an indented timeline.
+
+    python benchmarks/trace_waterfall.py traces.jsonl --slowest 5
+    python benchmarks/trace_waterfall.py BFF/traces.jsonl trip_management/traces.jsonl --trace <trace_id>
+"""
+import argparse
+import json
+from collections import defaultdict
+
+BAR_WIDTH = 40
+
+
+def load_traces(paths):
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path) as trace_file:
+            for line in trace_file:
+                if line.strip():
+                    span = json.loads(line)
+                    traces[span["trace_id"]].append(span)
+    return traces
+
+
+def print_waterfall(spans):
+    span_ids = {span["span_id"] for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span["parent_id"] in span_ids:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+
+    start = min(span["start_ns"] for span in spans)
+    end = max(span["start_ns"] + span["duration_ms"] * 1e6 for span in spans)
+    total_ms = max((end - start) / 1e6, 0.001)
+    print(f"trace {spans[0]['trace_id']} request_id={roots[0].get('request_id')} total={total_ms:.1f}ms spans={len(spans)}")
+
+    def walk(span, depth):
+        offset_ms = (span["start_ns"] - start) / 1e6
+        bar_start = int(offset_ms / total_ms * BAR_WIDTH)
+        bar_length = max(1, int(span["duration_ms"] / total_ms * BAR_WIDTH))
+        bar = " " * bar_start + "#" * min(bar_length, BAR_WIDTH - bar_start)
+        label = f"{'  ' * depth}[{span['service']}] {span['name']}"
+        if "statement" in span["attributes"]:
+            label += f" {span['attributes']['statement'][:60]!r}"
+        flag = " !" if span["status"] == "error" else ""
+        print(f"  {bar:<{BAR_WIDTH}} {offset_ms:8.1f} +{span['duration_ms']:8.1f}ms {label}{flag}")
+        for child in sorted(children[span["span_id"]], key=lambda child: child["start_ns"]):
+            walk(child, depth + 1)
+
+    for root in sorted(roots, key=lambda root: root["start_ns"]):
+        walk(root, 0)
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--trace")
+    parser.add_argument("--slowest", type=int, default=5)
+    args = parser.parse_args()
+
+    traces = load_traces(args.paths)
+    if args.trace:
+        selected = [traces[args.trace]] if args.trace in traces else []
+    else:
+        def trace_duration(spans):
+            return max(span["duration_ms"] for span in spans)
+        selected = sorted(traces.values(), key=trace_duration, reverse=True)[:args.slowest]
+    for spans in selected:
+        print_waterfall(spans)
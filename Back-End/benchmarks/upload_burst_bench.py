@@ -0,0 +1,169 @@
+"""Measure the gateway during an upload burst, against a local S3 stand-in.
+
+Starts moto's S3 server (pip install "moto[server]") in its own process, or uses
+--endpoint, points the BFF at it and fires
+concurrent presign requests (single, batched and multipart) while a probe keeps calling
+a cheap gateway route and a ticker measures event-loop lag. --blocking runs presigning
+inline on the event loop, as the original route did, for comparison.
+
+    cd Back-End/BFF && python ../benchmarks/upload_burst_bench.py --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+import boto3
+import httpx
+
+BUCKET = "bench-uploads"
+
+
+def start_stand_in(port: int):
+    # A separate process, like real S3; the BFF's responses module would also shadow moto's dependency
+    server = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-H", "127.0.0.1", "-p", str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    endpoint = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(endpoint, timeout=1.0)
+            break
+        except httpx.HTTPError:
+            if time.monotonic() > deadline or server.poll() is not None:
+                server.kill()
+                raise RuntimeError("S3 stand-in did not start")
+            time.sleep(0.2)
+    return server, endpoint
+
+
+def configure(endpoint: str):
+    os.environ.update({
+        "AWS_S3_ENDPOINT_URL": endpoint,
+        "AWS_S3_REGION": "us-east-1",
+        "AWS_S3_BUCKET_NAME": BUCKET,
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+    })
+    boto3.client(
+        "s3", endpoint_url=os.environ["AWS_S3_ENDPOINT_URL"], region_name="us-east-1",
+        aws_access_key_id="bench", aws_secret_access_key="bench",
+    ).create_bucket(Bucket=BUCKET)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    return {
+        "count": len(ordered),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+async def burst(client, s3, path, body, requests, concurrency, upload):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                failures += 1
+            elif upload:
+                put = await s3.put(response.json()["uploadUrl"], content=b"x" * 1024, headers={"Content-Type": "image/jpeg"})
+                failures += put.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {**percentiles(latencies), "failures": failures, "throughput_rps": round(requests / elapsed, 1)}
+
+
+async def probe(client, stop):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/gateway/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+    return percentiles(latencies)
+
+
+async def loop_lag(stop):
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - started - 0.001) * 1000)
+    return percentiles(lags)
+
+
+async def run(args):
+    import main
+    from config import settings
+    from services import awsService
+
+    settings.RATE_LIMIT_ENABLED = False
+    settings.ADMISSION_ENABLED = False
+    if args.blocking:
+        async def inline(function, *call_args, **kwargs):
+            return function(*call_args, **kwargs)
+        awsService.run_in_threadpool = inline
+
+    scenarios = {
+        "single": ("/api/v1/s3/generate-upload-url", {"file_name": "photo.jpg", "file_type": "image/jpeg"}),
+        "batch_of_10": ("/api/v1/s3/generate-upload-urls", {
+            "folder": "destinations",
+            "files": [{"file_name": f"image-{i}.jpg", "file_type": "image/jpeg"} for i in range(10)],
+        }),
+        "multipart_64mb": ("/api/v1/s3/multipart/create", {
+            "file_name": "video.mp4", "file_type": "video/mp4", "file_size": 64 * 1024 * 1024, "folder": "destinations",
+        }),
+    }
+    results = {"mode": "blocking" if args.blocking else "threadpool"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bff", timeout=60) as client, \
+            httpx.AsyncClient(timeout=60) as s3:
+        for name, (path, body) in scenarios.items():
+            stop = asyncio.Event()
+            probe_task = asyncio.create_task(probe(client, stop))
+            lag_task = asyncio.create_task(loop_lag(stop))
+            result = await burst(client, s3, path, body, args.requests, args.concurrency, args.upload and name == "single")
+            stop.set()
+            results[name] = {**result, "probe": await probe_task, "loop_lag": await lag_task}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--endpoint", help="an already running S3-compatible server to use instead of moto")
+    parser.add_argument("--upload", action="store_true", help="also PUT a small object through each single presigned URL")
+    parser.add_argument("--blocking", action="store_true", help="presign on the event loop, as before")
+    args = parser.parse_args()
+    server, endpoint = (None, args.endpoint) if args.endpoint else start_stand_in(args.port)
+    try:
+        configure(endpoint)
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
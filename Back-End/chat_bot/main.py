@@ -1,5 +1,6 @@
 import os
 import uvicorn
+from pearl_common import responses, tracing
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from pydantic import BaseModel
@@ -14,7 +15,8 @@ from langchain_core.prompts import ChatPromptTemplate
 
 load_dotenv()
 
-app = FastAPI()
+app = FastAPI(default_response_class=responses.default_response_class())
+responses.add_compression(app)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -22,6 +24,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+tracing.instrument(app, "chat_bot")
 
 embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
 pinecone_index_name = "rag-chatbot"
@@ -46,7 +49,8 @@ class Query(BaseModel):
 
 @app.post("/chat")
 async def chat(query: Query):
-    response = await retrieval_chain.ainvoke({"input": query.query})
+    with tracing.start_span("retrieval_chain", query_length=len(query.query)):
+        response = await retrieval_chain.ainvoke({"input": query.query})
     return {"answer": response["answer"]}
 
 if __name__ == "__main__":
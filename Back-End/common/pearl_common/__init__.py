@@ -0,0 +1,4 @@
+"""Modules shared by the BFF and the back-end services.
+
+Install it next to each service with ``pip install -e ../common`` from the service's directory.
+"""
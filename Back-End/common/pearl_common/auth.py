@@ -0,0 +1,67 @@
+import os
+import time
+import httpx
+from pearl_common import tracing
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+
+JWKS_URL = os.getenv("JWKS_URL", "http://localhost:8001/.well-known/jwks.json")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "RS256")
+JWT_ISSUER = os.getenv("JWT_ISSUER", "the-pearl-user-management")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "300"))
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+
+# -inf rather than 0: time.monotonic() may itself be below the TTL on a freshly booted host
+_jwks = {"keys": {}, "fetched_at": float("-inf")}
+
+
+def _refresh_jwks(force: bool = False):
+    age = time.monotonic() - _jwks["fetched_at"]
+    if age < JWKS_CACHE_TTL and not force:
+        return
+    if force and age < JWKS_MIN_REFRESH_INTERVAL:
+        return
+    try:
+        response = httpx.get(JWKS_URL, headers=tracing.outgoing_headers(), timeout=2.0)
+        response.raise_for_status()
+    except httpx.HTTPError:
+        if _jwks["keys"]:
+            return
+        raise
+    _jwks.update(
+        keys={key["kid"]: key for key in response.json().get("keys", [])},
+        fetched_at=time.monotonic(),
+    )
+
+
+def get_current_identity(token: str = Depends(oauth2_scheme)) -> dict:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        _refresh_jwks()
+        if kid not in _jwks["keys"]:
+            _refresh_jwks(force=True)
+        key = _jwks["keys"].get(kid)
+        if key is None:
+            raise credentials_exception
+        payload = jwt.decode(token, key, algorithms=[JWT_ALGORITHM], issuer=JWT_ISSUER)
+    except JWTError:
+        raise credentials_exception
+    except httpx.HTTPError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Signing keys unavailable")
+
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return {
+        "email": payload["sub"],
+        "userId": payload.get("userId"),
+        "role": payload.get("role"),
+        "userName": payload.get("userName"),
+    }
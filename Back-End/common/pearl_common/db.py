@@ -0,0 +1,82 @@
+import os
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+# Async mode serves requests over asyncpg on the event loop instead of FastAPI's threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _pool_options(url: str) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(hide_password=False)
+
+
+class Database:
+    """The engines, session factories and per-request session dependency of one service's database."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_engine(url, **_pool_options(url))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if DB_ASYNC:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            async_database_url = os.getenv("ASYNC_DATABASE_URL") or async_url(url)
+            self.async_engine = create_async_engine(async_database_url, **_pool_options(async_database_url))
+            # Same session class as SessionLocal, so session event listeners apply in both modes. Objects stay
+            # loaded after commit because response serialization happens outside the session's greenlet.
+            self.AsyncSessionLocal = async_sessionmaker(
+                self.async_engine, sync_session_class=self.SessionLocal.class_, autoflush=False,
+                expire_on_commit=False,
+            )
+
+        # The per-request session for routes; pass it to run_in_session
+        self.get_session = self.get_async_db if DB_ASYNC else self.get_db
+
+    def get_db(self):
+        db = self.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db(self):
+        async with self.AsyncSessionLocal() as db:
+            yield db
+
+
+async def run_in_session(db, fn, *args, **kwargs):
+    """Call a sync service function fn(session, ...) without blocking the event loop.
+
+    With an AsyncSession it runs through run_sync on the event loop, doing its I/O over the async driver;
+    with a plain Session it runs in the threadpool, as a sync route would.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(_call_and_release, db, fn, *args, **kwargs)
+    return await db.run_sync(fn, *args, **kwargs)
+
+
+def _call_and_release(db: Session, fn, *args, **kwargs):
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        # Return the connection before giving up the thread. A request holding one while it waits for the next
+        # threadpool slot can deadlock the pool once every thread is blocked on checkout.
+        db.close()
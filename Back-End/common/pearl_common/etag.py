@@ -0,0 +1,34 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import func
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def list_etag(query, id_column, version_column, scope: str) -> str:
+    # Row count, highest id and summed row versions change whenever a row in the set is added, removed or updated
+    count, max_id, version_sum = query.with_entities(
+        func.count(id_column), func.max(id_column), func.sum(version_column)
+    ).one()
+    return make_etag(scope, count, max_id or 0, version_sum or 0)
+
+
+def matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def conditional(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    if etag is None:
+        return None
+    if matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
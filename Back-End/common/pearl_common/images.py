@@ -0,0 +1,47 @@
+import os
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit
+from pydantic import BaseModel
+
+# Derivatives live at <prefix>/<original key>/w<width>.<format>, next to the original in the same bucket,
+# so any service can compute their URLs from the original's URL without a lookup
+VARIANTS_ENABLED = os.getenv("IMAGE_VARIANTS_ENABLED", "true").lower() == "true"
+VARIANT_PREFIX = os.getenv("IMAGE_VARIANT_PREFIX", "variants")
+VARIANT_WIDTHS = [int(width) for width in os.getenv("IMAGE_VARIANT_WIDTHS", "160,480,1024").split(",") if width.strip()]
+VARIANT_FORMATS = [fmt.strip() for fmt in os.getenv("IMAGE_VARIANT_FORMATS", "avif,webp").split(",") if fmt.strip()]
+UPLOAD_FOLDERS = ("profile-pictures", "destinations")
+
+
+class ImageVariant(BaseModel):
+    width: int
+    format: str
+    url: str
+
+
+def variant_key(source_key: str, width: int, fmt: str) -> str:
+    return f"{VARIANT_PREFIX}/{source_key}/w{width}.{fmt}"
+
+
+def variant_keys(source_key: str):
+    return [(width, fmt, variant_key(source_key, width, fmt)) for fmt in VARIANT_FORMATS for width in VARIANT_WIDTHS]
+
+
+def split_image_url(url: Optional[str]):
+    """Split an uploaded image's URL into (URL up to the key, object key), or None if it is not an upload."""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    segments = parts.path.split("/")
+    for index, segment in enumerate(segments):
+        if segment in UPLOAD_FOLDERS and index < len(segments) - 1:
+            base = urlunsplit((parts.scheme, parts.netloc, "/".join(segments[:index]) + "/", "", ""))
+            return base, "/".join(segments[index:])
+    return None
+
+
+def variant_urls(url: Optional[str]) -> List[ImageVariant]:
+    split = split_image_url(url) if VARIANTS_ENABLED else None
+    if split is None:
+        return []
+    base, source_key = split
+    return [ImageVariant(width=width, format=fmt, url=base + key) for width, fmt, key in variant_keys(source_key)]
@@ -0,0 +1,59 @@
+import time
+from fastapi import FastAPI, Request
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.responses import Response
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+REQUEST_ERRORS = Counter("http_request_errors_total", "HTTP requests that ended in a 5xx or an unhandled exception", ["method", "route"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS)
+IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being handled", ["method", "route"])
+
+
+def _flat_routes(routes):
+    # Newer FastAPI keeps included routers as a single entry; expand them into their routes
+    for route in routes:
+        nested = getattr(route, "effective_candidates", None)
+        if nested is not None:
+            yield from _flat_routes(nested())
+        else:
+            yield route
+
+
+def route_template(app: FastAPI, scope) -> str:
+    # Label by the route's path template so /trips/1 and /trips/2 share a series
+    for route in _flat_routes(app.router.routes):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+def instrument(app: FastAPI, metrics_path: str = "/metrics"):
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        method = request.method
+        route = route_template(app, request.scope)
+        if route == metrics_path:
+            return await call_next(request)
+
+        in_progress = IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            if status_code >= 500:
+                REQUEST_ERRORS.labels(method, route).inc()
+            in_progress.dec()
+
+    @app.get(metrics_path, include_in_schema=False)
+    def get_metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,44 @@
+import os
+from typing import Any
+from fastapi import FastAPI
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "true").lower() == "true"
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def default_response_class():
+    response_class = FastJSONResponse if FAST_JSON_ENABLED and orjson is not None else JSONResponse
+    # Wrapped in Default so FastAPI keeps its own pydantic-core fast path for routes with a response model
+    return Default(response_class)
+
+
+def add_compression(app: FastAPI):
+    if not COMPRESSION_ENABLED:
+        return
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+        return
+    app.add_middleware(
+        BrotliMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        quality=BROTLI_QUALITY,
+        gzip_fallback=True,
+    )
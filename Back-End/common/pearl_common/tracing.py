@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from fastapi import FastAPI, Request
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "")
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "none")  # none | file | http
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL", "http://localhost:9411/spans")
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+TRACE_SQL_MAX_LENGTH = int(os.getenv("TRACE_SQL_MAX_LENGTH", "500"))
+
+logger = logging.getLogger("tracing")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class Span:
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: Dict):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.request_id = _request_id.get()
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        self.duration_ms = 0.0
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict:
+        return {
+            "service": SERVICE_NAME,
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "request_id": self.request_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(header: Optional[str]):
+    # W3C trace context: version-trace_id-parent_id-flags
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[0] == "ff" or set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+        return None
+    return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+
+
+class _Exporter:
+    """Hands finished spans to a daemon thread so exporting never blocks a request."""
+
+    def __init__(self):
+        self._queue: "queue.SimpleQueue[Dict]" = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, span: Span):
+        if TRACE_EXPORT == "none":
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        self._queue.put(span.to_dict())
+
+    def _drain(self):
+        batch = [self._queue.get()]
+        while len(batch) < 500:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._drain()
+            try:
+                if TRACE_EXPORT == "file":
+                    with open(TRACE_EXPORT_PATH, "a") as trace_file:
+                        trace_file.writelines(json.dumps(span) + "\n" for span in batch)
+                elif TRACE_EXPORT == "http":
+                    request = urllib.request.Request(
+                        TRACE_COLLECTOR_URL,
+                        data=json.dumps(batch).encode(),
+                        headers={"Content-Type": "application/json"},
+                    )
+                    urllib.request.urlopen(request, timeout=2).close()
+            except Exception:
+                logger.warning("Dropped %d spans", len(batch), exc_info=True)
+
+
+_exporter = _Exporter()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", traceparent: Optional[str] = None, **attributes):
+    parent = current_span()
+    remote = parse_traceparent(traceparent) if parent is None else None
+    if parent is not None:
+        span = Span(name, kind, parent.trace_id, parent.span_id, parent.sampled, attributes)
+    elif remote is not None:
+        span = Span(name, kind, remote[0], remote[1], remote[2], attributes)
+    else:
+        span = Span(name, kind, secrets.token_hex(16), None, random.random() < TRACE_SAMPLE_RATIO, attributes)
+
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.status = "error"
+        raise
+    finally:
+        span.finish()
+        _current_span.reset(token)
+        if span.sampled:
+            _exporter.submit(span)
+
+
+def outgoing_headers() -> Dict[str, str]:
+    headers = {}
+    span = current_span()
+    if span is not None:
+        headers["traceparent"] = span.traceparent()
+    if _request_id.get():
+        headers["X-Request-ID"] = _request_id.get()
+    return headers
+
+
+def instrument(app: FastAPI, service_name: str):
+    global SERVICE_NAME
+    SERVICE_NAME = SERVICE_NAME or service_name
+
+    @app.middleware("http")
+    async def tracing_middleware(request: Request, call_next):
+        with start_span(
+            f"{request.method} {request.url.path}",
+            kind="server",
+            traceparent=request.headers.get("traceparent"),
+            method=request.method,
+            path=request.url.path,
+        ) as span:
+            span.request_id = request.headers.get("X-Request-ID") or span.trace_id
+            token = _request_id.set(span.request_id)
+            try:
+                response = await call_next(request)
+            finally:
+                _request_id.reset(token)
+            route = request.scope.get("route")
+            if route is not None:
+                span.name = f"{request.method} {route.path}"
+            span.attributes["status_code"] = response.status_code
+            if response.status_code >= 500:
+                span.status = "error"
+            response.headers["traceparent"] = span.traceparent()
+            response.headers["X-Request-ID"] = span.request_id
+
+        logger.info(
+            "request_id=%s trace_id=%s span=%r status=%s duration_ms=%.1f",
+            span.request_id, span.trace_id, span.name, response.status_code, span.duration_ms,
+        )
+        return response
+
+
+def instrument_sqlalchemy(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_span() is None:
+            return
+        manager = start_span("db.query", kind="client", statement=statement[:TRACE_SQL_MAX_LENGTH])
+        manager.__enter__()
+        conn.info.setdefault("trace_spans", []).append(manager)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().__exit__(None, None, None)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        spans = exception_context.connection.info.get("trace_spans") if exception_context.connection else None
+        if spans:
+            error = exception_context.original_exception
+            spans.pop().__exit__(type(error), error, None)
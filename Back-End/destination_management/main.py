@@ -1,14 +1,43 @@
+import asyncio
+import logging
+import os
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException
+from pearl_common import metrics, responses, tracing, etag
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from schemas import destinationSchemas, wishlistSchemas, selectedDestinationsSchemas
-from services import destinationServices, wishlistServices, selectedDestinationsServices
-from db import get_db
-from sqlalchemy.orm import Session
+from services import destinationServices, wishlistServices, selectedDestinationsServices, counterServices
+from db import engine, async_engine, get_session, run_in_session
+from pearl_common.auth import get_current_identity
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from typing import List
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional
 
-app = FastAPI()
+COUNTER_RECONCILE_INTERVAL = float(os.getenv("COUNTER_RECONCILE_INTERVAL", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+async def _reconcile_counters_periodically():
+    while True:
+        try:
+            await run_in_threadpool(counterServices.run_reconciliation)
+        except Exception:
+            logger.exception("Counter reconciliation failed")
+        await asyncio.sleep(COUNTER_RECONCILE_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reconciler = asyncio.create_task(_reconcile_counters_periodically())
+    yield
+    reconciler.cancel()
+
+app = FastAPI(lifespan=lifespan, default_response_class=responses.default_response_class())
+responses.add_compression(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,80 +47,117 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.instrument(app)
+tracing.instrument(app, "destination")
+tracing.instrument_sqlalchemy(engine)
+if async_engine is not None:
+    tracing.instrument_sqlalchemy(async_engine.sync_engine)
+
+
+@app.get("/health")
+async def health_check(db=Depends(get_session)):
+    try:
+        await run_in_session(db, lambda session: session.execute(text("SELECT 1")))
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ok"}
+
+
 @app.post("/destinations/add", response_model=destinationSchemas.Destination)
-def add_destination(destination: destinationSchemas.DestinationCreated, db: Session = Depends(get_db)):
-    return destinationServices.create_destination(db, destination)
+async def add_destination(destination: destinationSchemas.DestinationCreated, db=Depends(get_session)):
+    return await run_in_session(db, destinationServices.create_destination, destination)
 
 
 @app.get("/destinations/", response_model=list[destinationSchemas.Destination])
-def get_all_destinations(db: Session = Depends(get_db)):
-    return destinationServices.get_all_destinations(db)
+async def get_all_destinations(request: Request, response: Response, db=Depends(get_session)):
+    destinations_etag = await run_in_session(db, destinationServices.get_all_destinations_etag)
+    not_modified = etag.conditional(request, response, destinations_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, destinationServices.get_all_destinations)
 
 
 @app.get("/destinations/destination/{id}", response_model=destinationSchemas.Destination)
-def get_destination_by_id(id: int, db: Session = Depends(get_db)):
-    destination = destinationServices.get_destination(db, id);
+async def get_destination_by_id(id: int, request: Request, response: Response, db=Depends(get_session)):
+    destination_etag = await run_in_session(db, destinationServices.get_destination_etag, id)
+    not_modified = etag.conditional(request, response, destination_etag)
+    if not_modified:
+        return not_modified
+    destination = await run_in_session(db, destinationServices.get_destination, id)
     if destination:
         return destination
     raise HTTPException(status_code=404, detail="Invalid Destination ID")
 
 
+@app.post("/destinations/bulk", response_model=list[destinationSchemas.Destination])
+async def get_destinations_bulk(request: destinationSchemas.DestinationBulkRequest, db=Depends(get_session)):
+    return await run_in_session(db, destinationServices.get_destinations_by_ids, request.destinationIds)
+
+
 @app.patch("/destinations/update_destination/{id}", response_model=destinationSchemas.Destination)
-def update_destination(destination: destinationSchemas.DestinationCreated, id: int, db: Session = Depends(get_db)):
-    db_update = destinationServices.update_destination(db, destination, id)
+async def update_destination(destination: destinationSchemas.DestinationCreated, id: int, db=Depends(get_session)):
+    db_update = await run_in_session(db, destinationServices.update_destination, destination, id)
     if db_update is None:
         raise HTTPException(status_code=404, detail="Destination not found")
     return db_update
 
 
 @app.delete("/destinations/delete_destination/{id}")
-def delete_destination(id: int, db: Session = Depends(get_db)):
-    deleted = destinationServices.delete_destination(db, id)
+async def delete_destination(id: int, db=Depends(get_session)):
+    deleted = await run_in_session(db, destinationServices.delete_destination, id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Destination not found")
     return {"message": "Destination deleted successfully"}
 
 
 @app.post('/wishlist/add', response_model=wishlistSchemas.WishList)
-def create_wishlist(wishlist: wishlistSchemas.WishListCreated, db: Session = Depends(get_db)):
-    return wishlistServices.create_wishlist(db, wishlist)
+async def create_wishlist(wishlist: wishlistSchemas.WishListCreated, db=Depends(get_session)):
+    return await run_in_session(db, wishlistServices.create_wishlist, wishlist)
+
+
+@app.get('/wishlist/mine', response_model=Optional[wishlistSchemas.WishList])
+async def get_my_wishlist(identity: dict = Depends(get_current_identity), db=Depends(get_session)):
+    return await run_in_session(db, wishlistServices.get_wishlist, identity["userId"])
 
 
 @app.get('/wishlist/{touristId}', response_model=Optional[wishlistSchemas.WishList])
-def get_wishlist_by_id(touristId: int, db: Session = Depends(get_db)):
-    return wishlistServices.get_wishlist(db, touristId)
+async def get_wishlist_by_id(touristId: int, db=Depends(get_session)):
+    return await run_in_session(db, wishlistServices.get_wishlist, touristId)
 
 
 @app.patch("/wishlist/{wishlist_id}/update-destinations", response_model=wishlistSchemas.WishList)
-def update_wishlist_destinations(wishlist_id: int, new_destinations: List[int], db: Session = Depends(get_db)):
-    updated_wishlist = wishlistServices.update_wishlist(db, wishlist_id, new_destinations)
+async def update_wishlist_destinations(wishlist_id: int, new_destinations: List[int], db=Depends(get_session)):
+    updated_wishlist = await run_in_session(db, wishlistServices.update_wishlist, wishlist_id, new_destinations)
     if not updated_wishlist:
         raise HTTPException(status_code=404, detail="Wishlist not found")
     return updated_wishlist
 
 
 @app.post("/selected-destinations/add", response_model=selectedDestinationsSchemas.SelectedDestinations)
-def create_selected_destinations_list(selectedDestinations: selectedDestinationsSchemas.SelectedDestinationsCreated,
-                                      db: Session = Depends(get_db)):
-    return selectedDestinationsServices.create_selected_destinations_list(db, selectedDestinations)
+async def create_selected_destinations_list(selectedDestinations: selectedDestinationsSchemas.SelectedDestinationsCreated,
+                                            db=Depends(get_session)):
+    return await run_in_session(db, selectedDestinationsServices.create_selected_destinations_list, selectedDestinations)
 
 
 @app.get("/selected-destinations/{touristId}", response_model=Optional[selectedDestinationsSchemas.SelectedDestinations])
-def get_selected_destinations_list(touristId: int, db: Session = Depends(get_db)):
-    return selectedDestinationsServices.get_selected_destinations_list(db, touristId)
+async def get_selected_destinations_list(touristId: int, db=Depends(get_session)):
+    return await run_in_session(db, selectedDestinationsServices.get_selected_destinations_list, touristId)
 
 
 @app.patch("/selected-destinations/{selected_destination_list_id}/updated-selected-destinations",
            response_model=selectedDestinationsSchemas.SelectedDestinations)
-def update_selected_destinations_list(selected_destination_list_id: int, new_selected_destinations: List[int], db: Session = Depends(get_db)):
-    updated_list = selectedDestinationsServices.update_selected_destinations_list(db, selected_destination_list_id, new_selected_destinations)
+async def update_selected_destinations_list(selected_destination_list_id: int, new_selected_destinations: List[int], db=Depends(get_session)):
+    updated_list = await run_in_session(
+        db, selectedDestinationsServices.update_selected_destinations_list, selected_destination_list_id,
+        new_selected_destinations,
+    )
     if not updated_list:
         raise HTTPException(status_code=404, detail="Wishlist not found")
     return updated_list
 
 @app.get("/api/destinations/count", response_model=dict, tags=["Destinations"])
-def get_destinations_count(db: Session = Depends(get_db)):
-    count = destinationServices.count_destinations(db)
+async def get_destinations_count(db=Depends(get_session)):
+    count = await run_in_session(db, destinationServices.count_destinations)
     return {"total_destinations": count}
 
 if __name__ == "__main__":
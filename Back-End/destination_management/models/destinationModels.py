@@ -1,5 +1,5 @@
 from db import Base
-from sqlalchemy import Integer, Column, String
+from sqlalchemy import Integer, Column, String, literal_column
 from sqlalchemy.dialects.postgresql import ARRAY
 
 
@@ -15,3 +15,4 @@ class Destinations(Base):
     district = Column(String)
     climate = Column(String)
     image = Column(String)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
 from typing import List
+from pearl_common import images
 
 
 class DestinationBase(BaseModel):
@@ -16,9 +17,18 @@ class DestinationCreated(DestinationBase):
     pass
 
 
+class DestinationBulkRequest(BaseModel):
+    destinationIds: List[int] = Field(..., max_length=500)
+
+
 class Destination(DestinationBase):
     id: int
 
+    @computed_field
+    @property
+    def imageVariants(self) -> List[images.ImageVariant]:
+        return images.variant_urls(self.image)
+
     class config:
         from_attribute = True
 
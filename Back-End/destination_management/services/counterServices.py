@@ -0,0 +1,35 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from models.counterModels import Counter
+from models.destinationModels import Destinations
+from db import SessionLocal
+
+DESTINATIONS = "destinations"
+
+
+def increment(db: Session, name: str, delta: int = 1):
+    stmt = insert(Counter).values(name=name, value=delta)
+    stmt = stmt.on_conflict_do_update(index_elements=[Counter.name], set_={"value": Counter.value + delta})
+    db.execute(stmt)
+
+
+def get_count(db: Session, name: str) -> int:
+    value = db.query(Counter.value).filter(Counter.name == name).scalar()
+    return value or 0
+
+
+def reconcile_counters(db: Session):
+    increment(db, DESTINATIONS, 0)
+    # Lock the counter row first so in-flight creates/deletes either finish before the recount or wait for it
+    counter = db.query(Counter).filter(Counter.name == DESTINATIONS).with_for_update().one()
+    counter.value = db.query(Destinations).count()
+    db.commit()
+    return counter.value
+
+
+def run_reconciliation():
+    db = SessionLocal()
+    try:
+        return reconcile_counters(db)
+    finally:
+        db.close()
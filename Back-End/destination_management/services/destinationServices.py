@@ -1,11 +1,15 @@
 from sqlalchemy.orm import Session
+from typing import List
 from schemas import destinationSchemas
 from models.destinationModels import Destinations
+from services import counterServices
+from pearl_common import etag
 
 
 def create_destination(db: Session, data: destinationSchemas.DestinationCreated):
     new_destination = Destinations(**data.model_dump())
     db.add(new_destination)
+    counterServices.increment(db, counterServices.DESTINATIONS)
     db.commit()
     db.refresh(new_destination)
     return new_destination
@@ -15,10 +19,25 @@ def get_all_destinations(db: Session):
     return db.query(Destinations).all()
 
 
+def get_all_destinations_etag(db: Session):
+    return etag.list_etag(db.query(Destinations), Destinations.id, Destinations.version, "destinations")
+
+
+def get_destination_etag(db: Session, destination_id: int):
+    version = db.query(Destinations.version).filter(Destinations.id == destination_id).scalar()
+    return etag.make_etag("destination", destination_id, version) if version is not None else None
+
+
 def get_destination(db: Session, destination_id: int):
     return db.query(Destinations).filter(Destinations.id == destination_id).first()
 
 
+def get_destinations_by_ids(db: Session, destination_ids: List[int]):
+    if not destination_ids:
+        return []
+    return db.query(Destinations).filter(Destinations.id.in_(list(set(destination_ids)))).all()
+
+
 def update_destination(db: Session, destination: destinationSchemas.DestinationCreated, destination_id: int):
     retrieved_destination = db.query(Destinations).filter(Destinations.id == destination_id).first()
     if retrieved_destination:
@@ -33,8 +52,9 @@ def delete_destination(db: Session, destination_id: int):
     retrieved_destination = db.query(Destinations).filter(Destinations.id == destination_id).first()
     if retrieved_destination:
         db.delete(retrieved_destination)
+        counterServices.increment(db, counterServices.DESTINATIONS, -1)
         db.commit()
         return "Deleted"
 
 def count_destinations(db: Session):
-    return db.query(Destinations).count()
+    return counterServices.get_count(db, counterServices.DESTINATIONS)
@@ -1,11 +1,15 @@
-from db import engine, Base
-from models import tripModels
+import os
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
 
 
 def create_tables():
-    print("Creating tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Tables created successfully!")
+    # The schema is migration-managed; this brings a new or existing database up to the latest revision
+    print("Migrating trips database...")
+    command.upgrade(Config(ALEMBIC_INI), "head")
+    print("Database is up to date!")
 
 
 if __name__ == "__main__":
@@ -1,12 +1,61 @@
+import asyncio
+import logging
+import os
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException
+from pearl_common import metrics, responses, tracing, etag
+from contextlib import asynccontextmanager
+from datetime import date
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from schemas import tripSchemas
-from services import tripServices
-from db import get_db
-from sqlalchemy.orm import Session
+from services import tripServices, counterServices, eventServices, statsServices
+from db import engine, async_engine, get_session, run_in_session
+from pearl_common.auth import get_current_identity
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
-app = FastAPI()
+COUNTER_RECONCILE_INTERVAL = float(os.getenv("COUNTER_RECONCILE_INTERVAL", "300"))
+TRIP_STATS_REFRESH_INTERVAL = float(os.getenv("TRIP_STATS_REFRESH_INTERVAL", "60"))
+EVENT_HEARTBEAT_INTERVAL = float(os.getenv("TRIP_EVENTS_HEARTBEAT_INTERVAL", "15"))
+QUERY_DEFAULT_LIMIT = int(os.getenv("TRIP_QUERY_DEFAULT_LIMIT", "20"))
+QUERY_MAX_LIMIT = int(os.getenv("TRIP_QUERY_MAX_LIMIT", "100"))
+
+logger = logging.getLogger(__name__)
+
+
+async def _reconcile_counters_periodically():
+    while True:
+        try:
+            await run_in_threadpool(counterServices.run_reconciliation)
+        except Exception:
+            logger.exception("Counter reconciliation failed")
+        await asyncio.sleep(COUNTER_RECONCILE_INTERVAL)
+
+
+async def _refresh_trip_stats_periodically():
+    while True:
+        try:
+            await run_in_threadpool(statsServices.run_refresh)
+        except Exception:
+            logger.exception("Trip stats refresh failed")
+        await asyncio.sleep(TRIP_STATS_REFRESH_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reconciler = asyncio.create_task(_reconcile_counters_periodically())
+    stats_refresher = asyncio.create_task(_refresh_trip_stats_periodically())
+    eventServices.start()
+    yield
+    eventServices.stop()
+    stats_refresher.cancel()
+    reconciler.cancel()
+
+app = FastAPI(lifespan=lifespan, default_response_class=responses.default_response_class())
+responses.add_compression(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,79 +65,212 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.instrument(app)
+tracing.instrument(app, "trip")
+tracing.instrument_sqlalchemy(engine)
+if async_engine is not None:
+    tracing.instrument_sqlalchemy(async_engine.sync_engine)
+
+
+@app.get("/health")
+async def health_check(db=Depends(get_session)):
+    try:
+        await run_in_session(db, lambda session: session.execute(text("SELECT 1")))
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ok"}
+
+
+async def _event_stream(subscription: eventServices.Subscription):
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), EVENT_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is None:
+                return
+            yield f"data: {message}\n\n"
+    finally:
+        eventServices.bus.unsubscribe(subscription)
+
+
+@app.get("/trips/events")
+async def stream_trip_events(touristId: int | None = None, tourGuideId: int | None = None):
+    subscription = eventServices.bus.subscribe(tourist_id=touristId, tour_guide_id=tourGuideId)
+    return StreamingResponse(
+        _event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/trips/events/stats", response_model=dict)
+async def get_trip_event_stats():
+    return eventServices.get_event_stats()
+
 
 @app.post("/trips/add", response_model=tripSchemas.Trip)
-def create_trip(trip: tripSchemas.TripCreated, db: Session = Depends(get_db)):
-    return tripServices.create_trip(db, trip)
+async def create_trip(trip: tripSchemas.TripCreated, db=Depends(get_session)):
+    return await run_in_session(db, tripServices.create_trip, trip)
 
 
 @app.get("/trips/", response_model=list[tripSchemas.Trip])
-def get_all_trips(db: Session = Depends(get_db)):
-    return tripServices.get_all_trip(db)
+async def get_all_trips(db=Depends(get_session)):
+    return await run_in_session(db, tripServices.get_all_trip)
+
+
+@app.get("/trips/query", response_model=tripSchemas.TripPage)
+async def query_trips(
+    request: Request,
+    response: Response,
+    touristId: int | None = None,
+    tourGuideId: int | None = None,
+    status: List[tripSchemas.TripStatus] = Query(default=[]),
+    paymentStatus: tripSchemas.PaymentStatus | None = None,
+    order: Literal["desc", "asc"] = "desc",
+    cursor: str | None = None,
+    limit: int = Query(default=QUERY_DEFAULT_LIMIT, ge=1, le=QUERY_MAX_LIMIT),
+    db=Depends(get_session),
+):
+    try:
+        after_id = tripServices.decode_cursor(cursor, order) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items, next_cursor = await run_in_session(
+        db, tripServices.query_trips, tourist_id=touristId, tour_guide_id=tourGuideId, statuses=status,
+        payment_status=paymentStatus, order=order, after_id=after_id, limit=limit,
+    )
+    # Tagged by the page's own rows, so revalidating a page costs the same however large the history is
+    page_etag = etag.make_etag(request.url.query, next_cursor, *(f"{trip.id}.{trip.version}" for trip in items))
+    not_modified = etag.conditional(request, response, page_etag)
+    if not_modified:
+        return not_modified
+    return {"items": items, "nextCursor": next_cursor}
+
+
+@app.get("/trips/mine", response_model=list[tripSchemas.Trip])
+async def get_my_trips(identity: dict = Depends(get_current_identity), db=Depends(get_session)):
+    if identity["role"] == "tourist":
+        return await run_in_session(db, tripServices.get_trip_by_tourist_id, identity["userId"])
+    if identity["role"] == "tour_guide":
+        return await run_in_session(db, tripServices.get_trip_by_tour_guide_id, identity["userId"])
+    raise HTTPException(status_code=403, detail="Only tourists and tour guides have trips")
 
 
 @app.get("/trips/trip-by-tourist/{touristId}", response_model=list[tripSchemas.Trip])
-def get_trip_by_tourist_id(touristId: int, db: Session = Depends(get_db)):
-    return tripServices.get_trip_by_tourist_id(db, touristId)
+async def get_trip_by_tourist_id(touristId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tourist_id=touristId)
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_trip_by_tourist_id, touristId)
 
 
 @app.get("/trips/trip-by-tour-guide/{tourGuideId}", response_model=list[tripSchemas.Trip])
-def get_trip_by_tour_guide_id(tourGuideId: int, db: Session = Depends(get_db)):
-    return tripServices.get_trip_by_tour_guide_id(db, tourGuideId)
+async def get_trip_by_tour_guide_id(tourGuideId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tour_guide_id=tourGuideId)
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_trip_by_tour_guide_id, tourGuideId)
 
 @app.get("/trips/trip-by-tourist/{touristId}/completed", response_model=list[tripSchemas.Trip])
-def get_completed_trips_for_tourist(touristId: int, db: Session = Depends(get_db)):
-    return tripServices.get_completed_trips_by_tourist(db, touristId)
+async def get_completed_trips_for_tourist(touristId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tourist_id=touristId, statuses=["Completed"])
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_completed_trips_by_tourist, touristId)
 
 @app.get("/trips/trip-by-tourist/{touristId}/accepted", response_model=list[tripSchemas.Trip])
-def get_accepted_trips_by_tourist(touristId: int, db: Session = Depends(get_db)):
-    return tripServices.get_accepted_trips_by_tourist(db, touristId)
+async def get_accepted_trips_by_tourist(touristId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tourist_id=touristId, statuses=["Accepted", "Started"])
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_accepted_trips_by_tourist, touristId)
+
+# Registered before /trips/{tripId}/..., which would otherwise match "bulk" as a trip id
+@app.patch('/trips/bulk/update-trip-status', response_model=tripSchemas.TripBulkStatusResult)
+async def bulk_update_trip_status(bulk_update: tripSchemas.TripBulkStatusUpdate, db=Depends(get_session)):
+    return await run_in_session(db, tripServices.bulk_update_trip_status, bulk_update)
+
 
 @app.patch('/trips/{tripId}/update-trip-status', response_model=tripSchemas.Trip)
-def update_trip_status(tripId: int, status_update: tripSchemas.TripStatusUpdate, db: Session = Depends(get_db)):
-    updated_trip_status = tripServices.update_trip_status(db, tripId, status_update)
+async def update_trip_status(tripId: int, status_update: tripSchemas.TripStatusUpdate, db=Depends(get_session)):
+    updated_trip_status = await run_in_session(db, tripServices.update_trip_status, tripId, status_update)
     if not updated_trip_status:
         raise HTTPException(status_code=404, detail="Trip not found")
     return updated_trip_status
 
 
 @app.patch('/trips/{tripId}/update-payment-status', response_model=tripSchemas.Trip)
-def update_trip_payment_status(tripId: int, payment_update: tripSchemas.TripPaymentStatusUpdate,
-                               db: Session = Depends(get_db)):
-    updated_payment_status = tripServices.update_trip_payment_status(db, tripId, payment_update)
+async def update_trip_payment_status(tripId: int, payment_update: tripSchemas.TripPaymentStatusUpdate,
+                                     db=Depends(get_session)):
+    updated_payment_status = await run_in_session(db, tripServices.update_trip_payment_status, tripId, payment_update)
     if not updated_payment_status:
         raise HTTPException(status_code=404, detail="Trip not found")
     return updated_payment_status
 
 @app.get("/trips/trip-by-tour-guide/{tourGuideId}/pending", response_model=list[tripSchemas.Trip])
-def get_pending_trips_for_tour_guide(tourGuideId: int, db: Session = Depends(get_db)):
-    return tripServices.get_pending_trips_by_tour_guide(db, tourGuideId)
+async def get_pending_trips_for_tour_guide(tourGuideId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tour_guide_id=tourGuideId, statuses=["Pending"])
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_pending_trips_by_tour_guide, tourGuideId)
 
 @app.get("/trips/trip-by-tour-guide/{tourGuideId}/accepted", response_model=list[tripSchemas.Trip])
-def get_accepted_trips_for_tour_guide(tourGuideId: int, db: Session = Depends(get_db)):
-    return tripServices.get_accepted_trips_by_tour_guide(db, tourGuideId)
+async def get_accepted_trips_for_tour_guide(tourGuideId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tour_guide_id=tourGuideId, statuses=["Accepted"])
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_accepted_trips_by_tour_guide, tourGuideId)
 
 @app.get("/trips/trip-by-tour-guide/{tourGuideId}/started", response_model=list[tripSchemas.Trip])
-def get_started_trips_for_tour_guide(tourGuideId: int, db: Session = Depends(get_db)):
-    return tripServices.get_started_trips_by_tour_guide(db, tourGuideId)
+async def get_started_trips_for_tour_guide(tourGuideId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tour_guide_id=tourGuideId, statuses=["Started"])
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_started_trips_by_tour_guide, tourGuideId)
 
 @app.get("/trips/trip-by-tour-guide/{tourGuideId}/completed", response_model=list[tripSchemas.Trip])
-def get_completed_trips_for_tour_guide(tourGuideId: int, db: Session = Depends(get_db)):
-    return tripServices.get_complated_trips_by_tour_guide(db, tourGuideId)
+async def get_completed_trips_for_tour_guide(tourGuideId: int, request: Request, response: Response, db=Depends(get_session)):
+    trips_etag = await run_in_session(db, tripServices.get_trips_etag, tour_guide_id=tourGuideId, statuses=["Completed"])
+    not_modified = etag.conditional(request, response, trips_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tripServices.get_complated_trips_by_tour_guide, tourGuideId)
 
 @app.get("/api/trips/count/completed", response_model=dict, tags=["Trips"])
-def get_completed_trips_count(db: Session = Depends(get_db)):
-    count = tripServices.count_completed_trips(db)
+async def get_completed_trips_count(db=Depends(get_session)):
+    count = await run_in_session(db, tripServices.count_completed_trips)
     return {"completed_trips_count": count}
 
 @app.get("/api/trips/tourist/{tourist_id}/has-active-trip", response_model=dict, tags=["Trips"])
-def check_tourist_has_active_trip(tourist_id: int, db: Session = Depends(get_db)):
-    has_trip = tripServices.has_active_trip_for_tourist(db, tourist_id)
+async def check_tourist_has_active_trip(tourist_id: int, db=Depends(get_session)):
+    has_trip = await run_in_session(db, tripServices.has_active_trip_for_tourist, tourist_id)
     return {"has_active_trip": has_trip}
 
+@app.get("/trips/stats", response_model=tripSchemas.TripStats)
+async def get_trip_stats(touristId: int | None = None, tourGuideId: int | None = None, db=Depends(get_session)):
+    if touristId is None and tourGuideId is None:
+        return await run_in_session(db, statsServices.get_platform_stats)
+    return await run_in_session(db, statsServices.get_trip_stats, tourist_id=touristId, tour_guide_id=tourGuideId)
+
+@app.get("/trips/tour-guides/busy", response_model=tripSchemas.BusyTourGuides)
+async def get_busy_tour_guides(startDate: date, numberOfDays: int = Query(ge=1), db=Depends(get_session)):
+    busy = await run_in_session(db, tripServices.get_busy_tour_guides, startDate, numberOfDays)
+    return {"tourGuideIds": busy}
+
 @app.get("/api/trips/tour-guide/{tour_guide_id}/has-active-trip", response_model=dict, tags=["Trips"])
-def check_tour_guide_has_active_trip(tour_guide_id: int, db: Session = Depends(get_db)):
-    has_trip = tripServices.has_active_trip_for_tour_guide(db, tour_guide_id)
+async def check_tour_guide_has_active_trip(tour_guide_id: int, db=Depends(get_session)):
+    has_trip = await run_in_session(db, tripServices.has_active_trip_for_tour_guide, tour_guide_id)
     return {"has_active_trip": has_trip}
 
 if __name__ == "__main__":
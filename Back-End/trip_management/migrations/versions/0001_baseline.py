@@ -0,0 +1,48 @@
+"""Baseline: the trips and counters tables as create_tables.py used to build them
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created before migrations already have these tables; IF NOT EXISTS adopts them as they are
+    op.create_table(
+        "trips",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("touristId", sa.Integer()),
+        sa.Column("touristPassportNumber", sa.String()),
+        sa.Column("touristCountry", sa.String()),
+        sa.Column("tourGuideId", sa.Integer()),
+        sa.Column("destinations", postgresql.ARRAY(sa.String())),
+        sa.Column("numberOfAdults", sa.Integer()),
+        sa.Column("numberOfChildren", sa.Integer()),
+        sa.Column("startDate", sa.String()),
+        sa.Column("numberOfDays", sa.Integer()),
+        sa.Column("tripStatus", sa.String()),
+        sa.Column("tripPayment", sa.Float()),
+        sa.Column("paymentStatus", sa.String()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_trips_id", "trips", ["id"], if_not_exists=True)
+    op.execute("ALTER TABLE trips ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1")
+    op.create_table(
+        "counters",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("value", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table("counters")
+    op.drop_table("trips")
@@ -0,0 +1,47 @@
+"""Composite and partial indexes for every trip access path
+
+Revision ID: 0002_trip_access_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import text
+
+revision = "0002_trip_access_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# (name, columns, INCLUDE columns, partial predicate); mirrors Trip.__table_args__
+INDEXES = [
+    # Trips by tourist or guide, optionally by status, and the ETag aggregates over them (index-only via INCLUDE)
+    ("ix_trips_tourist_status", ["touristId", "tripStatus"], ["id", "version"], None),
+    ("ix_trips_guide_status", ["tourGuideId", "tripStatus"], ["id", "version"], None),
+    # has_active_trip_* only ever look at active trips, a small slice of the table
+    ("ix_trips_tourist_active", ["touristId"], [], "\"tripStatus\" IN ('Pending', 'Accepted', 'Started')"),
+    ("ix_trips_guide_active", ["tourGuideId"], [], "\"tripStatus\" IN ('Accepted', 'Started')"),
+    # Counter reconciliation counts completed trips
+    ("ix_trips_completed", ["id"], [], "\"tripStatus\" IN ('Completed')"),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps trips writable while the indexes build; it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns, include, where in INDEXES:
+            op.create_index(
+                name,
+                "trips",
+                columns,
+                postgresql_include=include,
+                postgresql_where=text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    op.execute("ANALYZE trips")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="trips", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,33 @@
+"""Indexes for keyset pagination of the trip query
+
+Revision ID: 0003_trip_keyset_indexes
+Revises: 0002_trip_access_path_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003_trip_keyset_indexes"
+down_revision = "0002_trip_access_path_indexes"
+branch_labels = None
+depends_on = None
+
+# (name, columns); mirrors Trip.__table_args__
+INDEXES = [
+    # /trips/query walks a tourist's or guide's trips in id order and stops after one page,
+    # whatever statuses are asked for and however long the history is
+    ("ix_trips_tourist_keyset", ["touristId", "id"]),
+    ("ix_trips_guide_keyset", ["tourGuideId", "id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, "trips", columns, postgresql_concurrently=True, if_not_exists=True)
+    op.execute("ANALYZE trips")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="trips", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,70 @@
+"""Trip date ranges and the index behind guide availability
+
+Revision ID: 0004_trip_period
+Revises: 0003_trip_keyset_indexes
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import DATERANGE
+
+revision = "0004_trip_period"
+down_revision = "0003_trip_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+# Mirrors TRIP_PERIOD_SQL in models/tripModels.py
+START_DATE = 'make_date(substr("startDate", 1, 4)::int, substr("startDate", 6, 2)::int, substr("startDate", 9, 2)::int)'
+PERIOD = (
+    f"""CASE WHEN "startDate" ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' AND "numberOfDays" > 0 """
+    f"""THEN daterange({START_DATE}, {START_DATE} + "numberOfDays") END"""
+)
+# Only accepted and started trips block a guide, so only they are indexed
+ACTIVE = "\"tripStatus\" IN ('Accepted', 'Started')"
+# Rows PERIOD would call make_date for, and the parts it would call it with
+YEAR, MONTH, DAY = ('substr("startDate", 1, 4)::int', 'substr("startDate", 6, 2)::int', 'substr("startDate", 9, 2)::int')
+DATED = """"startDate" ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}' AND "numberOfDays" > 0"""
+# make_date raises on a day the month does not have, e.g. 2024-02-30. The checks are nested in CASE, whose
+# order Postgres keeps, so the casts only see digits and make_date only a valid year and month.
+INVALID_DATE = (
+    f"CASE WHEN ({DATED}) IS NOT TRUE THEN false "
+    f"WHEN {YEAR} < 1 OR {MONTH} NOT BETWEEN 1 AND 12 THEN true "
+    f"ELSE {DAY} NOT BETWEEN 1 AND extract(day FROM make_date({YEAR}, {MONTH}, 1) + interval '1 month - 1 day') END"
+)
+
+
+def upgrade():
+    # Computing the column fails on the first malformed start date it meets; name all of them up front instead
+    op.execute(f"""
+        DO $$
+        DECLARE
+            invalid text;
+        BEGIN
+            SELECT string_agg(id::text, ', ' ORDER BY id) INTO invalid FROM trips WHERE {INVALID_DATE};
+            IF invalid IS NOT NULL THEN
+                RAISE EXCEPTION USING
+                    MESSAGE = 'Trips ' || invalid || ' have a startDate that is not a real calendar date',
+                    HINT = 'Correct their startDate to an existing YYYY-MM-DD date, then upgrade again.';
+            END IF;
+        END $$
+    """)
+    # A stored generated column is filled in for existing rows too; this rewrites trips under an exclusive lock
+    op.add_column("trips", sa.Column("period", DATERANGE(), sa.Computed(PERIOD, persisted=True)))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_trips_active_period",
+            "trips",
+            ["period"],
+            postgresql_using="gist",
+            postgresql_where=text(ACTIVE),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+    op.execute("ANALYZE trips")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_trips_active_period", table_name="trips", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("trips", "period")
@@ -0,0 +1,29 @@
+"""Materialized view of platform-wide trip totals
+
+Revision ID: 0005_trip_stats_view
+Revises: 0004_trip_period
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005_trip_stats_view"
+down_revision = "0004_trip_period"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A few dozen rows however many trips there are; statsServices refreshes it periodically
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS trip_stats AS
+        SELECT "tripStatus", "paymentStatus", count(*) AS trips, coalesce(sum("tripPayment"), 0) AS payment,
+               now() AS "refreshedAt"
+        FROM trips
+        GROUP BY "tripStatus", "paymentStatus"
+    """)
+    # REFRESH ... CONCURRENTLY needs a unique index, and keeps the view readable while it runs
+    op.execute('CREATE UNIQUE INDEX IF NOT EXISTS ix_trip_stats_status ON trip_stats ("tripStatus", "paymentStatus")')
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS trip_stats")
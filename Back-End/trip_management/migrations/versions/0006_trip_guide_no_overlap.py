@@ -0,0 +1,52 @@
+"""No two accepted or started trips of a guide may overlap
+
+Revision ID: 0006_trip_guide_no_overlap
+Revises: 0005_trip_stats_view
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import text
+
+revision = "0006_trip_guide_no_overlap"
+down_revision = "0005_trip_stats_view"
+branch_labels = None
+depends_on = None
+
+# Mirrors the ex_trips_guide_period constraint on models/tripModels.py
+ACTIVE = "\"tripStatus\" IN ('Accepted', 'Started')"
+
+
+def upgrade():
+    # GiST has no equality operator class for integers without btree_gist
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    # Name the trips that already break the rule, rather than fail on the first one the index build meets
+    op.execute("""
+        DO $$
+        DECLARE
+            overlapping text;
+        BEGIN
+            SELECT string_agg(DISTINCT trip.id::text, ', ') INTO overlapping
+            FROM trips AS trip
+            JOIN trips AS other
+              ON other."tourGuideId" = trip."tourGuideId" AND other.id <> trip.id AND other.period && trip.period
+            WHERE trip."tripStatus" IN ('Accepted', 'Started') AND other."tripStatus" IN ('Accepted', 'Started');
+            IF overlapping IS NOT NULL THEN
+                RAISE EXCEPTION USING
+                    MESSAGE = 'Trips ' || overlapping || ' overlap another accepted or started trip of their tour guide',
+                    HINT = 'Reject or reschedule one trip of each overlapping pair, then upgrade again.';
+            END IF;
+        END $$
+    """)
+    # Builds its index under an exclusive lock on trips; the partial index is small next to the table
+    op.create_exclude_constraint(
+        "ex_trips_guide_period",
+        "trips",
+        ("tourGuideId", "="),
+        ("period", "&&"),
+        using="gist",
+        where=text(ACTIVE),
+    )
+
+
+def downgrade():
+    op.drop_constraint("ex_trips_guide_period", "trips")
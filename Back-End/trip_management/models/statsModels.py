@@ -0,0 +1,12 @@
+from sqlalchemy import DateTime, Float, Integer, String, column, table
+
+# Platform-wide trip totals per (tripStatus, paymentStatus), a materialized view created by migration 0005.
+# Declared as a lightweight table so it stays out of Base.metadata and autogenerate never treats it as a table.
+trip_stats = table(
+    "trip_stats",
+    column("tripStatus", String),
+    column("paymentStatus", String),
+    column("trips", Integer),
+    column("payment", Float),
+    column("refreshedAt", DateTime(timezone=True)),
+)
@@ -1,10 +1,56 @@
 from db import Base
-from sqlalchemy import Integer, Column, String, Float
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Integer, Column, String, Float, Index, Computed, literal_column
+from sqlalchemy.dialects.postgresql import ARRAY, DATERANGE, ExcludeConstraint
+
+TOURIST_ACTIVE_STATUSES = ("Pending", "Accepted", "Started")
+TOUR_GUIDE_ACTIVE_STATUSES = ("Accepted", "Started")
+
+# Trip lifecycle: status -> statuses it may move to. Rejected and Completed are final.
+TRIP_TRANSITIONS = {
+    "Pending": ("Accepted", "Rejected"),
+    "Accepted": ("Started",),
+    "Started": ("Completed",),
+    "Rejected": (),
+    "Completed": (),
+}
+# Payments only move forward
+PAYMENT_TRANSITIONS = {
+    "Pending": ("Half Paid", "Full Paid"),
+    "Half Paid": ("Full Paid",),
+    "Full Paid": (),
+}
+
+# The days a trip occupies, [startDate, startDate + numberOfDays). Generated columns only allow immutable
+# functions, which rules out casting the text date, so it is taken apart and rebuilt with make_date.
+# Trips whose startDate is not an ISO date get no period.
+_START_DATE = 'make_date(substr("startDate", 1, 4)::int, substr("startDate", 6, 2)::int, substr("startDate", 9, 2)::int)'
+TRIP_PERIOD_SQL = (
+    f"""CASE WHEN "startDate" ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' AND "numberOfDays" > 0 """
+    f"""THEN daterange({_START_DATE}, {_START_DATE} + "numberOfDays") END"""
+)
+
+
+def _status_in(statuses) -> str:
+    return '"tripStatus" IN (' + ", ".join(f"'{status}'" for status in statuses) + ")"
 
 
 class Trip(Base):
     __tablename__ = "trips"
+    # Keep in step with the index migrations in migrations/versions/
+    __table_args__ = (
+        Index("ix_trips_tourist_status", "touristId", "tripStatus", postgresql_include=["id", "version"]),
+        Index("ix_trips_guide_status", "tourGuideId", "tripStatus", postgresql_include=["id", "version"]),
+        Index("ix_trips_tourist_active", "touristId", postgresql_where=literal_column(_status_in(TOURIST_ACTIVE_STATUSES))),
+        Index("ix_trips_guide_active", "tourGuideId", postgresql_where=literal_column(_status_in(TOUR_GUIDE_ACTIVE_STATUSES))),
+        Index("ix_trips_completed", "id", postgresql_where=literal_column(_status_in(["Completed"]))),
+        Index("ix_trips_tourist_keyset", "touristId", "id"),
+        Index("ix_trips_guide_keyset", "tourGuideId", "id"),
+        Index("ix_trips_active_period", "period", postgresql_using="gist",
+              postgresql_where=literal_column(_status_in(TOUR_GUIDE_ACTIVE_STATUSES))),
+        # A guide cannot be booked twice for the same day, however many requests commit at once
+        ExcludeConstraint(("tourGuideId", "="), ("period", "&&"), name="ex_trips_guide_period", using="gist",
+                          where=literal_column(_status_in(TOUR_GUIDE_ACTIVE_STATUSES))),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     touristId = Column(Integer)
@@ -19,4 +65,5 @@ class Trip(Base):
     tripStatus = Column(String)
     tripPayment = Column(Float)
     paymentStatus = Column(String)
-
+    period = Column(DATERANGE, Computed(TRIP_PERIOD_SQL, persisted=True))
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
@@ -1,5 +1,10 @@
-from pydantic import BaseModel
-from typing import List
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Literal, Optional
+
+TripStatus = Literal["Pending", "Accepted", "Rejected", "Started", "Completed"]
+PaymentStatus = Literal["Pending", "Half Paid", "Full Paid"]
+BULK_UPDATE_MAX_TRIPS = 500
 
 
 class TripBase(BaseModel):
@@ -18,15 +23,30 @@ class TripBase(BaseModel):
 
 
 class TripCreated(TripBase):
-    pass
+    # A trip occupies [startDate, startDate + numberOfDays), which is empty or reversed below one day
+    numberOfDays: int = Field(ge=1)
+
+    @field_validator("startDate")
+    @classmethod
+    def start_date_is_iso(cls, value: str) -> str:
+        # Trip.period, and with it guide availability, is derived from a YYYY-MM-DD start date
+        datetime.strptime(value[:10], "%Y-%m-%d")
+        return value
 
 
 class TripStatusUpdate(BaseModel):
-    tripStatus: str
+    tripStatus: TripStatus
 
 
 class TripPaymentStatusUpdate(BaseModel):
-    paymentStatus: str
+    paymentStatus: PaymentStatus
+
+
+class TripBulkStatusUpdate(BaseModel):
+    tripIds: List[int] = Field(min_length=1, max_length=BULK_UPDATE_MAX_TRIPS)
+    tripStatus: TripStatus
+    # Only trips of this guide are changed; the others are reported as not found
+    tourGuideId: Optional[int] = None
 
 
 class Trip(TripBase):
@@ -34,3 +54,37 @@ class Trip(TripBase):
 
     class config:
         from_attribute = True
+
+
+class TripPage(BaseModel):
+    items: List[Trip]
+    nextCursor: Optional[str] = None
+
+
+class BusyTourGuides(BaseModel):
+    tourGuideIds: List[int]
+
+
+class TripStatusConflict(BaseModel):
+    id: int
+    tripStatus: str
+
+
+class TripBulkStatusResult(BaseModel):
+    updated: List[Trip]
+    conflicts: List[TripStatusConflict]
+    notFound: List[int]
+
+
+class TripTotals(BaseModel):
+    trips: int
+    payment: float
+
+
+class TripStats(BaseModel):
+    trips: int
+    payment: float
+    byTripStatus: Dict[str, TripTotals]
+    byPaymentStatus: Dict[str, TripTotals]
+    # Set for platform-wide stats, which come from a periodically refreshed view
+    refreshedAt: Optional[datetime] = None
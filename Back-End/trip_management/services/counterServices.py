@@ -0,0 +1,42 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from models.counterModels import Counter
+from models.tripModels import Trip
+from db import SessionLocal
+
+COMPLETED_TRIPS = "completed_trips"
+
+
+def increment(db: Session, name: str, delta: int = 1):
+    stmt = insert(Counter).values(name=name, value=delta)
+    stmt = stmt.on_conflict_do_update(index_elements=[Counter.name], set_={"value": Counter.value + delta})
+    db.execute(stmt)
+
+
+def get_count(db: Session, name: str) -> int:
+    value = db.query(Counter.value).filter(Counter.name == name).scalar()
+    return value or 0
+
+
+def track_status_change(db: Session, old_status: str | None, new_status: str | None, trips: int = 1):
+    if old_status != "Completed" and new_status == "Completed":
+        increment(db, COMPLETED_TRIPS, trips)
+    elif old_status == "Completed" and new_status != "Completed":
+        increment(db, COMPLETED_TRIPS, -trips)
+
+
+def reconcile_counters(db: Session):
+    increment(db, COMPLETED_TRIPS, 0)
+    # Lock the counter row first so in-flight status changes either finish before the recount or wait for it
+    counter = db.query(Counter).filter(Counter.name == COMPLETED_TRIPS).with_for_update().one()
+    counter.value = db.query(Trip).filter(Trip.tripStatus == "Completed").count()
+    db.commit()
+    return counter.value
+
+
+def run_reconciliation():
+    db = SessionLocal()
+    try:
+        return reconcile_counters(db)
+    finally:
+        db.close()
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from db import SessionLocal, engine
+from models.tripModels import Trip
+
+CHANNEL = "trip_events"
+# "postgres" delivers through LISTEN/NOTIFY so every replica sees every change; "memory" only reaches this process
+BACKEND = os.getenv("TRIP_EVENTS_BACKEND", "postgres" if engine.dialect.name == "postgresql" else "memory")
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("TRIP_EVENTS_SUBSCRIBER_QUEUE", "256"))
+LISTEN_POLL_INTERVAL = 5.0
+RECONNECT_DELAY = 1.0
+
+CREATED = "trip.created"
+STATUS_CHANGED = "trip.status_changed"
+PAYMENT_CHANGED = "trip.payment_changed"
+RESYNC = "resync"
+
+logger = logging.getLogger(__name__)
+
+
+def trip_event(event_type: str, trip: Trip, **extra) -> Dict:
+    return {
+        "type": event_type,
+        "tripId": trip.id,
+        "touristId": trip.touristId,
+        "tourGuideId": trip.tourGuideId,
+        "tripStatus": trip.tripStatus,
+        "paymentStatus": trip.paymentStatus,
+        "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        **extra,
+    }
+
+
+def publish(db: Session, payload: Dict):
+    """Queue an event on the current transaction; subscribers only see it once the transaction commits."""
+    message = json.dumps(payload, separators=(",", ":"))
+    if BACKEND == "postgres":
+        # NOTIFY is transactional: Postgres delivers it on commit and drops it on rollback
+        db.execute(text("SELECT pg_notify(:channel, :message)"), {"channel": CHANNEL, "message": message})
+    else:
+        db.info.setdefault("trip_events", []).append(message)
+
+
+def publish_many(db: Session, payloads: List[Dict]):
+    """publish() for a batch of events, in a single statement on postgres."""
+    messages = [json.dumps(payload, separators=(",", ":")) for payload in payloads]
+    if not messages:
+        return
+    if BACKEND == "postgres":
+        db.execute(
+            text("SELECT pg_notify(:channel, message) FROM unnest(CAST(:messages AS text[])) AS message"),
+            {"channel": CHANNEL, "messages": messages},
+        )
+    else:
+        db.info.setdefault("trip_events", []).extend(messages)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _deliver_pending(session: Session):
+    for message in session.info.pop("trip_events", []):
+        bus.dispatch_threadsafe(message)
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _drop_pending(session: Session, transaction):
+    # Runs after after_commit, so only events from rolled back or abandoned transactions are left here
+    if transaction.parent is None:
+        session.info.pop("trip_events", None)
+
+
+class Subscription:
+    def __init__(self, tourist_id: Optional[int], tour_guide_id: Optional[int]):
+        self.tourist_id = tourist_id
+        self.tour_guide_id = tour_guide_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def wants(self, payload: Dict) -> bool:
+        if payload["type"] == RESYNC:
+            return True
+        if self.tourist_id is not None and payload.get("touristId") != self.tourist_id:
+            return False
+        if self.tour_guide_id is not None and payload.get("tourGuideId") != self.tour_guide_id:
+            return False
+        return True
+
+    def offer(self, message: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A subscriber this far behind is cut off; it reconnects and refetches instead
+            self.closed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBus:
+    """Fans committed trip events out to this process's SSE subscribers."""
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.subscriptions: Set[Subscription] = set()
+        self.delivered = 0
+
+    def subscribe(self, tourist_id: Optional[int] = None, tour_guide_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(tourist_id, tour_guide_id)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    def dispatch(self, message: str):
+        payload = json.loads(message)
+        for subscription in list(self.subscriptions):
+            if not subscription.closed and subscription.wants(payload):
+                subscription.offer(message)
+                self.delivered += 1
+
+    def dispatch_threadsafe(self, message: str):
+        # Commits happen in threadpool workers and the listener thread; subscribers live on the event loop
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.dispatch, message)
+
+
+bus = EventBus()
+
+
+def _notifications(dbapi_connection):
+    """Yield NOTIFY payloads that arrive within one poll interval, with psycopg 3 or psycopg2."""
+    if callable(getattr(dbapi_connection, "notifies", None)):
+        for notify in dbapi_connection.notifies(timeout=LISTEN_POLL_INTERVAL):
+            yield notify.payload
+        return
+    if select.select([dbapi_connection], [], [], LISTEN_POLL_INTERVAL) == ([], [], []):
+        return
+    dbapi_connection.poll()
+    while dbapi_connection.notifies:
+        yield dbapi_connection.notifies.pop(0).payload
+
+
+def _listen(stop: threading.Event):
+    while not stop.is_set():
+        connection = None
+        try:
+            connection = engine.raw_connection()
+            connection.detach()
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            # Anything published while we were not listening is lost; tell subscribers to refetch
+            bus.dispatch_threadsafe(json.dumps({"type": RESYNC}))
+            while not stop.is_set():
+                for payload in _notifications(dbapi_connection):
+                    bus.dispatch_threadsafe(payload)
+        except Exception:
+            logger.exception("Trip event listener lost its connection; reconnecting")
+            time.sleep(RECONNECT_DELAY)
+        finally:
+            if connection is not None:
+                connection.close()
+
+
+_listener: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def start():
+    global _listener
+    bus.loop = asyncio.get_running_loop()
+    if BACKEND == "postgres" and _listener is None:
+        _stop.clear()
+        _listener = threading.Thread(target=_listen, args=(_stop,), name="trip-event-listener", daemon=True)
+        _listener.start()
+
+
+def stop():
+    global _listener
+    _stop.set()
+    for subscription in list(bus.subscriptions):
+        subscription.offer(None)
+    _listener = None
+
+
+def get_event_stats() -> Dict:
+    return {"backend": BACKEND, "subscribers": len(bus.subscriptions), "delivered": bus.delivered}
@@ -0,0 +1,60 @@
+from typing import Dict, Iterable
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from models.statsModels import trip_stats
+from models.tripModels import Trip
+from db import SessionLocal
+
+# Any key works as long as every replica uses the same one
+REFRESH_LOCK_KEY = "trip_stats_refresh"
+
+
+def _fold(groups: Iterable) -> Dict:
+    """Turn (tripStatus, paymentStatus, trips, payment) groups into totals and per-status breakdowns."""
+    stats = {"trips": 0, "payment": 0.0, "byTripStatus": {}, "byPaymentStatus": {}}
+    for trip_status, payment_status, trips, payment in groups:
+        payment = float(payment or 0)
+        stats["trips"] += trips
+        stats["payment"] += payment
+        for breakdown, status in (("byTripStatus", trip_status), ("byPaymentStatus", payment_status)):
+            if status is None:
+                continue
+            totals = stats[breakdown].setdefault(status, {"trips": 0, "payment": 0.0})
+            totals["trips"] += trips
+            totals["payment"] += payment
+    return stats
+
+
+def get_trip_stats(db: Session, tourist_id: int = None, tour_guide_id: int = None) -> Dict:
+    """Totals for one tourist's or guide's trips, in a single grouped query over their index range."""
+    query = db.query(Trip.tripStatus, Trip.paymentStatus, func.count(), func.sum(Trip.tripPayment))
+    if tourist_id is not None:
+        query = query.filter(Trip.touristId == tourist_id)
+    if tour_guide_id is not None:
+        query = query.filter(Trip.tourGuideId == tour_guide_id)
+    return _fold(query.group_by(Trip.tripStatus, Trip.paymentStatus).all())
+
+
+def get_platform_stats(db: Session) -> Dict:
+    """Totals for every trip, read from the trip_stats view, so they are as old as its last refresh."""
+    rows = db.execute(select(trip_stats)).all()
+    stats = _fold((row.tripStatus, row.paymentStatus, row.trips, row.payment) for row in rows)
+    stats["refreshedAt"] = max((row.refreshedAt for row in rows), default=None)
+    return stats
+
+
+def refresh_platform_stats(db: Session) -> bool:
+    # Replicas share the view; whichever takes the lock refreshes it and the others skip this round
+    locked = db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {"key": REFRESH_LOCK_KEY}).scalar()
+    if locked:
+        db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY trip_stats"))
+    db.commit()
+    return locked
+
+
+def run_refresh():
+    db = SessionLocal()
+    try:
+        return refresh_platform_stats(db)
+    finally:
+        db.close()
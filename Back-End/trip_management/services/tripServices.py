@@ -1,18 +1,126 @@
-from sqlalchemy.orm import Session
+import base64
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.orm import Session, aliased
 from schemas import tripSchemas
-from models.tripModels import Trip
-from sqlalchemy import or_
-from typing import List
+from models.tripModels import (
+    Trip, TOURIST_ACTIVE_STATUSES, TOUR_GUIDE_ACTIVE_STATUSES, TRIP_TRANSITIONS, PAYMENT_TRANSITIONS,
+)
+from sqlalchemy import exists, or_, update
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, List, Optional, Tuple
+from services import counterServices, eventServices
+from pearl_common import etag
+
+# SQLSTATE of a row rejected by an exclusion constraint; here only ex_trips_guide_period
+EXCLUSION_VIOLATION = "23P01"
+GUIDE_BOOKED = "The tour guide is already booked for these dates"
+
+
+def _period(start_date: date, number_of_days: int) -> Range:
+    if number_of_days < 1:
+        raise ValueError(f"A trip lasts at least one day, not {number_of_days}")
+    return Range(start_date, start_date + timedelta(days=number_of_days), bounds="[)")
+
+
+def _guide_booked(tour_guide_id, period, other_than=None):
+    """True if the guide has an accepted or started trip, other than trip other_than, overlapping period."""
+    booked = aliased(Trip, name="booked")
+    criteria = [
+        booked.tourGuideId == tour_guide_id,
+        booked.tripStatus.in_(TOUR_GUIDE_ACTIVE_STATUSES),
+        booked.period.overlaps(period),
+    ]
+    if other_than is not None:
+        criteria.append(booked.id != other_than)
+    return exists().where(*criteria)
+
+
+@contextmanager
+def _guide_not_double_booked(db: Session, detail: str):
+    """Turn a write rejected by ex_trips_guide_period into a 409.
+
+    The overlap checks in the statements themselves cannot see trips accepted by transactions that have not
+    committed yet; the constraint can, and fails the later of two overlapping bookings.
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        if getattr(exc.orig, "pgcode", None) != EXCLUSION_VIOLATION:
+            raise
+        db.rollback()
+        raise HTTPException(status_code=409, detail=detail)
 
 
 def create_trip(db: Session, data: tripSchemas.TripCreated):
+    period = _period(datetime.strptime(data.startDate[:10], "%Y-%m-%d").date(), data.numberOfDays)
+    # Requests for a guide who is already booked are turned away up front, whatever status they are created in
+    if db.query(_guide_booked(data.tourGuideId, period)).scalar():
+        raise HTTPException(status_code=409, detail=GUIDE_BOOKED)
     new_trip = Trip(**data.model_dump())
     db.add(new_trip)
-    db.commit()
+    counterServices.track_status_change(db, None, new_trip.tripStatus)
+    with _guide_not_double_booked(db, GUIDE_BOOKED):
+        db.flush()
+        eventServices.publish(db, eventServices.trip_event(eventServices.CREATED, new_trip))
+        db.commit()
     db.refresh(new_trip)
     return new_trip
 
 
+def _filtered_trips(db: Session, tourist_id: int = None, tour_guide_id: int = None, statuses: List[str] = None,
+                    payment_status: str = None):
+    query = db.query(Trip)
+    if tourist_id is not None:
+        query = query.filter(Trip.touristId == tourist_id)
+    if tour_guide_id is not None:
+        query = query.filter(Trip.tourGuideId == tour_guide_id)
+    if statuses:
+        query = query.filter(Trip.tripStatus.in_(statuses))
+    if payment_status is not None:
+        query = query.filter(Trip.paymentStatus == payment_status)
+    return query
+
+
+def get_trips_etag(db: Session, tourist_id: int = None, tour_guide_id: int = None, statuses: List[str] = None):
+    query = _filtered_trips(db, tourist_id, tour_guide_id, statuses)
+    return etag.list_etag(query, Trip.id, Trip.version, f"trips:{tourist_id}:{tour_guide_id}:{statuses}")
+
+
+def encode_cursor(order: str, last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{order}:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> int:
+    """Return the id a page starts after; raises ValueError for a malformed cursor or one from the other order."""
+    try:
+        cursor_order, last_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        last_id = int(last_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Malformed cursor")
+    if cursor_order != order:
+        raise ValueError("Cursor was issued for a different sort order")
+    return last_id
+
+
+def query_trips(db: Session, tourist_id: int = None, tour_guide_id: int = None, statuses: List[str] = None,
+                payment_status: str = None, order: str = "desc", after_id: int = None,
+                limit: int = 50) -> Tuple[List[Trip], Optional[str]]:
+    """One page of matching trips in id order and the cursor for the next page, or None on the last page."""
+    query = _filtered_trips(db, tourist_id, tour_guide_id, statuses, payment_status)
+    # Keyset on the primary key: each page is an index range scan, however deep the client has paged
+    if after_id is not None:
+        query = query.filter(Trip.id < after_id if order == "desc" else Trip.id > after_id)
+    query = query.order_by(Trip.id.desc() if order == "desc" else Trip.id.asc())
+    trips = query.limit(limit + 1).all()
+    if len(trips) <= limit:
+        return trips, None
+    return trips[:limit], encode_cursor(order, trips[limit - 1].id)
+
+
 def get_all_trip(db: Session):
     return db.query(Trip).all()
 
@@ -25,26 +133,109 @@ def get_trip_by_tour_guide_id(db: Session, tour_guide_id: int):
     return db.query(Trip).filter(Trip.tourGuideId == tour_guide_id).all()
 
 
+def _sources(transitions: Dict[str, tuple], target: str) -> List[str]:
+    return [source for source, targets in transitions.items() if target in targets]
+
+
+def _transition(db: Session, column, new_value: str, sources: List[str], *criteria):
+    """Move every trip matching criteria whose column is in sources to new_value, in one statement.
+
+    Returns the updated rows, each with the value it moved from as "previous". The source check is part of
+    the UPDATE, so of two concurrent transitions out of the same state only the first one changes the row.
+    """
+    previous = aliased(Trip, name="previous")
+    statement = (
+        update(Trip)
+        .where(*criteria, column.in_(sources), previous.id == Trip.id)
+        # version is set here rather than by its onupdate, whose bare "version + 1" is ambiguous next to the alias
+        .values({column: new_value, Trip.version: Trip.version + 1})
+        .returning(*Trip.__table__.c, getattr(previous, column.key).label("previous"))
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(statement).all()
+
+
+def _trip_fields(row) -> Dict:
+    return {column.key: getattr(row, column.key) for column in Trip.__table__.c}
+
+
+def _conflict(db: Session, trip_id: int, column, new_value: str, sources: List[str]):
+    current = db.query(column).filter(Trip.id == trip_id).scalar()
+    if current is None:
+        return None
+    if current not in sources:
+        raise HTTPException(status_code=409, detail=f"Trip {trip_id} is {current} and cannot move to {new_value}")
+    # The UPDATE skipped a trip in a valid source state: either the overlap guard on accepting stopped it, or
+    # another writer moved it between the UPDATE and this read
+    if column.key == "tripStatus" and new_value == "Accepted":
+        raise HTTPException(status_code=409, detail=f"Trip {trip_id} overlaps another trip of its tour guide")
+    raise HTTPException(status_code=409, detail=f"Trip {trip_id} was changed concurrently; retry")
+
+
+def _acceptable(new_status: str) -> list:
+    # Accepting a trip books its guide, so it must not overlap the guide's other accepted or started trips
+    if new_status != "Accepted":
+        return []
+    return [~_guide_booked(Trip.tourGuideId, Trip.period, other_than=Trip.id)]
+
+
 def update_trip_status(db: Session, tripId: int, status_update: tripSchemas.TripStatusUpdate):
-    trip = db.query(Trip).filter(Trip.id == tripId).first()
+    new_status = status_update.tripStatus
+    sources = _sources(TRIP_TRANSITIONS, new_status)
+    with _guide_not_double_booked(db, f"Trip {tripId} overlaps another trip of its tour guide"):
+        rows = _transition(db, Trip.tripStatus, new_status, sources, Trip.id == tripId, *_acceptable(new_status))
+    if not rows:
+        return _conflict(db, tripId, Trip.tripStatus, new_status, sources)
+    trip = rows[0]
+    counterServices.track_status_change(db, trip.previous, new_status)
+    eventServices.publish(db, eventServices.trip_event(eventServices.STATUS_CHANGED, trip, previousStatus=trip.previous))
+    db.commit()
+    return _trip_fields(trip)
 
-    if trip:
-        trip.tripStatus = status_update.tripStatus
-        db.commit()
-        db.refresh(trip)
-        return trip
-    return None
 
+def bulk_update_trip_status(db: Session, bulk_update: tripSchemas.TripBulkStatusUpdate):
+    new_status = bulk_update.tripStatus
+    trip_ids = list(dict.fromkeys(bulk_update.tripIds))
+    criteria = [Trip.id.in_(trip_ids)]
+    if bulk_update.tourGuideId is not None:
+        criteria.append(Trip.tourGuideId == bulk_update.tourGuideId)
 
-def update_trip_payment_status(db: Session, tripId: int, payment_update: tripSchemas.TripPaymentStatusUpdate):
-    trip = db.query(Trip).filter(Trip.id == tripId).first()
+    sources = _sources(TRIP_TRANSITIONS, new_status)
+    # One statement moves every trip, so a violation fails the whole batch, e.g. two overlapping trips in it
+    with _guide_not_double_booked(db, "Some of these trips overlap each other or another trip of their tour guide; "
+                                      "none were updated"):
+        rows = sorted(_transition(db, Trip.tripStatus, new_status, sources, *criteria, *_acceptable(new_status)),
+                      key=lambda row: row.id)
+    for previous_status, trips in Counter(row.previous for row in rows).items():
+        counterServices.track_status_change(db, previous_status, new_status, trips)
+    eventServices.publish_many(db, [
+        eventServices.trip_event(eventServices.STATUS_CHANGED, row, previousStatus=row.previous) for row in rows
+    ])
+
+    # Only the trips that did not move are looked up again, to tell conflicts from unknown ids
+    updated_ids = {row.id for row in rows}
+    remaining = [trip_id for trip_id in trip_ids if trip_id not in updated_ids]
+    current = dict(db.query(Trip.id, Trip.tripStatus).filter(*criteria, Trip.id.in_(remaining)).all()) if remaining else {}
+    db.commit()
+    return {
+        "updated": [_trip_fields(row) for row in rows],
+        "conflicts": [{"id": trip_id, "tripStatus": current[trip_id]} for trip_id in remaining if trip_id in current],
+        "notFound": [trip_id for trip_id in remaining if trip_id not in current],
+    }
 
-    if trip:
-        trip.paymentStatus = payment_update.paymentStatus
-        db.commit()
-        db.refresh(trip)
-        return trip
-    return None
+
+def update_trip_payment_status(db: Session, tripId: int, payment_update: tripSchemas.TripPaymentStatusUpdate):
+    new_status = payment_update.paymentStatus
+    sources = _sources(PAYMENT_TRANSITIONS, new_status)
+    rows = _transition(db, Trip.paymentStatus, new_status, sources, Trip.id == tripId)
+    if not rows:
+        return _conflict(db, tripId, Trip.paymentStatus, new_status, sources)
+    trip = rows[0]
+    eventServices.publish(
+        db, eventServices.trip_event(eventServices.PAYMENT_CHANGED, trip, previousPaymentStatus=trip.previous)
+    )
+    db.commit()
+    return _trip_fields(trip)
 
 def get_completed_trips_by_tourist(db: Session, tourist_id: int):
     return db.query(Trip).filter(
@@ -86,28 +277,31 @@ def get_complated_trips_by_tour_guide(db: Session, tour_guide_id: int):
     ).all()
 
 def count_completed_trips(db: Session):
-    return db.query(Trip).filter(Trip.tripStatus == "Completed").count()
+    return counterServices.get_count(db, counterServices.COMPLETED_TRIPS)
 
 def has_active_trip_for_tourist(db: Session, tourist_id: int) -> bool:
-    active_trip = db.query(Trip).filter(
+    # Same predicate as the ix_trips_tourist_active partial index, so the planner can use it
+    active_trip = db.query(Trip.id).filter(
         Trip.touristId == tourist_id,
-        or_(
-            Trip.tripStatus == "Pending",
-            Trip.tripStatus == "Accepted",
-            Trip.tripStatus == "Started"
-        )
+        Trip.tripStatus.in_(TOURIST_ACTIVE_STATUSES)
     ).first()
 
     return active_trip is not None
 
 
 def has_active_trip_for_tour_guide(db: Session, tour_guide_id: int) -> bool:
-    active_trip = db.query(Trip).filter(
+    active_trip = db.query(Trip.id).filter(
         Trip.tourGuideId == tour_guide_id,
-        or_(
-            Trip.tripStatus == "Accepted",
-            Trip.tripStatus == "Started"
-        )
+        Trip.tripStatus.in_(TOUR_GUIDE_ACTIVE_STATUSES)
     ).first()
 
     return active_trip is not None
+
+
+def get_busy_tour_guides(db: Session, start_date: date, number_of_days: int) -> List[int]:
+    """Guides with an accepted or started trip overlapping the window, read from ix_trips_active_period."""
+    rows = db.query(Trip.tourGuideId).filter(
+        Trip.tripStatus.in_(TOUR_GUIDE_ACTIVE_STATUSES),
+        Trip.period.overlaps(_period(start_date, number_of_days))
+    ).distinct().all()
+    return sorted(tour_guide_id for tour_guide_id, in rows)
@@ -1,10 +1,17 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    SECRET_KEY: str
-    ALGORITHM: str
+    ALGORITHM: str = "RS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    JWT_ISSUER: str = "the-pearl-user-management"
+    # Created by rotate_keys.py. Every replica must read the same directory, or tokens signed by one fail
+    # verification against the JWKS another publishes.
+    JWT_KEYS_DIR: str = "keys"
+    JWT_ACTIVE_KID: Optional[str] = None
+    JWT_PUBLISHED_KEYS: int = 3
+    COUNTER_RECONCILE_INTERVAL: float = 300
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,5 +1,8 @@
+from sqlalchemy import text
 from db import engine, Base
-from models import userModels, touristModel, tourGuideModels, adminModels
+from models import userModels, touristModel, tourGuideModels, adminModels, counterModels
+
+VERSIONED_TABLES = ["users", "tourists", "tour_guides"]
 
 
 def create_tables():
@@ -8,5 +11,14 @@ def create_tables():
     print("Tables created successfully!")
 
 
+def upgrade_tables():
+    print("Upgrading existing tables...")
+    with engine.begin() as connection:
+        for table in VERSIONED_TABLES:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1"))
+    print("Tables upgraded successfully!")
+
+
 if __name__ == "__main__":
     create_tables()
+    upgrade_tables()
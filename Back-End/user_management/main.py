@@ -1,17 +1,47 @@
+import asyncio
+import logging
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, status
+from pearl_common import metrics, responses, tracing, etag
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from db import engine, Base, get_db
+from db import engine, async_engine, Base, get_db, get_session, run_in_session
 from models import userModels
 from schemas import tokenSchema, touristSchema, userSchema, adminSchema, tourGuideSchema
-from services import authService, userService, tourGuideService, touristService
+from services import authService, userService, tourGuideService, touristService, counterService
 from utils.hash import verify_password
+from utils import keys
+from config import settings
 from fastapi.middleware.cors import CORSMiddleware
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+async def _reconcile_counters_periodically():
+    while True:
+        try:
+            await run_in_threadpool(counterService.run_reconciliation)
+        except Exception:
+            logger.exception("Counter reconciliation failed")
+        await asyncio.sleep(settings.COUNTER_RECONCILE_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Refuse to start without a provisioned signing key rather than fail every login
+    keys.load_private_keys()
+    reconciler = asyncio.create_task(_reconcile_counters_periodically())
+    yield
+    reconciler.cancel()
+
+app = FastAPI(lifespan=lifespan, default_response_class=responses.default_response_class())
+responses.add_compression(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,10 +51,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.instrument(app)
+tracing.instrument(app, "user")
+tracing.instrument_sqlalchemy(engine)
+if async_engine is not None:
+    tracing.instrument_sqlalchemy(async_engine.sync_engine)
+
+
+@app.get("/health")
+async def health_check(db=Depends(get_session)):
+    try:
+        await run_in_session(db, lambda session: session.execute(text("SELECT 1")))
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ok"}
+
+
 @app.get("/", tags=["Root"])
 def read_root():
     return {"message": "Welcome to the User Management Service! 👤"}
 
+# Registration and login hash or verify a bcrypt password, which is CPU bound, so these stay sync routes
+# on the threadpool with a sync session in either database mode
 @app.post("/auth/register/tourist", status_code=status.HTTP_201_CREATED, tags=["Authentication"])
 def register_new_tourist(
         tourist_reg_data: touristSchema.TouristRegistration,
@@ -77,20 +125,42 @@ def login_for_access_token(
 
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.get("/.well-known/jwks.json", tags=["Authentication"])
+def read_jwks():
+    return keys.get_jwks()
+
+@app.get("/users/me/identity", response_model=tokenSchema.TokenData, tags=["Users"])
+def read_current_user_identity(
+        identity: tokenSchema.TokenData = Depends(authService.get_current_identity)
+):
+    return identity
+
 @app.get("/users/me", response_model=userSchema.UserDetails, tags=["Users"])
-def read_current_user_profile(
+async def read_current_user_profile(
         current_user: userModels.User = Depends(authService.get_current_user)
 ):
     return current_user
 
 @app.get("/users/tour-guides", response_model=list[tourGuideSchema.TourGuideInfo], tags=["Users"])
-def read_tour_guides(db: Session = Depends(get_db)):
-    return tourGuideService.get_all_tour_guides(db)
+async def read_tour_guides(request: Request, response: Response, db=Depends(get_session)):
+    tour_guides_etag = await run_in_session(db, tourGuideService.get_all_tour_guides_etag)
+    not_modified = etag.conditional(request, response, tour_guides_etag)
+    if not_modified:
+        return not_modified
+    return await run_in_session(db, tourGuideService.get_all_tour_guides)
+
+@app.post("/users/bulk", response_model=list[userSchema.UserSummary], tags=["Users"])
+async def read_users_bulk(request: userSchema.UserBulkRequest, db=Depends(get_session)):
+    return await run_in_session(db, userService.get_users_by_ids, request.userIds)
 
 @app.get("/tourists/{user_id}/profile", response_model=userSchema.UserDetails, tags=["Tourists"])
-def read_tourist_profile(user_id: int, db: Session = Depends(get_db)):
+async def read_tourist_profile(user_id: int, request: Request, response: Response, db=Depends(get_session)):
+    profile_etag = await run_in_session(db, userService.get_profile_etag, user_id)
+    not_modified = etag.conditional(request, response, profile_etag)
+    if not_modified:
+        return not_modified
 
-    db_user = touristService.get_tourist_profile(db, user_id=user_id)
+    db_user = await run_in_session(db, touristService.get_tourist_profile, user_id=user_id)
 
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -98,9 +168,13 @@ def read_tourist_profile(user_id: int, db: Session = Depends(get_db)):
     return db_user
 
 @app.get("/tour-guide/{user_id}/profile", response_model=userSchema.UserDetails, tags=["Tour Guides"])
-def read_tour_guides_profile(user_id: int, db: Session = Depends(get_db)):
+async def read_tour_guides_profile(user_id: int, request: Request, response: Response, db=Depends(get_session)):
+    profile_etag = await run_in_session(db, userService.get_profile_etag, user_id)
+    not_modified = etag.conditional(request, response, profile_etag)
+    if not_modified:
+        return not_modified
 
-    db_user = tourGuideService.get_tour_guide_profile(db, user_id=user_id)
+    db_user = await run_in_session(db, tourGuideService.get_tour_guide_profile, user_id=user_id)
 
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -108,9 +182,9 @@ def read_tour_guides_profile(user_id: int, db: Session = Depends(get_db)):
     return db_user
 
 @app.patch("/tourists/{user_id}/profile", response_model=userSchema.UserDetails, tags=["Tourists"])
-def update_specific_tourist_profile(user_id: int, profile_data: touristSchema.TouristProfileUpdate, db: Session = Depends(get_db)):
+async def update_specific_tourist_profile(user_id: int, profile_data: touristSchema.TouristProfileUpdate, db=Depends(get_session)):
 
-    updated_user = touristService.update_tourist_profile(db, user_id=user_id, update_data=profile_data)
+    updated_user = await run_in_session(db, touristService.update_tourist_profile, user_id=user_id, update_data=profile_data)
 
     if updated_user is None:
         raise HTTPException(status_code=404, detail="Tourist profile not found")
@@ -118,9 +192,9 @@ def update_specific_tourist_profile(user_id: int, profile_data: touristSchema.To
     return updated_user
 
 @app.patch("/tour-guide/{user_id}/profile", response_model=userSchema.UserDetails, tags=["Tour Guides"])
-def update_specific_tour_guide_profile(user_id: int, profile_data: tourGuideSchema.TourGuideProfileUpdate, db: Session = Depends(get_db)):
+async def update_specific_tour_guide_profile(user_id: int, profile_data: tourGuideSchema.TourGuideProfileUpdate, db=Depends(get_session)):
 
-    updated_user = tourGuideService.update_tour_guide_profile(db, user_id=user_id, update_data=profile_data)
+    updated_user = await run_in_session(db, tourGuideService.update_tour_guide_profile, user_id=user_id, update_data=profile_data)
 
     if updated_user is None:
         raise HTTPException(status_code=404, detail="Tour guide profile not found")
@@ -128,12 +202,12 @@ def update_specific_tour_guide_profile(user_id: int, profile_data: tourGuideSche
     return updated_user
 
 @app.get("/api/users/count", response_model=dict, tags=["Users"])
-def get_user_counts(db: Session = Depends(get_db)):
-    return userService.count_users_by_role(db)
+async def get_user_counts(db=Depends(get_session)):
+    return await run_in_session(db, userService.count_users_by_role)
 
 @app.delete("/tour-guide/delete-tour-guide/{user_id}")
-def delete_tour_guide(user_id: int, db: Session = Depends(get_db)):
-    return tourGuideService.delete_tour_guide(db, user_id)
+async def delete_tour_guide(user_id: int, db=Depends(get_session)):
+    return await run_in_session(db, tourGuideService.delete_tour_guide, user_id)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
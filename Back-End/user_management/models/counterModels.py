@@ -0,0 +1,9 @@
+from db import Base
+from sqlalchemy import Column, Integer, String
+
+
+class Counter(Base):
+    __tablename__ = "counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -1,5 +1,5 @@
 from db import Base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, literal_column
 from sqlalchemy.orm import relationship
 
 
@@ -13,5 +13,6 @@ class TourGuide(Base):
     address = Column(String)
     licenseNumber = Column(String)
     reviewCount = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
 
     user = relationship("User", back_populates="tour_guide")
@@ -1,5 +1,5 @@
 from db import Base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, literal_column
 from sqlalchemy.orm import relationship
 
 
@@ -12,5 +12,6 @@ class Tourist(Base):
     country = Column(String)
     address = Column(String)
     birthDay = Column(String)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
 
     user = relationship("User", back_populates="tourist")
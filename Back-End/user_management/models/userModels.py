@@ -1,5 +1,5 @@
 from db import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, literal_column
 from sqlalchemy.orm import relationship
 
 
@@ -12,7 +12,10 @@ class User(Base):
     role = Column(String)
     hashedPassword = Column(String)
     profilePicture = Column(String)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
 
-    tourist = relationship("Tourist", back_populates="user", uselist=False, cascade="all, delete-orphan")
-    tour_guide = relationship("TourGuide", back_populates="user", uselist=False, cascade="all, delete-orphan")
-    admin = relationship("Admin", back_populates="user", uselist=False, cascade="all, delete-orphan")
\ No newline at end of file
+    # Every profile response includes these, so they load in the same query rather than lazily. Lazy loads
+    # would also fail in async mode, where the response is serialized after the session's greenlet has returned.
+    tourist = relationship("Tourist", back_populates="user", uselist=False, cascade="all, delete-orphan", lazy="joined")
+    tour_guide = relationship("TourGuide", back_populates="user", uselist=False, cascade="all, delete-orphan", lazy="joined")
+    admin = relationship("Admin", back_populates="user", uselist=False, cascade="all, delete-orphan", lazy="joined")
@@ -0,0 +1,16 @@
+"""Create a new JWT signing key in JWT_KEYS_DIR and make it the active one.
+
+This is also how the first key is provisioned; the service does not create keys itself. Run it once against the
+key directory all user_management replicas share.
+"""
+from utils.keys import rotate_signing_key
+
+
+def rotate_keys():
+    print("Rotating JWT signing key...")
+    kid = rotate_signing_key()
+    print(f"New signing key '{kid}' is active.")
+
+
+if __name__ == "__main__":
+    rotate_keys()
@@ -9,3 +9,5 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: EmailStr | None = None
     userId: int | None = None
+    role: str | None = None
+    userName: str | None = None
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, computed_field
+from typing import List, Optional
+from pearl_common import images
 
 class TourGuideBase(BaseModel):
     nic: str
@@ -24,6 +25,11 @@ class TourGuideInfo(TourGuideBase):
     profilePicture: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
+    @computed_field
+    @property
+    def profilePictureVariants(self) -> List[images.ImageVariant]:
+        return images.variant_urls(self.profilePicture)
+
 class TourGuideRegistration(BaseModel):
     name: str
     email: EmailStr
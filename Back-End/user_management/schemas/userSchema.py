@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, computed_field
+from typing import Optional, List
+from pearl_common import images
 
 
 class UserBase(BaseModel):
@@ -16,6 +17,28 @@ class User(UserBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
+    @computed_field
+    @property
+    def profilePictureVariants(self) -> List[images.ImageVariant]:
+        return images.variant_urls(self.profilePicture)
+
+
+class UserSummary(BaseModel):
+    id: int
+    name: str
+    role: str
+    profilePicture: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def profilePictureVariants(self) -> List[images.ImageVariant]:
+        return images.variant_urls(self.profilePicture)
+
+
+class UserBulkRequest(BaseModel):
+    userIds: List[int] = Field(..., max_length=500)
+
 
 class UserDetails(User):
     tourist: Optional['Tourist'] = None
@@ -5,21 +5,30 @@ from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from config import settings
-from db import get_db
+from db import get_session, run_in_session
 from models import userModels, touristModel, tourGuideModels, adminModels
 from schemas import touristSchema, tourGuideSchema, adminSchema, tokenSchema
-from services import userService
+from services import userService, counterService
 from utils.hash import hash_password
+from utils import keys
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode.update({"exp": expire, "iss": settings.JWT_ISSUER})
+    kid, signing_key = keys.get_signing_key()
+    encoded_jwt = jwt.encode(to_encode, signing_key, algorithm=settings.ALGORITHM, headers={"kid": kid})
     return encoded_jwt
 
+def decode_access_token(token: str) -> dict:
+    kid = jwt.get_unverified_header(token).get("kid")
+    public_key = keys.get_public_key(kid) if kid else None
+    if public_key is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(token, public_key, algorithms=[settings.ALGORITHM], issuer=settings.JWT_ISSUER)
+
 def register_tourist(db: Session, tourist_reg: touristSchema.TouristRegistration):
     db_user = userService.get_user_by_email(db, email=tourist_reg.email)
     if db_user:
@@ -33,6 +42,7 @@ def register_tourist(db: Session, tourist_reg: touristSchema.TouristRegistration
         profilePicture=tourist_reg.profilePicture
     )
     db.add(new_user)
+    counterService.track_role(db, new_user.role)
     db.commit()
     db.refresh(new_user)
 
@@ -62,6 +72,7 @@ def register_tour_guide(db: Session, tour_guide_reg: tourGuideSchema.TourGuideRe
         profilePicture=tour_guide_reg.profilePicture
     )
     db.add(new_user)
+    counterService.track_role(db, new_user.role)
     db.commit()
     db.refresh(new_user)
 
@@ -105,22 +116,35 @@ def register_admin(db: Session, admin_reg):
 
     return new_user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_identity(token: str = Depends(oauth2_scheme)) -> tokenSchema.TokenData:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = tokenSchema.TokenData(email=email)
+        return tokenSchema.TokenData(
+            email=email,
+            userId=payload.get("userId"),
+            role=payload.get("role"),
+            userName=payload.get("userName")
+        )
     except JWTError:
         raise credentials_exception
 
-    user = userService.get_user_by_email(db, email=token_data.email)
+async def get_current_user(identity: tokenSchema.TokenData = Depends(get_current_identity), db=Depends(get_session)):
+    if identity.userId is not None:
+        user = await run_in_session(db, userService.get_user, user_id=identity.userId)
+    else:
+        user = await run_in_session(db, userService.get_user_by_email, email=identity.email)
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -0,0 +1,43 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from models.counterModels import Counter
+from models import userModels
+from db import SessionLocal
+
+ROLE_COUNTERS = {"tourist": "tourists", "tour_guide": "tour_guides"}
+
+
+def increment(db: Session, name: str, delta: int = 1):
+    stmt = insert(Counter).values(name=name, value=delta)
+    stmt = stmt.on_conflict_do_update(index_elements=[Counter.name], set_={"value": Counter.value + delta})
+    db.execute(stmt)
+
+
+def track_role(db: Session, role: str, delta: int = 1):
+    if role in ROLE_COUNTERS:
+        increment(db, ROLE_COUNTERS[role], delta)
+
+
+def get_counts(db: Session) -> dict:
+    rows = db.query(Counter.name, Counter.value).filter(Counter.name.in_(list(ROLE_COUNTERS.values()))).all()
+    return dict(rows)
+
+
+def reconcile_counters(db: Session):
+    for name in ROLE_COUNTERS.values():
+        increment(db, name, 0)
+    # Lock the counter rows first so in-flight registrations/deletes either finish before the recount or wait for it
+    counters = db.query(Counter).filter(Counter.name.in_(list(ROLE_COUNTERS.values()))).with_for_update().all()
+    counters = {counter.name: counter for counter in counters}
+    for role, name in ROLE_COUNTERS.items():
+        counters[name].value = db.query(userModels.User).filter(userModels.User.role == role).count()
+    db.commit()
+    return {name: counter.value for name, counter in counters.items()}
+
+
+def run_reconciliation():
+    db = SessionLocal()
+    try:
+        return reconcile_counters(db)
+    finally:
+        db.close()
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session, joinedload
 from models import tourGuideModels, userModels
 from schemas import tourGuideSchema
+from services import counterService
+from pearl_common import etag
 
 def get_all_tour_guides(db: Session):
     tour_guides = db.query(tourGuideModels.TourGuide).options(
@@ -26,6 +28,15 @@ def get_all_tour_guides(db: Session):
 
     return result
 
+def get_all_tour_guides_etag(db: Session):
+    query = db.query(tourGuideModels.TourGuide).join(tourGuideModels.TourGuide.user)
+    return etag.list_etag(
+        query,
+        tourGuideModels.TourGuide.id,
+        tourGuideModels.TourGuide.version + userModels.User.version,
+        "tour-guides"
+    )
+
 def get_tour_guide_profile(db: Session, user_id: int ):
     return db.query(userModels.User).filter(userModels.User.id == user_id).first()
 
@@ -50,5 +61,6 @@ def delete_tour_guide(db: Session, user_id: int):
     retrieved_guide = db.query(userModels.User).filter(userModels.User.id == user_id).first()
     if retrieved_guide:
         db.delete(retrieved_guide)
+        counterService.track_role(db, retrieved_guide.role, -1)
         db.commit()
         return"Deleted"
\ No newline at end of file
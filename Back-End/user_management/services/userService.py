@@ -1,5 +1,9 @@
 from sqlalchemy.orm import Session
 from models import userModels
+from typing import List
+from services import counterService
+from models import touristModel, tourGuideModels
+from pearl_common import etag
 
 
 def get_user_by_email(db: Session, email: str):
@@ -9,8 +13,27 @@ def get_user_by_email(db: Session, email: str):
 def get_user(db: Session, user_id: int):
     return db.query(userModels.User).filter(userModels.User.id == user_id).first()
 
+def get_profile_etag(db: Session, user_id: int):
+    versions = db.query(
+        userModels.User.version,
+        touristModel.Tourist.version,
+        tourGuideModels.TourGuide.version
+    ).outerjoin(userModels.User.tourist).outerjoin(userModels.User.tour_guide).filter(
+        userModels.User.id == user_id
+    ).first()
+    return etag.make_etag("profile", user_id, *versions) if versions else None
+
+def get_users_by_ids(db: Session, user_ids: List[int]):
+    if not user_ids:
+        return []
+    return db.query(
+        userModels.User.id,
+        userModels.User.name,
+        userModels.User.role,
+        userModels.User.profilePicture
+    ).filter(userModels.User.id.in_(list(set(user_ids)))).all()
+
 def count_users_by_role(db: Session):
-    tourists_count = db.query(userModels.User).filter(userModels.User.role == "tourist").count()
-    tour_guides_count = db.query(userModels.User).filter(userModels.User.role == "tour_guide").count()
+    counts = counterService.get_counts(db)
 
-    return {"tourists_count": tourists_count, "tour_guides_count": tour_guides_count}
+    return {"tourists_count": counts.get("tourists", 0), "tour_guides_count": counts.get("tour_guides", 0)}
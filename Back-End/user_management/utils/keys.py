@@ -0,0 +1,100 @@
+import os
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+
+from config import settings
+
+_cache: Dict = {"stamp": None, "keys": {}, "public_keys": {}}
+
+
+def _key_path(kid: str) -> str:
+    return os.path.join(settings.JWT_KEYS_DIR, f"{kid}.pem")
+
+
+def _dir_stamp():
+    try:
+        return os.stat(settings.JWT_KEYS_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def generate_signing_key() -> str:
+    os.makedirs(settings.JWT_KEYS_DIR, exist_ok=True)
+    kid = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    fd = os.open(_key_path(kid), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as key_file:
+        key_file.write(pem)
+    return kid
+
+
+class SigningKeyMissing(RuntimeError):
+    pass
+
+
+def load_private_keys() -> Dict[str, bytes]:
+    # Keys are never created here: a replica that made its own would sign tokens the others do not publish
+    stamp = _dir_stamp()
+    if stamp is None:
+        raise SigningKeyMissing(_missing_key_message())
+    if stamp != _cache["stamp"]:
+        keys = {}
+        for file_name in sorted(os.listdir(settings.JWT_KEYS_DIR)):
+            if file_name.endswith(".pem"):
+                with open(os.path.join(settings.JWT_KEYS_DIR, file_name), "rb") as key_file:
+                    keys[file_name[:-len(".pem")]] = key_file.read()
+        if not keys:
+            raise SigningKeyMissing(_missing_key_message())
+        _cache.update(stamp=stamp, keys=keys, public_keys={})
+    return _cache["keys"]
+
+
+def _missing_key_message() -> str:
+    return (
+        f"No JWT signing key in {os.path.abspath(settings.JWT_KEYS_DIR)}. Create one with `python rotate_keys.py`, "
+        f"and point JWT_KEYS_DIR of every user_management replica at the same directory."
+    )
+
+
+def get_signing_key() -> Tuple[str, bytes]:
+    keys = load_private_keys()
+    kid = settings.JWT_ACTIVE_KID if settings.JWT_ACTIVE_KID in keys else max(keys)
+    return kid, keys[kid]
+
+
+def get_public_key(kid: str) -> bytes | None:
+    private_pem = load_private_keys().get(kid)
+    if private_pem is None:
+        return None
+    if kid not in _cache["public_keys"]:
+        private_key = serialization.load_pem_private_key(private_pem, password=None)
+        _cache["public_keys"][kid] = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    return _cache["public_keys"][kid]
+
+
+def get_jwks() -> Dict:
+    keys = []
+    for kid in sorted(load_private_keys(), reverse=True):
+        public_jwk = jwk.construct(get_public_key(kid), algorithm=settings.ALGORITHM).to_dict()
+        public_jwk.update({"kid": kid, "use": "sig", "alg": settings.ALGORITHM})
+        keys.append(public_jwk)
+    return {"keys": keys}
+
+
+def rotate_signing_key() -> str:
+    kid = generate_signing_key()
+    # Older keys stay published so tokens signed before the rotation still verify
+    for old_kid in sorted(load_private_keys(), reverse=True)[settings.JWT_PUBLISHED_KEYS:]:
+        os.remove(_key_path(old_kid))
+    return kid